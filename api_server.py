@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+api_server.py
+学生信息管理系统 - HTTP/JSON API服务入口
+选课高峰期由一个服务进程为所有用户提供接口，代替每人一个终端客户端
+
+用法：
+    python api_server.py                       # 监听127.0.0.1:8080
+    SMS_API_HOST=0.0.0.0 SMS_API_WORKERS=64 python api_server.py
+"""
+import os
+import sys
+
+# 确保能正确导入模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.db_config import DBConfig
+from utils.db_init import check_database
+from server import create_server
+
+
+def main():
+    """主函数"""
+    db_config = DBConfig.get_local_config()
+    api_config = DBConfig.get_api_config()
+
+    if not check_database(db_config):
+        print("数据库未初始化，请先运行: python main.py 或 python utils/db_init.py")
+        return
+
+    server = create_server(db_config, api_config)
+    if not server.service.db_conn.test_connection():
+        print("✗ 数据库连接失败，请检查配置")
+        server.server_close()
+        return
+
+    print(f"✓ API服务已启动: http://{api_config['host']}:{api_config['port']}/api "
+          f"（工作线程 {api_config['workers']}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止服务...")
+    finally:
+        server.server_close()
+        server.service.close()
+        server.service.db_conn.disconnect()
+
+
+if __name__ == '__main__':
+    main()
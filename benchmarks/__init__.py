@@ -0,0 +1,4 @@
+"""
+性能测试模块
+抢课压测、数据生成和模型基准测试
+"""
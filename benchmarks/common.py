@@ -0,0 +1,55 @@
+"""
+common.py
+性能测试公共工具：数据库参数、延迟统计
+"""
+import argparse
+import math
+from typing import Dict, Any, List
+
+from config.db_config import DBConfig
+
+
+def add_db_arguments(parser: argparse.ArgumentParser):
+    """添加数据库连接参数（默认使用本地配置）"""
+    local = DBConfig.get_local_config()
+    group = parser.add_argument_group('数据库连接')
+    group.add_argument('--host', default=local['host'])
+    group.add_argument('--port', type=int, default=local['port'])
+    group.add_argument('--user', default=local['user'])
+    group.add_argument('--password', default=local['password'])
+    group.add_argument('--database', default=local['database'])
+
+
+def db_config_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    """根据命令行参数生成数据库配置"""
+    return {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'database': args.database,
+        'charset': 'utf8mb4'
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法求百分位数（输入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, Any]:
+    """汇总延迟（秒）为毫秒统计"""
+    values = sorted(latencies)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+    }
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+datagen.py
+规模测试数据生成与批量导入
+
+按固定随机种子生成可复现的教师、学生、课程、选课（含成绩分布）和操作日志数据，
+使用大批量多行INSERT（executemany）或LOAD DATA LOCAL INFILE分块提交导入。
+
+用法示例：
+    python -m benchmarks.datagen --scale medium --seed 42
+    python -m benchmarks.datagen --students 200000 --courses 5000 --enrollments 3000000 --method infile
+"""
+import os
+import sys
+import csv
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Sequence
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DatabaseConnection
+from models import Enrollment
+from models.enrollment import calc_grade
+from models.search_index import StudentSearchIndex
+from models.summary import StatisticsSummary
+from benchmarks.common import add_db_arguments, db_config_from_args
+
+# 预设规模：学生数、课程数、选课记录数、操作日志数
+SCALES = {
+    'small': {'students': 10000, 'courses': 500, 'enrollments': 200000, 'logs': 50000},
+    'medium': {'students': 100000, 'courses': 3000, 'enrollments': 2000000, 'logs': 500000},
+    'large': {'students': 200000, 'courses': 6000, 'enrollments': 5000000, 'logs': 2000000},
+}
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+GIVEN_CHARS = '伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍红鹏辉玲建国宇浩然子轩梓涵一诺欣怡思远博文雨泽佳琪晨阳嘉怡俊杰婷婷'
+
+DEPARTMENTS = {
+    'CS': ('计算机学院', ['计算机科学与技术', '软件工程', '信息安全', '数据科学', '人工智能']),
+    'MA': ('数学学院', ['数学与应用数学', '统计学', '信息与计算科学']),
+    'EE': ('电子工程学院', ['电子信息工程', '通信工程', '自动化']),
+    'EC': ('经济管理学院', ['经济学', '金融学', '工商管理', '会计学']),
+    'FL': ('外国语学院', ['英语', '日语', '翻译']),
+}
+COURSE_WORDS = ['导论', '原理', '基础', '高级专题', '实验', '方法', '分析', '设计', '系统', '应用']
+COURSE_TYPES = ['必修', '选修', '实践']
+TITLES = ['教授', '副教授', '讲师', '助教']
+STUDENT_STATUS = (['在读'] * 90) + (['休学'] * 3) + (['退学'] * 2) + (['毕业'] * 5)
+OPERATIONS = ['用户登录', '用户登出', '选课', '退课', '录入成绩', '修改学生', '查看成绩']
+
+COHORTS = [2021, 2022, 2023, 2024]
+SEMESTERS = [f"{y}-{t}" for y in COHORTS for t in (1, 2)]
+CURRENT_SEMESTER = SEMESTERS[-1]
+
+DEFAULT_PASSWORD_HASH = hashlib.md5(b'123456').hexdigest()
+
+
+class DataGenerator:
+    """可复现的数据生成器：同样的种子和规模总是生成同样的数据"""
+
+    def __init__(self, seed: int, students: int, courses: int, enrollments: int, logs: int,
+                 teachers: int = None, accounts: int = 0):
+        self.seed = seed
+        self.students = students
+        self.courses = courses
+        self.enrollments = enrollments
+        self.logs = logs
+        self.teachers = teachers or max(10, courses // 4)
+        self.accounts = min(accounts, students)
+
+    def _rng(self, table: str) -> random.Random:
+        """每张表使用独立的随机序列，单独生成某张表也能复现"""
+        return random.Random(f"{self.seed}:{table}")
+
+    @staticmethod
+    def _name(rng: random.Random) -> str:
+        return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2))))
+
+    def student_id(self, i: int) -> str:
+        """第i个学生的学号（入学年份+6位序号）"""
+        return f"{COHORTS[i % len(COHORTS)]}{i:06d}"
+
+    def course_id(self, i: int) -> str:
+        """第i门课程的编号（学院代码+5位序号）"""
+        codes = list(DEPARTMENTS)
+        return f"{codes[i % len(codes)]}{i:05d}"
+
+    def course_semester(self, i: int) -> str:
+        """第i门课程的开课学期"""
+        return SEMESTERS[i % len(SEMESTERS)]
+
+    def gen_teachers(self) -> Iterator[tuple]:
+        rng = self._rng('teachers')
+        codes = list(DEPARTMENTS)
+        for i in range(self.teachers):
+            dept = DEPARTMENTS[codes[i % len(codes)]][0]
+            yield (f"T{i:05d}", self._name(rng), rng.choice('男女'), rng.choice(TITLES), dept,
+                   f"138{rng.randrange(10 ** 8):08d}", f"t{i:05d}@edu.cn")
+
+    def gen_students(self) -> Iterator[tuple]:
+        rng = self._rng('students')
+        codes = list(DEPARTMENTS)
+        for i in range(self.students):
+            year = COHORTS[i % len(COHORTS)]
+            code = codes[rng.randrange(len(codes))]
+            major = rng.choice(DEPARTMENTS[code][1])
+            class_name = f"{major[:2]}{str(year)[2:]}{rng.randint(1, 8):02d}"
+            sid = self.student_id(i)
+            yield (sid, self._name(rng), rng.choice('男女'), 2025 - year + 18, major, class_name,
+                   f"139{rng.randrange(10 ** 8):08d}", f"{sid}@stu.edu.cn",
+                   date(year, 9, 1), rng.choice(STUDENT_STATUS))
+
+    def gen_courses(self) -> Iterator[tuple]:
+        rng = self._rng('courses')
+        codes = list(DEPARTMENTS)
+        for i in range(self.courses):
+            code = codes[i % len(codes)]
+            dept, majors = DEPARTMENTS[code]
+            name = f"{rng.choice(majors)}{rng.choice(COURSE_WORDS)}{rng.choice('ⅠⅡⅢ')}"
+            credits = rng.choice((1.0, 2.0, 2.0, 3.0, 3.0, 4.0))
+            yield (self.course_id(i), name, credits, int(credits * 16),
+                   f"T{rng.randrange(self.teachers):05d}", dept, self.course_semester(i),
+                   rng.choice(COURSE_TYPES), rng.choice((60, 80, 100, 120, 150, 200)),
+                   f"{rng.choice('ABCDE')}{rng.randint(101, 520)}",
+                   f"周{rng.choice('一二三四五')} {rng.choice(('1-2', '3-4', '5-6', '7-8'))}节")
+
+    def gen_enrollments(self) -> Iterator[tuple]:
+        """每个学生选若干门不重复课程；非当前学期的课程带成绩（近似正态分布）"""
+        rng = self._rng('enrollments')
+        per_student = self.enrollments / max(self.students, 1)
+        remaining = self.enrollments
+        for i in range(self.students):
+            if remaining <= 0:
+                return
+            # 每人选课数在平均值附近浮动
+            k = min(remaining, self.courses, max(0, int(rng.gauss(per_student, per_student / 4) + 0.5)))
+            remaining -= k
+            sid = self.student_id(i)
+            for c in rng.sample(range(self.courses), k):
+                semester = self.course_semester(c)
+                if semester == CURRENT_SEMESTER:
+                    score, grade = None, None
+                else:
+                    score = round(min(100.0, max(0.0, rng.gauss(76, 12))), 1)
+                    grade = calc_grade(score)
+                yield (sid, self.course_id(c), semester, score, grade, '已选')
+
+    def gen_accounts(self) -> Iterator[tuple]:
+        """为前N个学生创建系统账号（stu_学号 / 123456）"""
+        for i in range(self.accounts):
+            sid = self.student_id(i)
+            yield (f"stu_{sid}", DEFAULT_PASSWORD_HASH, 'student', sid, None)
+
+    def gen_logs(self) -> Iterator[tuple]:
+        rng = self._rng('operation_logs')
+        start = datetime(COHORTS[0], 9, 1)
+        span = int((datetime(COHORTS[-1] + 1, 7, 1) - start).total_seconds())
+        for _ in range(self.logs):
+            sid = self.student_id(rng.randrange(max(self.students, 1)))
+            yield (None, f"stu_{sid}", 'student', rng.choice(OPERATIONS), 'enrollments', sid,
+                   f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                   start + timedelta(seconds=rng.randrange(span)))
+
+
+# 表名 -> (列名, 生成器方法名)
+TABLES = [
+    ('teachers', ('teacher_id', 'name', 'gender', 'title', 'department', 'phone', 'email'),
+     'gen_teachers'),
+    ('students', ('student_id', 'name', 'gender', 'age', 'major', 'class_name', 'phone', 'email',
+                  'enrollment_date', 'status'), 'gen_students'),
+    ('courses', ('course_id', 'course_name', 'credits', 'hours', 'teacher_id', 'department',
+                 'semester', 'course_type', 'max_students', 'classroom', 'schedule'), 'gen_courses'),
+    ('enrollments', ('student_id', 'course_id', 'semester', 'score', 'grade', 'status'),
+     'gen_enrollments'),
+    ('system_users', ('username', 'password_hash', 'role', 'related_id', 'real_name'), 'gen_accounts'),
+    ('operation_logs', ('user_id', 'username', 'role', 'operation', 'table_name', 'record_id',
+                        'ip_address', 'operation_time'), 'gen_logs'),
+]
+
+
+class BulkLoader:
+    """批量导入器：分块写入，每块一次提交"""
+
+    def __init__(self, db: DatabaseConnection, method: str = 'executemany', chunk_size: int = 5000):
+        self.db = db
+        self.method = method
+        self.chunk_size = chunk_size
+
+    def load(self, table: str, columns: Sequence[str], rows: Iterator[tuple]) -> Dict[str, Any]:
+        """导入一张表，返回行数、耗时和速度"""
+        started = time.perf_counter()
+        total = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            if self.method == 'infile':
+                self._load_infile(table, columns, chunk)
+            else:
+                self._load_executemany(table, columns, chunk)
+            total += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"\r  {table}: {total} 行  {total / elapsed:,.0f} 行/秒", end='', flush=True)
+        elapsed = time.perf_counter() - started
+        print()
+        return {'rows': total, 'seconds': round(elapsed, 2),
+                'rows_per_sec': round(total / elapsed) if elapsed > 0 else 0}
+
+    def _load_executemany(self, table: str, columns: Sequence[str], chunk: List[tuple]):
+        """executemany会把INSERT ... VALUES改写为多行INSERT，每块一次提交"""
+        query = (f"INSERT IGNORE INTO {table} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+        with self.db.transaction():
+            self.db.execute_many(query, chunk)
+
+    def _load_infile(self, table: str, columns: Sequence[str], chunk: List[tuple]):
+        """写入临时CSV后用LOAD DATA LOCAL INFILE导入（连接需开启local_infile）"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False,
+                                         encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            for row in chunk:
+                writer.writerow(['\\N' if v is None else v for v in row])
+            path = f.name
+        try:
+            query = (f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table} "
+                     f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                     f"LINES TERMINATED BY '\\n' ({', '.join(columns)})")
+            with self.db.transaction():
+                self.db.execute_update(query, (path.replace('\\', '/'),))
+        finally:
+            os.unlink(path)
+
+
+def generate(db: DatabaseConnection, generator: DataGenerator, method: str = 'executemany',
+             chunk_size: int = 5000) -> Dict[str, Any]:
+    """生成并导入全部数据，最后重建选课人数计数、搜索索引和统计汇总"""
+    loader = BulkLoader(db, method, chunk_size)
+    report = {}
+    started = time.perf_counter()
+    for table, columns, gen_name in TABLES:
+        report[table] = loader.load(table, columns, getattr(generator, gen_name)())
+
+    print("  重建选课人数计数...")
+    repaired = Enrollment(db).reconcile_enrolled_counts()
+    report['course_enrollment_counts'] = {'rows': len(repaired)}
+
+    print("  重建学生搜索索引...")
+    StudentSearchIndex(db).rebuild()
+
+    print("  重建统计汇总...")
+    StatisticsSummary(db).rebuild()
+
+    elapsed = time.perf_counter() - started
+    total = sum(v['rows'] for k, v in report.items() if k != 'course_enrollment_counts')
+    report['total'] = {'rows': total, 'seconds': round(elapsed, 2),
+                       'rows_per_sec': round(total / elapsed) if elapsed > 0 else 0}
+    return report
+
+
+def truncate(db: DatabaseConnection):
+    """清空业务表（仅用于测试库）"""
+    for table in ['operation_logs', 'course_enrollment_counts', 'student_search_tokens',
+                  'statistics_summary', 'enrollments',
+                  'courses', 'students', 'teachers']:
+        db.execute_update(f"DELETE FROM {table}")
+    db.execute_update("DELETE FROM system_users WHERE role = 'student' AND username LIKE %s",
+                      ('stu\\_%',))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成并导入规模测试数据")
+    add_db_arguments(parser)
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help="预设规模")
+    parser.add_argument('--students', type=int, help="学生数（覆盖预设）")
+    parser.add_argument('--courses', type=int, help="课程数（覆盖预设）")
+    parser.add_argument('--enrollments', type=int, help="选课记录数（覆盖预设）")
+    parser.add_argument('--logs', type=int, help="操作日志数（覆盖预设）")
+    parser.add_argument('--accounts', type=int, default=0, help="为前N个学生创建账号（密码123456）")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--method', choices=['executemany', 'infile'], default='executemany',
+                        help="导入方式：多行INSERT或LOAD DATA LOCAL INFILE")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="每次提交的行数")
+    parser.add_argument('--truncate', action='store_true', help="导入前清空业务表（危险，仅限测试库）")
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    config = db_config_from_args(args)
+    if args.method == 'infile':
+        config['local_infile'] = True
+
+    db = DatabaseConnection(config)
+    try:
+        if args.truncate:
+            truncate(db)
+        generator = DataGenerator(args.seed, accounts=args.accounts, **sizes)
+        print(f"生成数据（种子 {args.seed}）：{sizes}")
+        report = generate(db, generator, args.method, args.chunk_size)
+        total = report['total']
+        print(f"\n共导入 {total['rows']} 行，耗时 {total['seconds']}s，{total['rows_per_sec']:,} 行/秒")
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
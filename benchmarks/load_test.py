@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+load_test.py
+抢课压测：模拟N个学生同时登录、浏览可选课程、选课和退课
+
+用法示例（先在本地MySQL/OceanBase上准备压测数据）：
+    python -m benchmarks.load_test --prepare --sessions 200 --courses 20 --capacity 50
+    python -m benchmarks.load_test --sessions 200 --iterations 10 --skew 1.2 --output result.json
+    python -m benchmarks.load_test --mode async --sessions 2000 --workers 20
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import asyncio
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DatabaseConnection, AsyncDatabaseConnection, AdmissionGate, OperationLogWriter
+from models import Course, Enrollment, User, AsyncCourse, AsyncEnrollment, AsyncUser
+from models.enrollment import ENROLL_SUCCESS, ENROLL_ERROR, ENROLL_BUSY
+from models.search_index import StudentSearchIndex
+from models.summary import StatisticsSummary
+from benchmarks.common import add_db_arguments, db_config_from_args, summarize_latencies
+
+# 压测数据前缀，便于与真实数据区分和清理
+STUDENT_PREFIX = 'LT'
+USERNAME_PREFIX = 'lt_'
+COURSE_PREFIX = 'LTC'
+
+OPERATIONS = ('login', 'list_courses', 'enroll', 'drop')
+
+
+def prepare(db: DatabaseConnection, students: int, courses: int, capacity: int,
+            semester: str, password: str):
+    """准备压测数据：学生、学生账号、课程，清空上次压测的选课记录，并重建搜索索引和统计汇总"""
+    password_hash = hashlib.md5(password.encode()).hexdigest()
+
+    student_rows = [
+        (f"{STUDENT_PREFIX}{i:06d}", f"压测学生{i}", '男' if i % 2 else '女', 20,
+         '计算机科学与技术', f"压测{i // 50:03d}班")
+        for i in range(1, students + 1)
+    ]
+    user_rows = [
+        (f"{USERNAME_PREFIX}{i:06d}", password_hash, 'student', f"{STUDENT_PREFIX}{i:06d}", f"压测学生{i}")
+        for i in range(1, students + 1)
+    ]
+    course_rows = [
+        (f"{COURSE_PREFIX}{i:04d}", f"压测课程{i}", 2.0, '计算机学院', semester, '选修', capacity)
+        for i in range(1, courses + 1)
+    ]
+
+    with db.transaction():
+        db.execute_many(
+            "INSERT IGNORE INTO students (student_id, name, gender, age, major, class_name) "
+            "VALUES (%s, %s, %s, %s, %s, %s)", student_rows)
+        db.execute_many(
+            "INSERT INTO system_users (username, password_hash, role, related_id, real_name) "
+            "VALUES (%s, %s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE password_hash = VALUES(password_hash), is_active = 1", user_rows)
+        db.execute_many(
+            "INSERT INTO courses (course_id, course_name, credits, department, semester, "
+            "course_type, max_students) VALUES (%s, %s, %s, %s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE semester = VALUES(semester), max_students = VALUES(max_students)",
+            course_rows)
+        db.execute_update(
+            "DELETE FROM enrollments WHERE course_id LIKE %s AND semester = %s",
+            (f"{COURSE_PREFIX}%", semester))
+        db.execute_update(
+            "DELETE FROM course_enrollment_counts WHERE course_id LIKE %s AND semester = %s",
+            (f"{COURSE_PREFIX}%", semester))
+        db.execute_many(
+            "INSERT INTO course_enrollment_counts (course_id, semester, enrolled_count) "
+            "VALUES (%s, %s, 0)", [(r[0], semester) for r in course_rows])
+
+    # 上面直接写表绕过了模型，与datagen一样重建搜索索引和统计汇总
+    StudentSearchIndex(db).rebuild()
+    StatisticsSummary(db).rebuild()
+
+    print(f"已准备 {students} 名学生账号、{courses} 门课程（容量 {capacity}），学期 {semester}")
+
+
+def load_accounts(db: DatabaseConnection, limit: int) -> List[str]:
+    """读取压测学生账号"""
+    rows = db.execute_query(
+        "SELECT username FROM system_users WHERE username LIKE %s AND role = 'student' "
+        "ORDER BY username LIMIT %s", (f"{USERNAME_PREFIX}%", limit))
+    return [r['username'] for r in rows]
+
+
+def zipf_weights(n: int, skew: float) -> List[float]:
+    """课程热度权重：第i热门课程的权重为 1/i^skew（skew=0为均匀分布）"""
+    return [1.0 / (i ** skew) for i in range(1, n + 1)]
+
+
+def run_session(db: DatabaseConnection, spec: Dict[str, Any],
+                admission: AdmissionGate = None, log_writer: OperationLogWriter = None,
+                barrier: threading.Barrier = None) -> Dict[str, Any]:
+    """
+    单个模拟学生会话
+
+    Returns:
+        {'latencies': {操作: [秒...]}, 'results': {选课结果: 次数}, 'errors': 次数}
+    """
+    rng = random.Random(spec['seed'])
+    user_model = User(db, log_writer)
+    course_model = Course(db)
+    enrollment_model = Enrollment(db, admission)
+
+    latencies = defaultdict(list)
+    results = Counter()
+    errors = 0
+    enrolled = []
+
+    def think():
+        low, high = spec['think']
+        if high > 0:
+            time.sleep(rng.uniform(low, high))
+
+    def timed(op, func, *args):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception:
+            errors += 1
+            return None
+        finally:
+            latencies[op].append(time.perf_counter() - start)
+
+    if barrier:
+        barrier.wait()
+
+    user = timed('login', user_model.login, spec['username'], spec['password'])
+    if not user:
+        return {'latencies': dict(latencies), 'results': dict(results), 'errors': errors + 1}
+    student_id = user['related_id']
+
+    for _ in range(spec['iterations']):
+        think()
+        courses = timed('list_courses', course_model.get_available_courses, spec['semester']) or []
+        courses = [c for c in courses if c['course_id'].startswith(COURSE_PREFIX)]
+        if courses:
+            # 热门课程被更多人争抢
+            weights = [spec['weights'].get(c['course_id'], 0.0) for c in courses]
+            if sum(weights) > 0:
+                course_id = rng.choices(courses, weights=weights)[0]['course_id']
+            else:
+                course_id = rng.choice(courses)['course_id']
+
+            think()
+            result = timed('enroll', enrollment_model.try_enroll, student_id, course_id, spec['semester'])
+            if result:
+                results[result] += 1
+                if result in (ENROLL_ERROR, ENROLL_BUSY):
+                    errors += 1
+                elif result == ENROLL_SUCCESS:
+                    enrolled.append(course_id)
+
+        if enrolled and rng.random() < spec['drop_ratio']:
+            think()
+            course_id = enrolled.pop(rng.randrange(len(enrolled)))
+            if not timed('drop', enrollment_model.drop_course, student_id, course_id, spec['semester']):
+                errors += 1
+
+    user_model.logout()
+    return {'latencies': dict(latencies), 'results': dict(results), 'errors': errors}
+
+
+async def run_async_session(adb: AsyncDatabaseConnection, spec: Dict[str, Any],
+                            admission: AdmissionGate = None, log_writer: OperationLogWriter = None,
+                            start: asyncio.Event = None) -> Dict[str, Any]:
+    """单个模拟学生会话的协程版本（流程与run_session相同，所有会话共用工作线程池）"""
+    rng = random.Random(spec['seed'])
+    user_model = AsyncUser(adb, log_writer)
+    course_model = AsyncCourse(adb)
+    enrollment_model = AsyncEnrollment(adb, admission)
+
+    latencies = defaultdict(list)
+    results = Counter()
+    errors = 0
+    enrolled = []
+
+    async def think():
+        low, high = spec['think']
+        if high > 0:
+            await asyncio.sleep(rng.uniform(low, high))
+
+    async def timed(op, func, *args):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            return await func(*args)
+        except Exception:
+            errors += 1
+            return None
+        finally:
+            latencies[op].append(time.perf_counter() - started)
+
+    if start:
+        await start.wait()
+
+    user = await timed('login', user_model.login, spec['username'], spec['password'])
+    if not user:
+        return {'latencies': dict(latencies), 'results': dict(results), 'errors': errors + 1}
+    student_id = user['related_id']
+
+    for _ in range(spec['iterations']):
+        await think()
+        courses = await timed('list_courses', course_model.get_available_courses, spec['semester']) or []
+        courses = [c for c in courses if c['course_id'].startswith(COURSE_PREFIX)]
+        if courses:
+            weights = [spec['weights'].get(c['course_id'], 0.0) for c in courses]
+            if sum(weights) > 0:
+                course_id = rng.choices(courses, weights=weights)[0]['course_id']
+            else:
+                course_id = rng.choice(courses)['course_id']
+
+            await think()
+            result = await timed('enroll', enrollment_model.try_enroll, student_id, course_id, spec['semester'])
+            if result:
+                results[result] += 1
+                if result in (ENROLL_ERROR, ENROLL_BUSY):
+                    errors += 1
+                elif result == ENROLL_SUCCESS:
+                    enrolled.append(course_id)
+
+        if enrolled and rng.random() < spec['drop_ratio']:
+            await think()
+            course_id = enrolled.pop(rng.randrange(len(enrolled)))
+            if not await timed('drop', enrollment_model.drop_course, student_id, course_id, spec['semester']):
+                errors += 1
+
+    await user_model.logout()
+    return {'latencies': dict(latencies), 'results': dict(results), 'errors': errors}
+
+
+async def _run_async_sessions(db: DatabaseConnection, specs: List[Dict[str, Any]],
+                              use_admission: bool, workers: int) -> List[Dict[str, Any]]:
+    """异步模式：所有会话作为协程运行在一个事件循环上，共用workers个工作线程"""
+    adb = AsyncDatabaseConnection(db, workers)
+    admission = AdmissionGate() if use_admission else None
+    log_writer = OperationLogWriter(db)
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(run_async_session(adb, spec, admission, log_writer, start))
+             for spec in specs]
+    start.set()
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        log_writer.close()
+        # 连接池还要用于检查超额选课，由调用方关闭
+        await adb.close(disconnect=False)
+
+
+def _process_session(config: Dict[str, Any], spec: Dict[str, Any], use_admission: bool) -> Dict[str, Any]:
+    """进程模式下的会话入口：每个进程使用独立连接，模拟独立的终端客户端"""
+    db = DatabaseConnection(config, {'min_size': 1, 'max_size': 1})
+    try:
+        return run_session(db, spec, AdmissionGate() if use_admission else None)
+    finally:
+        db.disconnect()
+
+
+def check_overbooking(db: DatabaseConnection, semester: str) -> List[Dict[str, Any]]:
+    """检查选课人数超过容量的课程"""
+    return db.execute_query("""
+        SELECT c.course_id, c.max_students, COUNT(*) as enrolled
+        FROM courses c
+        JOIN enrollments e ON e.course_id = c.course_id AND e.semester = %s
+        WHERE c.course_id LIKE %s
+        GROUP BY c.course_id, c.max_students
+        HAVING COUNT(*) > c.max_students
+    """, (semester, f"{COURSE_PREFIX}%"))
+
+
+def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """执行压测并汇总结果"""
+    config = db_config_from_args(args)
+    # 异步模式下连接数等于工作线程数，其余模式每个会话一个连接
+    pool_size = args.workers if args.mode == 'async' else args.sessions
+    db = DatabaseConnection(config, {'min_size': 1, 'max_size': max(pool_size, 1),
+                                     'timeout': 60.0})
+    try:
+        if args.prepare:
+            prepare(db, args.sessions, args.courses, args.capacity, args.semester, args.student_password)
+
+        accounts = load_accounts(db, args.sessions)
+        if len(accounts) < args.sessions:
+            print(f"压测账号不足：需要 {args.sessions} 个，现有 {len(accounts)} 个，请先使用 --prepare")
+            return {}
+
+        # 按课程编号固定热度排名，编号越小越热门
+        weights = {f"{COURSE_PREFIX}{i:04d}": w
+                   for i, w in enumerate(zipf_weights(args.courses, args.skew), 1)}
+        specs = [{
+            'username': username,
+            'password': args.student_password,
+            'semester': args.semester,
+            'iterations': args.iterations,
+            'think': (args.think_min, args.think_max),
+            'weights': weights,
+            'drop_ratio': args.drop_ratio,
+            'seed': args.seed + i,
+        } for i, username in enumerate(accounts)]
+
+        print(f"开始压测：{args.sessions} 个会话（{args.mode}），每个会话 {args.iterations} 轮")
+        started = time.perf_counter()
+
+        if args.mode == 'process':
+            with ProcessPoolExecutor(max_workers=args.sessions) as executor:
+                outcomes = list(executor.map(_process_session, [config] * len(specs), specs,
+                                             [args.admission] * len(specs)))
+        elif args.mode == 'async':
+            outcomes = asyncio.run(_run_async_sessions(db, specs, args.admission, args.workers))
+        else:
+            admission = AdmissionGate() if args.admission else None
+            log_writer = OperationLogWriter(db)
+            barrier = threading.Barrier(len(specs))
+            with ThreadPoolExecutor(max_workers=len(specs)) as executor:
+                futures = [executor.submit(run_session, db, spec, admission, log_writer, barrier)
+                           for spec in specs]
+                outcomes = [f.result() for f in futures]
+            log_writer.close()
+
+        elapsed = time.perf_counter() - started
+
+        latencies = defaultdict(list)
+        results = Counter()
+        errors = 0
+        for outcome in outcomes:
+            for op, values in outcome['latencies'].items():
+                latencies[op].extend(values)
+            results.update(outcome['results'])
+            errors += outcome['errors']
+
+        overbooked = check_overbooking(db, args.semester)
+        total_ops = sum(len(v) for v in latencies.values())
+
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'params': {k: v for k, v in vars(args).items()
+                       if k not in ('password', 'student_password')},
+            'elapsed_sec': round(elapsed, 3),
+            'total_operations': total_ops,
+            'throughput_ops': round(total_ops / elapsed, 2) if elapsed > 0 else 0,
+            'operations': {op: summarize_latencies(latencies[op]) for op in OPERATIONS if op in latencies},
+            'enroll_results': dict(results),
+            'errors': errors,
+            'overbooked_courses': len(overbooked),
+            'overbooked_detail': overbooked,
+        }
+        return report
+    finally:
+        db.disconnect()
+
+
+def print_report(report: Dict[str, Any]):
+    """打印压测结果"""
+    print("\n" + "=" * 70)
+    print(f"耗时: {report['elapsed_sec']}s  总操作数: {report['total_operations']}  "
+          f"吞吐: {report['throughput_ops']} ops/s")
+    print("-" * 70)
+    print(f"{'操作':<14} {'次数':>8} {'平均ms':>10} {'p50ms':>10} {'p95ms':>10} {'p99ms':>10}")
+    for op, s in report['operations'].items():
+        print(f"{op:<14} {s['count']:>8} {s['mean_ms']:>10} {s['p50_ms']:>10} "
+              f"{s['p95_ms']:>10} {s['p99_ms']:>10}")
+    print("-" * 70)
+    print(f"选课结果: {report['enroll_results']}")
+    print(f"错误数: {report['errors']}  超额选课课程数: {report['overbooked_courses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抢课压测")
+    add_db_arguments(parser)
+    parser.add_argument('--sessions', type=int, default=50, help="并发学生会话数")
+    parser.add_argument('--mode', choices=['thread', 'process', 'async'], default='thread',
+                        help="thread: 共享连接池；process: 每个会话独立进程和连接；"
+                             "async: 协程会话共用有界工作线程池")
+    parser.add_argument('--workers', type=int, default=20, help="async模式的工作线程数（即连接数）")
+    parser.add_argument('--iterations', type=int, default=5, help="每个会话的选课轮数")
+    parser.add_argument('--semester', default='LT-1', help="压测使用的学期")
+    parser.add_argument('--courses', type=int, default=20, help="参与抢课的课程数")
+    parser.add_argument('--capacity', type=int, default=30, help="--prepare时每门课程的容量")
+    parser.add_argument('--skew', type=float, default=1.0, help="课程热度倾斜（Zipf指数，0为均匀）")
+    parser.add_argument('--think-min', type=float, default=0.0, help="思考时间下限（秒）")
+    parser.add_argument('--think-max', type=float, default=0.2, help="思考时间上限（秒）")
+    parser.add_argument('--drop-ratio', type=float, default=0.1, help="每轮退课概率")
+    parser.add_argument('--admission', action='store_true', help="启用按课程的准入限流")
+    parser.add_argument('--student-password', default='123456', help="压测账号密码")
+    parser.add_argument('--prepare', action='store_true', help="压测前准备账号和课程并清空上次的选课")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='loadtest_result.json', help="结果JSON文件")
+    args = parser.parse_args()
+
+    report = run_load_test(args)
+    if not report:
+        return
+
+    print_report(report)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\n结果已保存到 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+model_bench.py
+模型方法基准测试：在不同规模的生成数据上逐个测量Student/Course/Enrollment/User的公开方法
+
+每个用例记录耗时、返回行数、SQL语句数和进程内存峰值，结果保存为JSON，
+可与保存的基线比较并标出超过阈值的性能回退。
+
+用法示例：
+    # 依次生成10k/100k/1M规模数据并测试（会清空业务表，仅限测试库）
+    python -m benchmarks.model_bench --load --scales 10k,100k,1m --output bench.json
+    # 在现有数据上测试并与基线比较，有回退时退出码为1
+    python -m benchmarks.model_bench --baseline bench.json --threshold 0.2
+"""
+import io
+import os
+import sys
+import json
+import time
+import inspect
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DatabaseConnection, EntityCache
+from models import Student, Course, Enrollment, User
+from benchmarks.common import add_db_arguments, db_config_from_args
+from benchmarks.datagen import DataGenerator, generate, truncate, CURRENT_SEMESTER
+
+# 规模以选课记录数计，其余表按比例生成
+BENCH_SCALES = {
+    '10k': {'students': 1000, 'courses': 100, 'enrollments': 10000, 'logs': 10000},
+    '100k': {'students': 10000, 'courses': 500, 'enrollments': 100000, 'logs': 100000},
+    '1m': {'students': 50000, 'courses': 2000, 'enrollments': 1000000, 'logs': 1000000},
+}
+
+# 基准测试专用记录，便于清理
+BENCH_STUDENT_ID = 'BM000001'
+BENCH_COURSE_ID = 'BMC0001'
+BENCH_ADMIN = 'bench_admin'
+BENCH_USER = 'bench_user'
+BENCH_PASSWORD = '123456'
+
+# get_many用例每次获取的ID数
+BATCH_IDS = 1000
+
+# bulk_import用例导入的行数（学号为BMI前缀，用例结束后删除）
+BULK_IMPORT_ROWS = 500
+BULK_IMPORT_IDS = [f"BMI{i:05d}" for i in range(BULK_IMPORT_ROWS)]
+BULK_IMPORT_CSV = "student_id,name,gender,major,class_name\n" + "".join(
+    f"{sid},批量学生{i},{'男' if i % 2 else '女'},计算机科学与技术,基准0{i % 4 + 1}班\n"
+    for i, sid in enumerate(BULK_IMPORT_IDS))
+
+
+class CountingDatabaseConnection(DatabaseConnection):
+    """统计执行语句数的数据库连接（executemany、execute_batch按一次计）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.query_count = 0
+
+    def execute_query(self, query, params=None):
+        self.query_count += 1
+        return super().execute_query(query, params)
+
+    def execute_update(self, query, params=None):
+        self.query_count += 1
+        return super().execute_update(query, params)
+
+    def execute_many(self, query, params_list):
+        self.query_count += 1
+        return super().execute_many(query, params_list)
+
+    def execute_batch(self, statements):
+        self.query_count += 1
+        return super().execute_batch(statements)
+
+    def iter_query(self, query, params=None, batch_size=1000, batches=False):
+        self.query_count += 1
+        return super().iter_query(query, params, batch_size, batches)
+
+
+class BenchCase:
+    """一个基准用例：run(ctx)为被测调用，setup/teardown不计入耗时"""
+
+    def __init__(self, name: str, run: Callable, setup: Optional[Callable] = None,
+                 teardown: Optional[Callable] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+
+
+class BenchContext:
+    """用例共享的模型实例和样本数据"""
+
+    def __init__(self, db: CountingDatabaseConnection):
+        self.db = db
+        self.student = Student(db)
+        self.course = Course(db)
+        self.enrollment = Enrollment(db)
+        self.user = User(db)
+        # 带实体缓存的模型（测量缓存命中时的开销）
+        self.cache = EntityCache()
+        self.cached_student = Student(db, self.cache)
+        self.cached_course = Course(db, self.cache)
+
+        # 样本：一条有成绩的选课记录
+        row = db.execute_query("""
+            SELECT e.student_id, e.course_id, e.semester, e.score, c.teacher_id
+            FROM enrollments e JOIN courses c ON e.course_id = c.course_id
+            WHERE e.score IS NOT NULL LIMIT 1
+        """)
+        if not row:
+            raise RuntimeError("数据库中没有带成绩的选课记录，请先使用--load生成数据")
+        sample = row[0]
+        self.student_id = sample['student_id']
+        self.course_id = sample['course_id']
+        self.semester = sample['semester']
+        self.score = float(sample['score'])
+        self.teacher_id = sample['teacher_id']
+
+        # 样本课程的现有成绩，重新录入不改变数据
+        self.course_scores = [
+            (r['student_id'], float(r['score']))
+            for r in db.execute_query(
+                "SELECT student_id, score FROM enrollments "
+                "WHERE course_id = %s AND semester = %s AND score IS NOT NULL",
+                (self.course_id, self.semester))
+        ]
+
+        # 当前学期中样本学生未选的一门课程，用于选课/退选
+        row = db.execute_query("""
+            SELECT c.course_id FROM courses c
+            WHERE c.semester = %s AND c.course_id NOT IN (
+                SELECT course_id FROM enrollments WHERE student_id = %s)
+            LIMIT 1
+        """, (CURRENT_SEMESTER, self.student_id))
+        self.free_course_id = row[0]['course_id'] if row else self.course_id
+
+        # 批量获取用的ID列表（倒序传入，结果须按传入顺序返回）
+        self.student_ids = [r['student_id'] for r in db.execute_query(
+            "SELECT student_id FROM students ORDER BY student_id DESC LIMIT %s", (BATCH_IDS,))]
+        self.course_ids = [r['course_id'] for r in db.execute_query(
+            "SELECT course_id FROM courses ORDER BY course_id DESC LIMIT %s", (BATCH_IDS,))]
+        self.user_ids = [r['user_id'] for r in db.execute_query(
+            "SELECT user_id FROM system_users ORDER BY user_id DESC LIMIT %s", (BATCH_IDS,))]
+
+        self._prepare_accounts()
+        self.bench_user_id = None
+
+    def _prepare_accounts(self):
+        """准备基准测试管理员账号并登录"""
+        password_hash = self.user._encrypt_password(BENCH_PASSWORD)
+        self.db.execute_update(
+            "INSERT IGNORE INTO system_users (username, password_hash, role, real_name, is_active) "
+            "VALUES (%s, %s, 'admin', '基准测试', TRUE)", (BENCH_ADMIN, password_hash))
+        self.db.execute_update("UPDATE system_users SET password_hash = %s WHERE username = %s",
+                               (password_hash, BENCH_ADMIN))
+        self.user.login(BENCH_ADMIN, BENCH_PASSWORD)
+
+    def cleanup(self):
+        """删除基准测试产生的记录"""
+        self.db.execute_update("DELETE FROM enrollments WHERE student_id = %s", (BENCH_STUDENT_ID,))
+        self.db.execute_update("DELETE FROM students WHERE student_id = %s", (BENCH_STUDENT_ID,))
+        self.db.execute_update("DELETE FROM students WHERE student_id LIKE %s", ('BMI%',))
+        self.db.execute_update("DELETE FROM course_enrollment_counts WHERE course_id = %s",
+                               (BENCH_COURSE_ID,))
+        self.db.execute_update("DELETE FROM courses WHERE course_id = %s", (BENCH_COURSE_ID,))
+        self.db.execute_update("DELETE FROM system_users WHERE username IN (%s, %s)",
+                               (BENCH_ADMIN, BENCH_USER))
+
+
+def _bench_student_data() -> Dict[str, Any]:
+    return {'student_id': BENCH_STUDENT_ID, 'name': '基准学生', 'major': '计算机科学与技术',
+            'class_name': '基准01班'}
+
+
+def _bench_course_data() -> Dict[str, Any]:
+    return {'course_id': BENCH_COURSE_ID, 'course_name': '基准课程', 'semester': CURRENT_SEMESTER}
+
+
+def _create_bench_user(ctx: BenchContext):
+    ctx.db.execute_update("DELETE FROM system_users WHERE username = %s", (BENCH_USER,))
+    ctx.user.create_user({'username': BENCH_USER, 'role': 'student', 'password': BENCH_PASSWORD})
+    row = ctx.db.execute_query("SELECT user_id FROM system_users WHERE username = %s", (BENCH_USER,))
+    ctx.bench_user_id = row[0]['user_id'] if row else 0
+
+
+def _delete_bulk_students(ctx: BenchContext):
+    for student_id in BULK_IMPORT_IDS:
+        ctx.student.delete(student_id)
+
+
+def _bulk_import(ctx: BenchContext):
+    return ctx.student.bulk_import(io.StringIO(BULK_IMPORT_CSV), 'csv', workers=0, progress=False)
+
+
+def _drop_free_course(ctx: BenchContext):
+    ctx.enrollment.drop_course(ctx.student_id, ctx.free_course_id, CURRENT_SEMESTER)
+
+
+def _enroll_free_course(ctx: BenchContext):
+    ctx.enrollment.try_enroll(ctx.student_id, ctx.free_course_id, CURRENT_SEMESTER)
+
+
+def build_cases() -> List[BenchCase]:
+    """全部基准用例（名称为 类名.方法名[:变体]）"""
+    return [
+        # Student
+        BenchCase('Student.create', lambda c: c.student.create(_bench_student_data()),
+                  setup=lambda c: c.student.delete(BENCH_STUDENT_ID)),
+        BenchCase('Student.get_by_id', lambda c: c.student.get_by_id(c.student_id)),
+        BenchCase('Student.get_by_id:cached', lambda c: c.cached_student.get_by_id(c.student_id)),
+        BenchCase('Student.get_many', lambda c: c.student.get_many(c.student_ids)),
+        BenchCase('Student.get_many:cached', lambda c: c.cached_student.get_many(c.student_ids)),
+        BenchCase('Student.get_all', lambda c: c.student.get_all()),
+        BenchCase('Student.iter_all', lambda c: c.student.iter_all()),
+        BenchCase('Student.bulk_import', _bulk_import,
+                  setup=_delete_bulk_students, teardown=_delete_bulk_students),
+        BenchCase('Student.iter_filtered', lambda c: c.student.iter_filtered({'major': '计算机'})),
+        BenchCase('Student.update', lambda c: c.student.update(BENCH_STUDENT_ID, {'age': 20}),
+                  setup=lambda c: c.student.create(_bench_student_data())),
+        BenchCase('Student.delete', lambda c: c.student.delete(BENCH_STUDENT_ID),
+                  setup=lambda c: c.student.create(_bench_student_data())),
+        BenchCase('Student.search:keyword', lambda c: c.student.search(keyword='王')),
+        BenchCase('Student.search:major', lambda c: c.student.search(major='计算机')),
+        BenchCase('Student.page', lambda c: c.student.page(limit=20)),
+        BenchCase('Student.page:after', lambda c: c.student.page(after_id=c.student_id, limit=20)),
+        BenchCase('Student.page:filtered', lambda c: c.student.page(limit=20, filters={'keyword': '王'})),
+        BenchCase('Student.get_statistics', lambda c: c.student.get_statistics()),
+
+        # Course
+        BenchCase('Course.create', lambda c: c.course.create(_bench_course_data()),
+                  setup=lambda c: c.course.delete(BENCH_COURSE_ID)),
+        BenchCase('Course.get_by_id', lambda c: c.course.get_by_id(c.course_id)),
+        BenchCase('Course.get_by_id:cached', lambda c: c.cached_course.get_by_id(c.course_id)),
+        BenchCase('Course.get_many', lambda c: c.course.get_many(c.course_ids)),
+        BenchCase('Course.is_taught_by', lambda c: c.course.is_taught_by(c.course_id, c.teacher_id)),
+        BenchCase('Course.get_all', lambda c: c.course.get_all()),
+        BenchCase('Course.iter_all', lambda c: c.course.iter_all()),
+        BenchCase('Course.update', lambda c: c.course.update(BENCH_COURSE_ID, {'max_students': 120}),
+                  setup=lambda c: c.course.create(_bench_course_data())),
+        BenchCase('Course.delete', lambda c: c.course.delete(BENCH_COURSE_ID),
+                  setup=lambda c: c.course.create(_bench_course_data())),
+        BenchCase('Course.search', lambda c: c.course.search('原理')),
+        BenchCase('Course.page', lambda c: c.course.page(limit=20)),
+        BenchCase('Course.page:after', lambda c: c.course.page(after_id=c.course_id, limit=20)),
+        BenchCase('Course.get_available_courses',
+                  lambda c: c.course.get_available_courses(CURRENT_SEMESTER)),
+        BenchCase('Course.get_available_courses:cached',
+                  lambda c: c.cached_course.get_available_courses(CURRENT_SEMESTER)),
+        BenchCase('Course.get_by_teacher', lambda c: c.course.get_by_teacher(c.teacher_id)),
+        BenchCase('Course.get_statistics', lambda c: c.course.get_statistics()),
+
+        # Enrollment
+        BenchCase('Enrollment.enroll',
+                  lambda c: c.enrollment.enroll({'student_id': c.student_id,
+                                                 'course_id': c.free_course_id,
+                                                 'semester': CURRENT_SEMESTER}),
+                  setup=_drop_free_course, teardown=_drop_free_course),
+        BenchCase('Enrollment.try_enroll',
+                  lambda c: c.enrollment.try_enroll(c.student_id, c.free_course_id, CURRENT_SEMESTER),
+                  setup=_drop_free_course, teardown=_drop_free_course),
+        BenchCase('Enrollment.drop_course',
+                  lambda c: c.enrollment.drop_course(c.student_id, c.free_course_id, CURRENT_SEMESTER),
+                  setup=_enroll_free_course, teardown=_drop_free_course),
+        BenchCase('Enrollment.reconcile_enrolled_counts',
+                  lambda c: c.enrollment.reconcile_enrolled_counts()),
+        BenchCase('Enrollment.get_student_courses',
+                  lambda c: c.enrollment.get_student_courses(c.student_id)),
+        BenchCase('Enrollment.get_course_students',
+                  lambda c: c.enrollment.get_course_students(c.course_id, c.semester)),
+        BenchCase('Enrollment.input_score',
+                  lambda c: c.enrollment.input_score(c.student_id, c.course_id, c.semester, c.score)),
+        BenchCase('Enrollment.input_scores',
+                  lambda c: c.enrollment.input_scores(c.course_id, c.semester, c.course_scores)),
+        BenchCase('Enrollment.get_student_scores',
+                  lambda c: c.enrollment.get_student_scores(c.student_id)),
+        BenchCase('Enrollment.get_course_score_distribution',
+                  lambda c: c.enrollment.get_course_score_distribution(c.course_id, c.semester)),
+        BenchCase('Enrollment.get_statistics', lambda c: c.enrollment.get_statistics()),
+        BenchCase('Enrollment.get_score_statistics',
+                  lambda c: c.enrollment.get_score_statistics()),
+        BenchCase('Enrollment.get_score_statistics:semester',
+                  lambda c: c.enrollment.get_score_statistics(c.semester)),
+
+        # User（以基准管理员身份执行）
+        BenchCase('User.login', lambda c: c.user.login(BENCH_ADMIN, BENCH_PASSWORD)),
+        BenchCase('User.logout', lambda c: c.user.logout(),
+                  teardown=lambda c: c.user.login(BENCH_ADMIN, BENCH_PASSWORD)),
+        BenchCase('User.log_operation', lambda c: c.user.log_operation('基准测试', 'system_users')),
+        BenchCase('User.change_password',
+                  lambda c: c.user.change_password(BENCH_PASSWORD, BENCH_PASSWORD)),
+        BenchCase('User.create_user',
+                  lambda c: c.user.create_user({'username': BENCH_USER, 'role': 'student',
+                                                'password': BENCH_PASSWORD}),
+                  setup=lambda c: c.db.execute_update(
+                      "DELETE FROM system_users WHERE username = %s", (BENCH_USER,))),
+        BenchCase('User.get_all_users', lambda c: c.user.get_all_users()),
+        BenchCase('User.get_many', lambda c: c.user.get_many(c.user_ids)),
+        BenchCase('User.toggle_user_status', lambda c: c.user.toggle_user_status(c.bench_user_id),
+                  setup=_create_bench_user),
+        BenchCase('User.reset_password', lambda c: c.user.reset_password(c.bench_user_id),
+                  setup=_create_bench_user),
+        BenchCase('User.get_operation_logs', lambda c: c.user.get_operation_logs(100)),
+        BenchCase('User.get_operation_logs:filtered',
+                  lambda c: c.user.get_operation_logs(100, {'role': 'student'})),
+        BenchCase('User.iter_operation_logs', lambda c: c.user.iter_operation_logs()),
+        BenchCase('User.get_role', lambda c: c.user.get_role()),
+        BenchCase('User.get_related_id', lambda c: c.user.get_related_id()),
+    ]
+
+
+def uncovered_methods(cases: List[BenchCase]) -> List[str]:
+    """模型中还没有基准用例的公开方法（新增方法时提醒补充用例）"""
+    covered = {case.name.split(':')[0] for case in cases}
+    missing = []
+    for cls in (Student, Course, Enrollment, User):
+        for name, _ in inspect.getmembers(cls, inspect.isfunction):
+            if not name.startswith('_') and f"{cls.__name__}.{name}" not in covered:
+                missing.append(f"{cls.__name__}.{name}")
+    return missing
+
+
+def _consume(result) -> int:
+    """取完结果并返回行数（生成器会被迭代完，计入耗时）"""
+    if result is None:
+        return 0
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    if inspect.isgenerator(result):
+        return sum(1 for _ in result)
+    return 1
+
+
+def _max_rss_kb() -> int:
+    """进程常驻内存峰值（KB，macOS上ru_maxrss单位为字节）"""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def run_case(ctx: BenchContext, case: BenchCase, repeat: int) -> Dict[str, Any]:
+    """执行一个用例repeat次，返回耗时中位数/最小值、行数、语句数和内存峰值"""
+    timings = []
+    rows = queries = 0
+    rss_before = _max_rss_kb()
+    for _ in range(repeat):
+        if case.setup:
+            case.setup(ctx)
+        ctx.db.query_count = 0
+        started = time.perf_counter()
+        rows = _consume(case.run(ctx))
+        timings.append(time.perf_counter() - started)
+        queries = ctx.db.query_count
+        if case.teardown:
+            case.teardown(ctx)
+    peak = _max_rss_kb()
+    return {
+        'wall_ms': round(statistics.median(timings) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'rows': rows,
+        'queries': queries,
+        'peak_rss_kb': peak,
+        'rss_growth_kb': peak - rss_before,
+    }
+
+
+def run_suite(db: CountingDatabaseConnection, repeat: int, only: List[str] = None) -> Dict[str, Any]:
+    """在当前数据上执行全部用例"""
+    cases = build_cases()
+    if only:
+        cases = [c for c in cases if any(c.name.startswith(prefix) for prefix in only)]
+
+    ctx = BenchContext(db)
+    results = {}
+    try:
+        for case in cases:
+            results[case.name] = run_case(ctx, case, repeat)
+            r = results[case.name]
+            print(f"  {case.name:<48} {r['wall_ms']:>10.2f} ms  {r['rows']:>8} 行  "
+                  f"{r['queries']:>3} 条SQL  {r['peak_rss_kb'] // 1024:>5} MB")
+    finally:
+        ctx.cleanup()
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_ms: float) -> List[Dict[str, Any]]:
+    """
+    与基线比较，返回回退列表
+
+    耗时中位数超过基线(1+threshold)倍且差值大于min_ms，或SQL语句数增加，视为回退。
+    """
+    regressions = []
+    for scale, cases in results.get('scales', {}).items():
+        base_cases = baseline.get('scales', {}).get(scale, {})
+        for name, current in cases.items():
+            base = base_cases.get(name)
+            if not base:
+                continue
+            slower = (current['wall_ms'] > base['wall_ms'] * (1 + threshold)
+                      and current['wall_ms'] - base['wall_ms'] > min_ms)
+            if slower or current['queries'] > base['queries']:
+                regressions.append({
+                    'scale': scale,
+                    'case': name,
+                    'base_ms': base['wall_ms'],
+                    'current_ms': current['wall_ms'],
+                    'ratio': round(current['wall_ms'] / base['wall_ms'], 2) if base['wall_ms'] else None,
+                    'base_queries': base['queries'],
+                    'current_queries': current['queries'],
+                })
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型方法基准测试")
+    add_db_arguments(parser)
+    parser.add_argument('--load', action='store_true',
+                        help="每个规模测试前清空业务表并重新生成数据（危险，仅限测试库）")
+    parser.add_argument('--scales', default='10k,100k,1m',
+                        help=f"逗号分隔的规模（{'/'.join(BENCH_SCALES)}），仅与--load一起使用")
+    parser.add_argument('--label', default='current', help="不加--load时结果记录的规模名")
+    parser.add_argument('--seed', type=int, default=42, help="数据生成随机种子")
+    parser.add_argument('--repeat', type=int, default=3, help="每个用例执行次数（取中位数）")
+    parser.add_argument('--only', help="逗号分隔的用例名前缀，如Student.,Enrollment.get_statistics")
+    parser.add_argument('--output', default='bench_result.json', help="结果JSON文件")
+    parser.add_argument('--baseline', help="基线JSON文件，用于检测回退")
+    parser.add_argument('--threshold', type=float, default=0.2, help="耗时回退阈值（0.2表示慢20%%）")
+    parser.add_argument('--min-ms', type=float, default=1.0, help="忽略小于该毫秒数的耗时差异")
+    args = parser.parse_args()
+
+    missing = uncovered_methods(build_cases())
+    if missing:
+        print(f"警告：以下公开方法没有基准用例: {', '.join(missing)}")
+
+    if args.load:
+        scales = [s.strip() for s in args.scales.split(',') if s.strip()]
+        unknown = [s for s in scales if s not in BENCH_SCALES]
+        if unknown:
+            parser.error(f"未知规模: {', '.join(unknown)}")
+    else:
+        scales = [args.label]
+    only = [p.strip() for p in args.only.split(',')] if args.only else None
+
+    db = CountingDatabaseConnection(db_config_from_args(args))
+    output = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'scales': {},
+    }
+    try:
+        for scale in scales:
+            if args.load:
+                print(f"\n生成 {scale} 规模数据...")
+                truncate(db)
+                generate(db, DataGenerator(args.seed, **BENCH_SCALES[scale]))
+            print(f"\n规模 {scale}:")
+            output['scales'][scale] = run_suite(db, args.repeat, only)
+    finally:
+        db.disconnect()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(output, baseline, args.threshold, args.min_ms)
+        output['baseline'] = {'file': args.baseline, 'revision': baseline.get('meta', {}).get('revision'),
+                              'threshold': args.threshold, 'regressions': regressions}
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {args.output}")
+
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）:")
+        for r in regressions:
+            print(f"  [{r['scale']}] {r['case']}: {r['base_ms']} ms -> {r['current_ms']} ms, "
+                  f"SQL {r['base_queries']} -> {r['current_queries']}")
+        sys.exit(1)
+    elif args.baseline:
+        print("未发现性能回退")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+"""
+batch_cli.py
+非交互式批处理命令行：一次登录、一个连接执行一条或一批命令，输出JSON或CSV
+
+命令：
+    students list [--keyword K] [--major M] [--class C] [--limit N]   （管理员/教师）
+    students export [--output FILE]                                   （管理员/教师）
+    students import FILE [--report R] [--batch-size N] [--workers N]  （管理员）
+    scores load FILE [--course C] [--semester S]                      （本课程教师/管理员）
+    stats [--semester S]                                              （管理员）
+
+批处理：--batch FILE（或 - 表示标准输入）中每行一条命令，空行和#开头的行忽略，
+某条命令失败不影响后续命令。
+
+输出：表格类结果（学生列表等）在json格式下每行一个JSON对象（JSON Lines），
+在csv格式下为带表头的CSV；其余结果在json格式下为一个JSON对象，在csv格式下为“字段,值”行。
+模型打印的提示和错误信息重定向到标准错误，不混入输出。
+"""
+import csv
+import os
+import sys
+import json
+import shlex
+import argparse
+import contextlib
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+from models import Student, Course, Enrollment, User
+from utils import DatabaseConnection, OperationLogWriter
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_AUTH = 3
+
+class CommandError(Exception):
+    """命令执行失败（参数错误、无权限等）"""
+
+
+def _json_default(value):
+    """JSON序列化数据库返回的Decimal和日期"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _flatten(data: Any, prefix: str = '') -> Iterable[tuple]:
+    """把嵌套的字典/列表展开为(字段路径, 值)，用于csv输出非表格结果"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            yield from _flatten(value, f"{prefix}[{i}]")
+    else:
+        yield prefix, data
+
+
+class OutputWriter:
+    """按格式输出结果"""
+
+    def __init__(self, fmt: str, stream: TextIO):
+        self.fmt = fmt
+        self.stream = stream
+
+    def rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """流式输出表格结果，返回行数"""
+        count = 0
+        writer = None
+        for row in rows:
+            if self.fmt == 'json':
+                self.stream.write(json.dumps(row, ensure_ascii=False, default=_json_default) + '\n')
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(self.stream, fieldnames=list(row.keys()), extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow({k: _json_default(v) if isinstance(v, (Decimal, date)) else v
+                                 for k, v in row.items()})
+            count += 1
+        self.stream.flush()
+        return count
+
+    def result(self, data: Dict[str, Any]):
+        """输出一个非表格结果"""
+        if self.fmt == 'json':
+            self.stream.write(json.dumps(data, ensure_ascii=False, default=_json_default) + '\n')
+        else:
+            writer = csv.writer(self.stream)
+            writer.writerow(['field', 'value'])
+            for key, value in _flatten(data):
+                writer.writerow([key, _json_default(value) if isinstance(value, (Decimal, date)) else value])
+        self.stream.flush()
+
+
+def build_command_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    """命令解析器（命令行和批处理文件中的每一行共用）"""
+    parser = parser or argparse.ArgumentParser(prog='sms', add_help=False)
+    commands = parser.add_subparsers(dest='command', metavar='命令')
+
+    students = commands.add_parser('students', help="学生列表、导出、导入")
+    actions = students.add_subparsers(dest='action', metavar='操作', required=True)
+    list_parser = actions.add_parser('list', help="列出学生（无筛选条件时列出全部）")
+    list_parser.add_argument('--keyword', help="学号、姓名或专业关键词")
+    list_parser.add_argument('--major', help="专业（模糊匹配）")
+    list_parser.add_argument('--class', dest='class_name', help="班级")
+    list_parser.add_argument('--limit', type=int, help="最多返回条数，默认输出全部匹配的学生")
+    export_parser = actions.add_parser('export', help="导出全部学生")
+    export_parser.add_argument('--output', help="输出文件，默认标准输出")
+    import_parser = actions.add_parser('import', help="从CSV/XLSX批量导入学生（学号已存在时更新）")
+    import_parser.add_argument('file', help="CSV/XLSX文件（首行为列名），- 表示标准输入")
+    import_parser.add_argument('--file-format', choices=['csv', 'xlsx'], help="文件格式，默认按扩展名判断")
+    import_parser.add_argument('--report', help="错误报告CSV路径，默认<文件名>.errors.csv")
+    import_parser.add_argument('--batch-size', type=int, help="每批写入并提交的行数")
+    import_parser.add_argument('--workers', type=int, help="校验进程数，默认CPU数")
+
+    scores = commands.add_parser('scores', help="成绩")
+    actions = scores.add_subparsers(dest='action', metavar='操作', required=True)
+    load_parser = actions.add_parser('load', help="从CSV批量录入成绩")
+    load_parser.add_argument('file', help="CSV文件：student_id,score[,course_id,semester]，- 表示标准输入")
+    load_parser.add_argument('--course', help="CSV中没有course_id列时使用的课程编号")
+    load_parser.add_argument('--semester', help="CSV中没有semester列时使用的学期")
+
+    stats = commands.add_parser('stats', help="学生、课程、选课和成绩统计")
+    stats.add_argument('--semester', help="成绩统计只统计该学期")
+    return parser
+
+
+class _QuietParser(argparse.ArgumentParser):
+    """批处理中的命令解析错误抛出异常而不是退出进程"""
+
+    def error(self, message):
+        raise CommandError(message)
+
+
+class BatchCLI:
+    """批处理命令执行器：登录一次，所有命令共用一个连接和一组模型"""
+
+    def __init__(self, db_config: Dict[str, Any], fmt: str = 'json', stream: TextIO = None):
+        """
+        初始化
+
+        Args:
+            db_config: 数据库配置
+            fmt: 输出格式 json/csv
+            stream: 输出流，默认标准输出
+        """
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        # 命令顺序执行只用一个连接；另一个留给日志写入器，流式导出占用连接时日志仍能写入
+        self.db_conn = DatabaseConnection(db_config, {'min_size': 1, 'max_size': 2})
+        self.log_writer = OperationLogWriter(self.db_conn)
+        self.student_model = Student(self.db_conn)
+        self.course_model = Course(self.db_conn)
+        self.enrollment_model = Enrollment(self.db_conn)
+        self.user_model = User(self.db_conn, self.log_writer)
+        self.command_parser = build_command_parser(_QuietParser(prog='sms', add_help=False))
+
+    def login(self, username: str, password: str) -> bool:
+        """登录（模型的提示信息输出到标准错误）"""
+        with contextlib.redirect_stdout(sys.stderr):
+            return self.user_model.login(username, password) is not None
+
+    def close(self):
+        """登出并关闭连接"""
+        with contextlib.redirect_stdout(sys.stderr):
+            self.user_model.logout()
+        self.log_writer.close()
+        self.db_conn.disconnect()
+
+    # ---------- 执行 ----------
+
+    def execute(self, args: argparse.Namespace) -> int:
+        """执行一条已解析的命令，返回退出码"""
+        handler = {
+            ('students', 'list'): self.students_list,
+            ('students', 'export'): self.students_export,
+            ('students', 'import'): self.students_import,
+            ('scores', 'load'): self.scores_load,
+            ('stats', None): self.stats,
+        }.get((args.command, getattr(args, 'action', None)))
+        if handler is None:
+            print("缺少命令，使用 --help 查看用法", file=sys.stderr)
+            return EXIT_USAGE
+        try:
+            # 模型用print输出的提示和错误不能混入结果
+            with contextlib.redirect_stdout(sys.stderr):
+                handler(args)
+            return EXIT_OK
+        except CommandError as e:
+            print(f"{args.command} 失败: {e}", file=sys.stderr)
+            return EXIT_FAILED
+        except Exception as e:
+            print(f"{args.command} 执行出错: {e}", file=sys.stderr)
+            return EXIT_FAILED
+
+    def run_batch(self, lines: Iterable[str]) -> int:
+        """
+        逐行执行批处理命令
+
+        Returns:
+            失败的命令数
+        """
+        failures = 0
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                args = self.command_parser.parse_args(shlex.split(line))
+            except (CommandError, ValueError) as e:
+                print(f"第{line_no}行命令无效: {e}", file=sys.stderr)
+                failures += 1
+                continue
+            if self.execute(args) != EXIT_OK:
+                print(f"第{line_no}行命令失败: {line}", file=sys.stderr)
+                failures += 1
+        return failures
+
+    # ---------- 权限与输入 ----------
+
+    def _require_role(self, *roles: str):
+        if self.user_model.get_role() not in roles:
+            raise CommandError("当前用户没有权限执行该命令")
+
+    def _writer(self) -> OutputWriter:
+        # self.stream在重定向标准输出之前取得，仍指向真正的输出
+        return OutputWriter(self.fmt, self.stream)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_input(path: str):
+        """打开CSV输入（- 为标准输入；带BOM的UTF-8也可读取）"""
+        if path == '-':
+            yield sys.stdin
+            return
+        try:
+            f = open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f"无法打开文件 {path}: {e}")
+        with f:
+            yield f
+
+    # ---------- 命令 ----------
+
+    def students_list(self, args: argparse.Namespace):
+        """列出学生"""
+        self._require_role('admin', 'teacher')
+        filters = {'keyword': args.keyword, 'major': args.major, 'class_name': args.class_name}
+        if args.limit:
+            rows = self.student_model.search(args.keyword, args.major, args.class_name, args.limit)
+        elif any(filters.values()):
+            # 未指定--limit时输出全部匹配的学生（search默认只返回SEARCH_LIMIT条）
+            rows = self.student_model.iter_filtered(filters)
+        else:
+            rows = self.student_model.iter_all()
+        self._writer().rows(rows)
+
+    def students_export(self, args: argparse.Namespace):
+        """流式导出全部学生"""
+        self._require_role('admin', 'teacher')
+        if not args.output:
+            self._writer().rows(self.student_model.iter_all())
+            return
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            count = OutputWriter(self.fmt, f).rows(self.student_model.iter_all())
+        print(f"已导出 {count} 名学生到 {args.output}", file=sys.stderr)
+
+    def students_import(self, args: argparse.Namespace):
+        """从CSV/XLSX批量导入学生（进度输出到标准错误）"""
+        self._require_role('admin')
+        source = sys.stdin.buffer if args.file == '-' else args.file
+        if source is args.file and not os.path.exists(source):
+            raise CommandError(f"文件不存在: {source}")
+        result = self.student_model.bulk_import(
+            source, args.file_format, args.report, args.batch_size, args.workers)
+        self.user_model.log_operation(
+            f"批量导入学生: 新增{result['inserted']} 更新{result['updated']} 失败{result['failed']}",
+            "students")
+        self._writer().result({'command': 'students import', **result})
+        if result['failed']:
+            raise CommandError(f"{result['failed']} 行未导入")
+
+    def scores_load(self, args: argparse.Namespace):
+        """从CSV批量录入成绩，按(课程, 学期)分组，每组一个事务"""
+        self._require_role('admin', 'teacher')
+        groups = defaultdict(list)
+        errors = []
+        with self._open_input(args.file) as f:
+            for line_no, row in enumerate(csv.DictReader(f), 2):
+                course_id = (row.get('course_id') or args.course or '').strip()
+                semester = (row.get('semester') or args.semester or '').strip()
+                student_id = (row.get('student_id') or '').strip()
+                try:
+                    score = float(row.get('score'))
+                except (TypeError, ValueError):
+                    errors.append({'line': line_no, 'student_id': student_id, 'message': '成绩不是数字'})
+                    continue
+                if not (course_id and semester and student_id):
+                    errors.append({'line': line_no, 'student_id': student_id,
+                                   'message': '缺少学号、课程编号或学期'})
+                    continue
+                groups[(course_id, semester)].append((student_id, score))
+
+        teacher_id = self.user_model.get_related_id() if self.user_model.get_role() == 'teacher' else None
+        courses = []
+        for (course_id, semester), pending in groups.items():
+            summary = {'course_id': course_id, 'semester': semester, 'total': len(pending), 'saved': 0}
+            courses.append(summary)
+            if teacher_id and not self.course_model.is_taught_by(course_id, teacher_id):
+                summary['message'] = '没有权限录入该课程的成绩'
+                continue
+            try:
+                with self.db_conn.transaction():
+                    results = self.enrollment_model.input_scores(course_id, semester, pending)
+                    self.user_model.log_operations(
+                        (f"录入成绩: {r['student_id']} - {course_id} - {r['score']}", "enrollments", None)
+                        for r in results if r['status'] == 'ok'
+                    )
+            except Exception as e:
+                summary['message'] = f"成绩保存失败，该课程本次录入已全部撤销: {e}"
+                continue
+            summary['saved'] = sum(1 for r in results if r['status'] == 'ok')
+            errors.extend({'course_id': course_id, 'student_id': r['student_id'], 'message': r['message']}
+                          for r in results if r['status'] != 'ok')
+
+        self._writer().result({'command': 'scores load', 'courses': courses, 'errors': errors})
+        if any('message' in c for c in courses):
+            raise CommandError("部分课程的成绩未能录入")
+
+    def stats(self, args: argparse.Namespace):
+        """学生、课程、选课和成绩统计"""
+        self._require_role('admin')
+        self._writer().result({
+            'command': 'stats',
+            'semester': args.semester,
+            'students': self.student_model.get_statistics(),
+            'courses': self.course_model.get_statistics(),
+            'enrollments': self.enrollment_model.get_statistics(),
+            'scores': self.enrollment_model.get_score_statistics(args.semester),
+        })
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """完整的命令行解析器（全局参数 + 命令）"""
+    parser = argparse.ArgumentParser(
+        prog='sms', description="学生信息管理系统批处理命令行",
+        epilog="登录信息也可通过环境变量SMS_USER、SMS_PASSWORD提供")
+    parser.add_argument('--user', help="登录用户名")
+    parser.add_argument('--password', help="登录密码")
+    parser.add_argument('--host', help="远程数据库地址（默认本地）")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help="输出格式")
+    parser.add_argument('--batch', metavar='FILE', help="从文件读取命令（每行一条），- 表示标准输入")
+    return build_command_parser(parser)
@@ -16,23 +16,46 @@ init(autoreset=True)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import Student, Course, Enrollment, User
-from utils import DatabaseConnection
+from models.enrollment import ENROLL_SUCCESS, ENROLL_MESSAGES
+from config.db_config import DBConfig
+from utils import DatabaseConnection, OperationLogWriter, QueryStats, Tracer, EntityCache, CacheVersions
+from utils.tracing import traced, wait_input
+from utils.query_budget import budgeted
+from utils.pager import KeysetPager
 
 
 class UnifiedClient:
     """统一客户端类 - 支持角色权限控制"""
     
+    # 列表每页显示条数
+    PAGE_SIZE = 20
+    
+    # 学生搜索最多显示条数
+    SEARCH_LIMIT = 50
+    
     def __init__(self, config: Dict[str, Any], mode: str = 'local'):
         """初始化客户端"""
         self.config = config
         self.mode = mode
-        self.db_conn = DatabaseConnection(config)
+        self.query_stats = QueryStats(**DBConfig.get_query_stats_config())
+        trace_file = DBConfig.get_trace_file()
+        self.tracer = Tracer(trace_file) if trace_file else None
+        self.db_conn = DatabaseConnection(config, query_stats=self.query_stats, tracer=self.tracer)
+        # 开发模式：检查各功能声明的SQL语句预算和N+1查询
+        self.query_budget_mode = DBConfig.get_query_budget_mode()
+        self.log_writer = OperationLogWriter(self.db_conn)
+        # 学生、课程按主键查询的读穿缓存（本进程写操作时由模型失效，其他进程的写操作通过版本表发现）
+        cache_config = DBConfig.get_cache_config()
+        self.entity_cache = None
+        if cache_config['max_size'] > 0:
+            versions = CacheVersions(self.db_conn, cache_config.pop('poll_interval'))
+            self.entity_cache = EntityCache(versions=versions, **cache_config)
         
         # 初始化数据模型
-        self.student_model = Student(self.db_conn)
-        self.course_model = Course(self.db_conn)
-        self.enrollment_model = Enrollment(self.db_conn)
-        self.user_model = User(self.db_conn)
+        self.student_model = Student(self.db_conn, self.entity_cache)
+        self.course_model = Course(self.db_conn, self.entity_cache)
+        self.enrollment_model = Enrollment(self.db_conn, cache=self.entity_cache)
+        self.user_model = User(self.db_conn, self.log_writer, self.entity_cache)
         
     def test_connection(self) -> bool:
         """测试数据库连接"""
@@ -61,6 +84,8 @@ class UnifiedClient:
         finally:
             self.cleanup()
             
+    @traced
+    @budgeted(6)
     def _login(self) -> bool:
         """用户登录"""
         print(f"\n{Fore.CYAN}{'='*50}")
@@ -75,8 +100,8 @@ class UnifiedClient:
         
         max_attempts = 3
         for attempt in range(max_attempts):
-            username = input(f"\n{Fore.GREEN}用户名: {Style.RESET_ALL}").strip()
-            password = input(f"{Fore.GREEN}密  码: {Style.RESET_ALL}").strip()
+            username = wait_input(f"\n{Fore.GREEN}用户名: {Style.RESET_ALL}").strip()
+            password = wait_input(f"{Fore.GREEN}密  码: {Style.RESET_ALL}").strip()
             
             user = self.user_model.login(username, password)
             
@@ -100,7 +125,7 @@ class UnifiedClient:
         """管理员主循环"""
         while True:
             self._show_admin_menu()
-            choice = input(f"\n{Fore.GREEN}请选择功能 [0-8]: {Style.RESET_ALL}")
+            choice = wait_input(f"\n{Fore.GREEN}请选择功能 [0-9]: {Style.RESET_ALL}")
             
             if choice == '0':
                 print(f"{Fore.YELLOW}感谢使用，再见！")
@@ -121,6 +146,8 @@ class UnifiedClient:
                 self._view_operation_logs()
             elif choice == '8':
                 self._change_password()
+            elif choice == '9':
+                self._show_query_stats()
             else:
                 print(f"{Fore.RED}无效选择，请重试")
                 
@@ -137,6 +164,7 @@ class UnifiedClient:
         print("6. 统计查询")
         print("7. 操作日志")
         print("8. 修改密码")
+        print("9. SQL性能统计")
         print("0. 退出系统")
         
     def _admin_student_management(self):
@@ -150,7 +178,7 @@ class UnifiedClient:
             print("5. 删除学生")
             print("0. 返回主菜单")
             
-            choice = input(f"{Fore.GREEN}请选择 [0-5]: {Style.RESET_ALL}")
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-5]: {Style.RESET_ALL}")
             
             if choice == '0':
                 break
@@ -176,7 +204,7 @@ class UnifiedClient:
             print("5. 删除课程")
             print("0. 返回主菜单")
             
-            choice = input(f"{Fore.GREEN}请选择 [0-5]: {Style.RESET_ALL}")
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-5]: {Style.RESET_ALL}")
             
             if choice == '0':
                 break
@@ -201,7 +229,7 @@ class UnifiedClient:
             print("4. 查看课程选课名单")
             print("0. 返回主菜单")
             
-            choice = input(f"{Fore.GREEN}请选择 [0-4]: {Style.RESET_ALL}")
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-4]: {Style.RESET_ALL}")
             
             if choice == '0':
                 break
@@ -223,7 +251,7 @@ class UnifiedClient:
             print("3. 查看课程成绩分布")
             print("0. 返回主菜单")
             
-            choice = input(f"{Fore.GREEN}请选择 [0-3]: {Style.RESET_ALL}")
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-3]: {Style.RESET_ALL}")
             
             if choice == '0':
                 break
@@ -244,7 +272,7 @@ class UnifiedClient:
             print("4. 重置用户密码")
             print("0. 返回主菜单")
             
-            choice = input(f"{Fore.GREEN}请选择 [0-4]: {Style.RESET_ALL}")
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-4]: {Style.RESET_ALL}")
             
             if choice == '0':
                 break
@@ -263,7 +291,7 @@ class UnifiedClient:
         """教师主循环"""
         while True:
             self._show_teacher_menu()
-            choice = input(f"\n{Fore.GREEN}请选择功能 [0-6]: {Style.RESET_ALL}")
+            choice = wait_input(f"\n{Fore.GREEN}请选择功能 [0-6]: {Style.RESET_ALL}")
             
             if choice == '0':
                 print(f"{Fore.YELLOW}感谢使用，再见！")
@@ -296,6 +324,8 @@ class UnifiedClient:
         print("6. 修改密码")
         print("0. 退出系统")
         
+    @traced
+    @budgeted(1)
     def _teacher_my_courses(self):
         """教师-查看我的课程"""
         teacher_id = self.user_model.get_related_id()
@@ -316,8 +346,10 @@ class UnifiedClient:
         except Exception as e:
             print(f"{Fore.RED}查询失败: {e}")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(7)
     def _teacher_input_score(self):
         """教师-录入成绩（仅限自己的课程）"""
         teacher_id = self.user_model.get_related_id()
@@ -334,14 +366,14 @@ class UnifiedClient:
         for c in courses:
             print(f"  {c['course_id']}: {c['course_name']}")
             
-        course_id = input(f"\n{Fore.GREEN}请选择课程编号: {Style.RESET_ALL}").strip()
+        course_id = wait_input(f"\n{Fore.GREEN}请选择课程编号: {Style.RESET_ALL}").strip()
         
         # 验证是否是教师的课程
         if not any(c['course_id'] == course_id for c in courses):
             print(f"{Fore.RED}您没有权限录入该课程的成绩")
             return
             
-        semester = input(f"{Fore.GREEN}请输入学期 (如2024-1): {Style.RESET_ALL}").strip()
+        semester = wait_input(f"{Fore.GREEN}请输入学期 (如2024-1): {Style.RESET_ALL}").strip()
         
         # 获取选课学生
         students = self.enrollment_model.get_course_students(course_id, semester)
@@ -363,8 +395,9 @@ class UnifiedClient:
         print("-" * 60)
         print(f"{Fore.YELLOW}输入成绩（直接回车跳过，输入q退出）")
         
+        pending = []
         for s in students:
-            score_input = input(f"{s['student_id']} {s['name']}: {Style.RESET_ALL}").strip()
+            score_input = wait_input(f"{s['student_id']} {s['name']}: {Style.RESET_ALL}").strip()
             
             if score_input.lower() == 'q':
                 break
@@ -374,34 +407,28 @@ class UnifiedClient:
             try:
                 score = float(score_input)
                 if 0 <= score <= 100:
-                    if self.enrollment_model.input_score(s['student_id'], course_id, semester, score):
-                        self.user_model.log_operation(
-                            f"录入成绩: {s['student_id']} - {course_id} - {score}",
-                            "enrollments"
-                        )
-                        print(f"{Fore.GREEN}  ✓ 成绩录入成功")
-                    else:
-                        print(f"{Fore.RED}  ✗ 成绩录入失败")
+                    pending.append((s['student_id'], score))
                 else:
                     print(f"{Fore.RED}  成绩必须在0-100之间")
             except ValueError:
                 print(f"{Fore.RED}  请输入有效的数字")
                 
+        self._save_scores(course_id, semester, pending)
+                
+    @traced
+    @budgeted(3)
     def _teacher_view_course_students(self):
         """教师-查看课程选课名单"""
         teacher_id = self.user_model.get_related_id()
         
-        course_id = input(f"{Fore.GREEN}请输入课程编号: {Style.RESET_ALL}").strip()
+        course_id = wait_input(f"{Fore.GREEN}请输入课程编号: {Style.RESET_ALL}").strip()
         
         # 验证权限
-        query = "SELECT COUNT(*) as cnt FROM courses WHERE course_id = %s AND teacher_id = %s"
-        result = self.db_conn.execute_query(query, (course_id, teacher_id))
-        
-        if not result or result[0]['cnt'] == 0:
+        if not self.course_model.is_taught_by(course_id, teacher_id):
             print(f"{Fore.RED}您没有权限查看该课程")
             return
             
-        semester = input(f"{Fore.GREEN}请输入学期: {Style.RESET_ALL}").strip()
+        semester = wait_input(f"{Fore.GREEN}请输入学期: {Style.RESET_ALL}").strip()
         students = self.enrollment_model.get_course_students(course_id, semester)
         
         if students:
@@ -418,24 +445,24 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}该课程暂无选课学生")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(3)
     def _teacher_score_statistics(self):
         """教师-成绩统计"""
         teacher_id = self.user_model.get_related_id()
         
-        course_id = input(f"{Fore.GREEN}请输入课程编号: {Style.RESET_ALL}").strip()
+        course_id = wait_input(f"{Fore.GREEN}请输入课程编号: {Style.RESET_ALL}").strip()
         
         # 验证权限
-        query = "SELECT course_name FROM courses WHERE course_id = %s AND teacher_id = %s"
-        result = self.db_conn.execute_query(query, (course_id, teacher_id))
-        
-        if not result:
+        course = self.course_model.get_by_id(course_id)
+        if not course or course.get('teacher_id') != teacher_id:
             print(f"{Fore.RED}您没有权限查看该课程的统计")
             return
             
-        course_name = result[0]['course_name']
-        semester = input(f"{Fore.GREEN}请输入学期: {Style.RESET_ALL}").strip()
+        course_name = course['course_name']
+        semester = wait_input(f"{Fore.GREEN}请输入学期: {Style.RESET_ALL}").strip()
         
         dist = self.enrollment_model.get_course_score_distribution(course_id, semester)
         
@@ -455,7 +482,7 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无成绩数据")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
     # ==================== 学生功能 ====================
     
@@ -463,7 +490,7 @@ class UnifiedClient:
         """学生主循环"""
         while True:
             self._show_student_menu()
-            choice = input(f"\n{Fore.GREEN}请选择功能 [0-6]: {Style.RESET_ALL}")
+            choice = wait_input(f"\n{Fore.GREEN}请选择功能 [0-6]: {Style.RESET_ALL}")
             
             if choice == '0':
                 print(f"{Fore.YELLOW}感谢使用，再见！")
@@ -496,6 +523,8 @@ class UnifiedClient:
         print("6. 修改密码")
         print("0. 退出系统")
         
+    @traced
+    @budgeted(2)
     def _student_view_info(self):
         """学生-查看个人信息"""
         student_id = self.user_model.get_related_id()
@@ -517,8 +546,10 @@ class UnifiedClient:
         else:
             print(f"{Fore.RED}无法获取个人信息")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(1)
     def _student_view_courses(self):
         """学生-查看已选课程"""
         student_id = self.user_model.get_related_id()
@@ -542,13 +573,15 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无选课记录")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(9)
     def _student_enroll_course(self):
         """学生-选课"""
         student_id = self.user_model.get_related_id()
         
-        semester = input(f"{Fore.GREEN}请输入学期 (如2024-1): {Style.RESET_ALL}").strip()
+        semester = wait_input(f"{Fore.GREEN}请输入学期 (如2024-1): {Style.RESET_ALL}").strip()
         
         # 获取可选课程
         available = self.course_model.get_available_courses(semester)
@@ -570,23 +603,21 @@ class UnifiedClient:
                   
         print("-" * 80)
         
-        course_id = input(f"\n{Fore.GREEN}请输入要选的课程编号 (0取消): {Style.RESET_ALL}").strip()
+        course_id = wait_input(f"\n{Fore.GREEN}请输入要选的课程编号 (0取消): {Style.RESET_ALL}").strip()
         
         if course_id == '0':
             return
             
-        enrollment_data = {
-            'student_id': student_id,
-            'course_id': course_id,
-            'semester': semester
-        }
+        result = self.enrollment_model.try_enroll(student_id, course_id, semester)
         
-        if self.enrollment_model.enroll(enrollment_data):
+        if result == ENROLL_SUCCESS:
             self.user_model.log_operation(f"选课: {course_id}", "enrollments")
             print(f"{Fore.GREEN}✓ 选课成功")
         else:
-            print(f"{Fore.RED}✗ 选课失败")
+            print(f"{Fore.RED}✗ 选课失败: {ENROLL_MESSAGES[result]}")
             
+    @traced
+    @budgeted(8)
     def _student_drop_course(self):
         """学生-退课"""
         student_id = self.user_model.get_related_id()
@@ -602,10 +633,10 @@ class UnifiedClient:
         for c in courses:
             print(f"  {c['course_id']}: {c['course_name']} ({c['semester']})")
             
-        course_id = input(f"\n{Fore.GREEN}请输入要退选的课程编号: {Style.RESET_ALL}").strip()
-        semester = input(f"{Fore.GREEN}请输入学期: {Style.RESET_ALL}").strip()
+        course_id = wait_input(f"\n{Fore.GREEN}请输入要退选的课程编号: {Style.RESET_ALL}").strip()
+        semester = wait_input(f"{Fore.GREEN}请输入学期: {Style.RESET_ALL}").strip()
         
-        confirm = input(f"{Fore.YELLOW}确认退选？(y/n): {Style.RESET_ALL}")
+        confirm = wait_input(f"{Fore.YELLOW}确认退选？(y/n): {Style.RESET_ALL}")
         
         if confirm.lower() == 'y':
             if self.enrollment_model.drop_course(student_id, course_id, semester):
@@ -614,6 +645,8 @@ class UnifiedClient:
             else:
                 print(f"{Fore.RED}✗ 退课失败")
                 
+    @traced
+    @budgeted(1)
     def _student_view_scores(self):
         """学生-查看成绩"""
         student_id = self.user_model.get_related_id()
@@ -642,40 +675,78 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无成绩记录")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
     # ==================== 通用功能 ====================
     
+    def _browse(self, pager: KeysetPager, title: str, header: str, width: int,
+                format_row, empty_message: str):
+        """分页浏览：n下一页、p上一页、q返回"""
+        rows = self._page_step(pager, 'first')
+        if not rows:
+            print(f"{Fore.YELLOW}{empty_message}")
+            wait_input(f"\n{Fore.GREEN}按回车键返回...")
+            return
+            
+        while True:
+            print(f"\n{Fore.CYAN}{title}（第 {pager.page_no} 页）")
+            print("-" * width)
+            print(header)
+            print("-" * width)
+            for row in pager.rows:
+                print(format_row(row))
+            print("-" * width)
+            
+            options = []
+            if pager.has_prev:
+                options.append("p 上一页")
+            if pager.has_next:
+                options.append("n 下一页")
+            options.append("q 返回")
+            choice = wait_input(f"{Fore.GREEN}{'  '.join(options)}: {Style.RESET_ALL}").strip().lower()
+            
+            if choice == 'n' and pager.has_next:
+                self._page_step(pager, 'next')
+            elif choice == 'p' and pager.has_prev:
+                self._page_step(pager, 'prev')
+            elif choice in ('q', '0', ''):
+                break
+                
+    @traced
+    @budgeted(1)
+    def _page_step(self, pager: KeysetPager, direction: str) -> list:
+        """翻页（每页一条查询）"""
+        return getattr(pager, direction)()
+        
+    @traced
     def _view_all_students(self):
         """查看所有学生"""
-        students = self.student_model.get_all()
-        if students:
-            print(f"\n{Fore.CYAN}学生列表：")
-            print("-" * 90)
-            print(f"{'学号':<12} {'姓名':<10} {'性别':<6} {'专业':<20} {'班级':<15} {'状态':<8}")
-            print("-" * 90)
-            for s in students:
-                print(f"{s['student_id']:<12} {s['name']:<10} {s['gender']:<6} "
-                      f"{s['major']:<20} {s.get('class_name', '-'):<15} {s['status']:<8}")
-            print(f"\n共 {len(students)} 名学生")
-        else:
-            print(f"{Fore.YELLOW}暂无学生数据")
-        input(f"\n{Fore.GREEN}按回车键返回...")
-        
+        # 键集分页，第一页的耗时与学生总数无关
+        self._browse(
+            KeysetPager(self.student_model.page, 'student_id', self.PAGE_SIZE),
+            "学生列表",
+            f"{'学号':<12} {'姓名':<10} {'性别':<6} {'专业':<20} {'班级':<15} {'状态':<8}",
+            90,
+            lambda s: (f"{s['student_id']:<12} {s['name']:<10} {s['gender']:<6} "
+                       f"{s['major']:<20} {s.get('class_name', '-') or '-':<15} {s['status']:<8}"),
+            "暂无学生数据")
+        
+    @traced
+    @budgeted(6)
     def _add_student(self):
         """添加学生"""
         print(f"\n{Fore.CYAN}添加新学生")
         print("-" * 40)
         
         student_data = {
-            'student_id': input("学号: ").strip(),
-            'name': input("姓名: ").strip(),
-            'gender': input("性别 [男/女]: ").strip() or '男',
-            'age': int(input("年龄 [18]: ").strip() or 18),
-            'major': input("专业: ").strip(),
-            'class_name': input("班级: ").strip(),
-            'phone': input("电话: ").strip(),
-            'email': input("邮箱: ").strip(),
+            'student_id': wait_input("学号: ").strip(),
+            'name': wait_input("姓名: ").strip(),
+            'gender': wait_input("性别 [男/女]: ").strip() or '男',
+            'age': int(wait_input("年龄 [18]: ").strip() or 18),
+            'major': wait_input("专业: ").strip(),
+            'class_name': wait_input("班级: ").strip(),
+            'phone': wait_input("电话: ").strip(),
+            'email': wait_input("邮箱: ").strip(),
             'enrollment_date': datetime.now().strftime('%Y-%m-%d')
         }
         
@@ -684,7 +755,7 @@ class UnifiedClient:
             print(f"{Fore.GREEN}✓ 学生添加成功")
             
             # 询问是否创建账号
-            create_account = input(f"\n{Fore.YELLOW}是否为该学生创建系统账号？(y/n): {Style.RESET_ALL}")
+            create_account = wait_input(f"\n{Fore.YELLOW}是否为该学生创建系统账号？(y/n): {Style.RESET_ALL}")
             if create_account.lower() == 'y':
                 user_data = {
                     'username': f"stu_{student_data['student_id']}",
@@ -700,26 +771,35 @@ class UnifiedClient:
         else:
             print(f"{Fore.RED}✗ 学生添加失败")
             
+    @traced
+    @budgeted(2)
     def _search_student(self):
-        """查询学生"""
-        keyword = input("请输入查询关键词（学号/姓名/专业）: ").strip()
-        students = self.student_model.search(keyword=keyword)
+        """查询学生（按相关度排序，只显示最相关的前若干条）"""
+        keyword = wait_input("请输入查询关键词（学号/姓名/专业）: ").strip()
+        students = self.student_model.search(keyword=keyword, limit=self.SEARCH_LIMIT)
         
         if students:
             print(f"\n{Fore.CYAN}查询结果：")
             print("-" * 70)
+            print(f"{'学号':<12} {'姓名':<10} {'专业':<20} {'班级':<15} {'状态':<8}")
+            print("-" * 70)
             for s in students:
-                print(f"学号: {s['student_id']}, 姓名: {s['name']}, "
-                      f"专业: {s['major']}, 班级: {s.get('class_name', '-')}, 状态: {s['status']}")
-            print(f"\n共找到 {len(students)} 条记录")
+                print(f"{s['student_id']:<12} {s['name']:<10} {s['major']:<20} "
+                      f"{s.get('class_name', '-') or '-':<15} {s['status']:<8}")
+            if len(students) >= self.SEARCH_LIMIT:
+                print(f"\n{Fore.YELLOW}仅显示最相关的 {self.SEARCH_LIMIT} 条，请输入更精确的关键词")
+            else:
+                print(f"\n共找到 {len(students)} 条记录")
         else:
             print(f"{Fore.YELLOW}未找到相关学生")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(6)
     def _update_student(self):
         """修改学生信息"""
-        student_id = input("请输入要修改的学号: ").strip()
+        student_id = wait_input("请输入要修改的学号: ").strip()
         student = self.student_model.get_by_id(student_id)
         
         if not student:
@@ -731,15 +811,15 @@ class UnifiedClient:
         
         update_data = {}
         
-        new_phone = input(f"新电话 [{student.get('phone', '')}]: ").strip()
+        new_phone = wait_input(f"新电话 [{student.get('phone', '')}]: ").strip()
         if new_phone:
             update_data['phone'] = new_phone
             
-        new_email = input(f"新邮箱 [{student.get('email', '')}]: ").strip()
+        new_email = wait_input(f"新邮箱 [{student.get('email', '')}]: ").strip()
         if new_email:
             update_data['email'] = new_email
             
-        new_status = input(f"新状态 [{student['status']}] (在读/休学/退学/毕业): ").strip()
+        new_status = wait_input(f"新状态 [{student['status']}] (在读/休学/退学/毕业): ").strip()
         if new_status:
             update_data['status'] = new_status
             
@@ -752,9 +832,11 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}未进行任何修改")
             
+    @traced
+    @budgeted(10)
     def _delete_student(self):
         """删除学生"""
-        student_id = input("请输入要删除的学号: ").strip()
+        student_id = wait_input("请输入要删除的学号: ").strip()
         student = self.student_model.get_by_id(student_id)
         
         if not student:
@@ -762,7 +844,7 @@ class UnifiedClient:
             return
             
         print(f"\n将删除: {student['name']} ({student['student_id']}) - {student['major']}")
-        confirm = input(f"{Fore.YELLOW}确认删除？此操作不可恢复！(yes/no): {Style.RESET_ALL}")
+        confirm = wait_input(f"{Fore.YELLOW}确认删除？此操作不可恢复！(yes/no): {Style.RESET_ALL}")
         
         if confirm.lower() == 'yes':
             if self.student_model.delete(student_id):
@@ -773,39 +855,37 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}已取消删除")
             
+    @traced
     def _view_all_courses(self):
         """查看所有课程"""
-        courses = self.course_model.get_all()
-        if courses:
-            print(f"\n{Fore.CYAN}课程列表：")
-            print("-" * 90)
-            print(f"{'课程编号':<10} {'课程名称':<20} {'学分':<6} {'教师':<10} {'类型':<8} {'学期':<10}")
-            print("-" * 90)
-            for c in courses:
-                print(f"{c['course_id']:<10} {c['course_name']:<20} "
-                      f"{c['credits']:<6} {c.get('teacher', '-'):<10} "
-                      f"{c['course_type']:<8} {c.get('semester', '-'):<10}")
-            print(f"\n共 {len(courses)} 门课程")
-        else:
-            print(f"{Fore.YELLOW}暂无课程数据")
-        input(f"\n{Fore.GREEN}按回车键返回...")
-        
+        self._browse(
+            KeysetPager(self.course_model.page, 'course_id', self.PAGE_SIZE),
+            "课程列表",
+            f"{'课程编号':<10} {'课程名称':<20} {'学分':<6} {'教师':<10} {'类型':<8} {'学期':<10}",
+            90,
+            lambda c: (f"{c['course_id']:<10} {c['course_name']:<20} "
+                       f"{c['credits']:<6} {c.get('teacher', '-'):<10} "
+                       f"{c['course_type']:<8} {c.get('semester', '-') or '-':<10}"),
+            "暂无课程数据")
+        
+    @traced
+    @budgeted(4)
     def _add_course(self):
         """添加课程"""
         print(f"\n{Fore.CYAN}添加新课程")
         print("-" * 40)
         
         course_data = {
-            'course_id': input("课程编号: ").strip(),
-            'course_name': input("课程名称: ").strip(),
-            'credits': float(input("学分 [2.0]: ").strip() or 2.0),
-            'teacher': input("授课教师: ").strip(),
-            'department': input("开课学院: ").strip(),
-            'semester': input("学期 (如2024-1): ").strip(),
-            'course_type': input("类型 [必修/选修/实践]: ").strip() or '选修',
-            'max_students': int(input("最大人数 [100]: ").strip() or 100),
-            'classroom': input("上课地点: ").strip(),
-            'schedule': input("上课时间: ").strip()
+            'course_id': wait_input("课程编号: ").strip(),
+            'course_name': wait_input("课程名称: ").strip(),
+            'credits': float(wait_input("学分 [2.0]: ").strip() or 2.0),
+            'teacher': wait_input("授课教师: ").strip(),
+            'department': wait_input("开课学院: ").strip(),
+            'semester': wait_input("学期 (如2024-1): ").strip(),
+            'course_type': wait_input("类型 [必修/选修/实践]: ").strip() or '选修',
+            'max_students': int(wait_input("最大人数 [100]: ").strip() or 100),
+            'classroom': wait_input("上课地点: ").strip(),
+            'schedule': wait_input("上课时间: ").strip()
         }
         
         if self.course_model.create(course_data):
@@ -814,26 +894,25 @@ class UnifiedClient:
         else:
             print(f"{Fore.RED}✗ 课程添加失败")
             
+    @traced
     def _search_course(self):
         """查询课程"""
-        keyword = input("请输入查询关键词（课程编号/名称/教师）: ").strip()
-        courses = self.course_model.search(keyword)
-        
-        if courses:
-            print(f"\n{Fore.CYAN}查询结果：")
-            print("-" * 70)
-            for c in courses:
-                print(f"编号: {c['course_id']}, 名称: {c['course_name']}, "
-                      f"教师: {c.get('teacher', '-')}, 学分: {c['credits']}, 类型: {c['course_type']}")
-            print(f"\n共找到 {len(courses)} 条记录")
-        else:
-            print(f"{Fore.YELLOW}未找到相关课程")
-            
-        input(f"\n{Fore.GREEN}按回车键返回...")
-        
+        keyword = wait_input("请输入查询关键词（课程编号/名称/教师）: ").strip()
+        self._browse(
+            KeysetPager(self.course_model.page, 'course_id', self.PAGE_SIZE,
+                        {'keyword': keyword}),
+            "查询结果",
+            f"{'课程编号':<10} {'课程名称':<20} {'教师':<10} {'学分':<6} {'类型':<8}",
+            70,
+            lambda c: (f"{c['course_id']:<10} {c['course_name']:<20} "
+                       f"{c.get('teacher', '-'):<10} {c['credits']:<6} {c['course_type']:<8}"),
+            "未找到相关课程")
+        
+    @traced
+    @budgeted(4)
     def _update_course(self):
         """修改课程信息"""
-        course_id = input("请输入要修改的课程编号: ").strip()
+        course_id = wait_input("请输入要修改的课程编号: ").strip()
         course = self.course_model.get_by_id(course_id)
         
         if not course:
@@ -845,15 +924,15 @@ class UnifiedClient:
         
         update_data = {}
         
-        new_classroom = input(f"新教室 [{course.get('classroom', '')}]: ").strip()
+        new_classroom = wait_input(f"新教室 [{course.get('classroom', '')}]: ").strip()
         if new_classroom:
             update_data['classroom'] = new_classroom
             
-        new_schedule = input(f"新时间 [{course.get('schedule', '')}]: ").strip()
+        new_schedule = wait_input(f"新时间 [{course.get('schedule', '')}]: ").strip()
         if new_schedule:
             update_data['schedule'] = new_schedule
             
-        new_max = input(f"新容量 [{course.get('max_students', 100)}]: ").strip()
+        new_max = wait_input(f"新容量 [{course.get('max_students', 100)}]: ").strip()
         if new_max:
             update_data['max_students'] = int(new_max)
             
@@ -866,9 +945,11 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}未进行任何修改")
             
+    @traced
+    @budgeted(10)
     def _delete_course(self):
         """删除课程"""
-        course_id = input("请输入要删除的课程编号: ").strip()
+        course_id = wait_input("请输入要删除的课程编号: ").strip()
         course = self.course_model.get_by_id(course_id)
         
         if not course:
@@ -876,7 +957,7 @@ class UnifiedClient:
             return
             
         print(f"\n将删除: {course['course_name']} ({course_id})")
-        confirm = input(f"{Fore.YELLOW}确认删除？此操作不可恢复！(yes/no): {Style.RESET_ALL}")
+        confirm = wait_input(f"{Fore.YELLOW}确认删除？此操作不可恢复！(yes/no): {Style.RESET_ALL}")
         
         if confirm.lower() == 'yes':
             if self.course_model.delete(course_id):
@@ -887,32 +968,40 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}已取消删除")
             
+    @traced
+    @budgeted(7)
     def _enroll_course(self):
         """学生选课（管理员操作）"""
         print(f"\n{Fore.CYAN}学生选课")
         enrollment_data = {
-            'student_id': input("学号: ").strip(),
-            'course_id': input("课程编号: ").strip(),
-            'semester': input("学期 (如2024-1): ").strip()
+            'student_id': wait_input("学号: ").strip(),
+            'course_id': wait_input("课程编号: ").strip(),
+            'semester': wait_input("学期 (如2024-1): ").strip()
         }
         
-        if self.enrollment_model.enroll(enrollment_data):
+        result = self.enrollment_model.try_enroll(enrollment_data['student_id'],
+                                                  enrollment_data['course_id'],
+                                                  enrollment_data['semester'])
+        
+        if result == ENROLL_SUCCESS:
             self.user_model.log_operation(
                 f"选课: {enrollment_data['student_id']} - {enrollment_data['course_id']}", 
                 "enrollments"
             )
             print(f"{Fore.GREEN}✓ 选课成功")
         else:
-            print(f"{Fore.RED}✗ 选课失败")
+            print(f"{Fore.RED}✗ 选课失败: {ENROLL_MESSAGES[result]}")
             
+    @traced
+    @budgeted(7)
     def _drop_course(self):
         """学生退课（管理员操作）"""
         print(f"\n{Fore.CYAN}学生退课")
-        student_id = input("学号: ").strip()
-        course_id = input("课程编号: ").strip()
-        semester = input("学期: ").strip()
+        student_id = wait_input("学号: ").strip()
+        course_id = wait_input("课程编号: ").strip()
+        semester = wait_input("学期: ").strip()
         
-        confirm = input(f"{Fore.YELLOW}确认退课？(y/n): {Style.RESET_ALL}")
+        confirm = wait_input(f"{Fore.YELLOW}确认退课？(y/n): {Style.RESET_ALL}")
         if confirm.lower() == 'y':
             if self.enrollment_model.drop_course(student_id, course_id, semester):
                 self.user_model.log_operation(f"退课: {student_id} - {course_id}", "enrollments")
@@ -920,9 +1009,11 @@ class UnifiedClient:
             else:
                 print(f"{Fore.RED}✗ 退课失败")
                 
+    @traced
+    @budgeted(3)
     def _view_student_courses(self):
         """查看学生选课列表"""
-        student_id = input("请输入学号: ").strip()
+        student_id = wait_input("请输入学号: ").strip()
         
         student = self.student_model.get_by_id(student_id)
         if not student:
@@ -944,12 +1035,14 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}该学生暂无选课记录")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(3)
     def _view_course_students(self):
         """查看课程选课名单"""
-        course_id = input("请输入课程编号: ").strip()
-        semester = input("请输入学期: ").strip()
+        course_id = wait_input("请输入课程编号: ").strip()
+        semester = wait_input("请输入学期: ").strip()
         
         course = self.course_model.get_by_id(course_id)
         if not course:
@@ -972,14 +1065,16 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}该课程暂无选课学生")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(6)
     def _input_score(self):
         """录入成绩（管理员）"""
         print(f"\n{Fore.CYAN}成绩录入")
         
-        course_id = input("课程编号: ").strip()
-        semester = input("学期: ").strip()
+        course_id = wait_input("课程编号: ").strip()
+        semester = wait_input("学期: ").strip()
         
         # 获取选课学生
         students = self.enrollment_model.get_course_students(course_id, semester)
@@ -1001,8 +1096,9 @@ class UnifiedClient:
         print("-" * 60)
         print(f"{Fore.YELLOW}输入成绩（直接回车跳过，输入q退出）")
         
+        pending = []
         for s in students:
-            score_input = input(f"{s['student_id']} {s['name']}: {Style.RESET_ALL}").strip()
+            score_input = wait_input(f"{s['student_id']} {s['name']}: {Style.RESET_ALL}").strip()
             
             if score_input.lower() == 'q':
                 break
@@ -1012,22 +1108,45 @@ class UnifiedClient:
             try:
                 score = float(score_input)
                 if 0 <= score <= 100:
-                    if self.enrollment_model.input_score(s['student_id'], course_id, semester, score):
-                        self.user_model.log_operation(
-                            f"录入成绩: {s['student_id']} - {course_id} - {score}",
-                            "enrollments"
-                        )
-                        print(f"{Fore.GREEN}  ✓ 成绩录入成功")
-                    else:
-                        print(f"{Fore.RED}  ✗ 成绩录入失败")
+                    pending.append((s['student_id'], score))
                 else:
                     print(f"{Fore.RED}  成绩必须在0-100之间")
             except ValueError:
                 print(f"{Fore.RED}  请输入有效的数字")
                 
+        self._save_scores(course_id, semester, pending)
+                
+    @traced
+    @budgeted(5)
+    def _save_scores(self, course_id: str, semester: str, pending: list):
+        """保存录入的成绩（整批一条语句写入，成绩和日志在一个事务中提交）"""
+        if not pending:
+            return
+            
+        try:
+            with self.db_conn.transaction():
+                results = self.enrollment_model.input_scores(course_id, semester, pending)
+                self.user_model.log_operations(
+                    (f"录入成绩: {r['student_id']} - {course_id} - {r['score']}", "enrollments", None)
+                    for r in results if r['status'] == 'ok'
+                )
+        except Exception as e:
+            print(f"{Fore.RED}✗ 成绩保存失败，本次录入已全部撤销: {e}")
+            return
+            
+        saved = 0
+        for r in results:
+            if r['status'] == 'ok':
+                saved += 1
+            else:
+                print(f"{Fore.RED}  ✗ {r['student_id']} 成绩录入失败: {r['message']}")
+        print(f"{Fore.GREEN}✓ 成功录入 {saved}/{len(pending)} 条成绩")
+        
+    @traced
+    @budgeted(3)
     def _view_student_scores(self):
         """查看学生成绩"""
-        student_id = input("请输入学号: ").strip()
+        student_id = wait_input("请输入学号: ").strip()
         
         student = self.student_model.get_by_id(student_id)
         if not student:
@@ -1059,12 +1178,14 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无成绩记录")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(3)
     def _view_course_score_distribution(self):
         """查看课程成绩分布"""
-        course_id = input("请输入课程编号: ").strip()
-        semester = input("请输入学期: ").strip()
+        course_id = wait_input("请输入课程编号: ").strip()
+        semester = wait_input("请输入学期: ").strip()
         
         course = self.course_model.get_by_id(course_id)
         if not course:
@@ -1091,7 +1212,7 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无成绩数据")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
     def _show_statistics(self):
         """显示统计信息"""
@@ -1103,7 +1224,7 @@ class UnifiedClient:
             print("4. 成绩统计")
             print("0. 返回主菜单")
             
-            choice = input(f"{Fore.GREEN}请选择 [0-4]: {Style.RESET_ALL}")
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-4]: {Style.RESET_ALL}")
             
             if choice == '0':
                 break
@@ -1116,6 +1237,8 @@ class UnifiedClient:
             elif choice == '4':
                 self._show_score_statistics()
                 
+    @traced
+    @budgeted(1)
     def _show_student_statistics(self):
         """学生统计"""
         stats = self.student_model.get_statistics()
@@ -1139,8 +1262,10 @@ class UnifiedClient:
             for gender, count in stats['by_gender'].items():
                 print(f"  {gender}: {count}")
                 
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(1)
     def _show_course_statistics(self):
         """课程统计"""
         stats = self.course_model.get_statistics()
@@ -1164,8 +1289,10 @@ class UnifiedClient:
             for dept, count in stats['by_department'].items():
                 print(f"  {dept}: {count}")
                 
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(1)
     def _show_enrollment_statistics(self):
         """选课统计"""
         stats = self.enrollment_model.get_statistics()
@@ -1184,11 +1311,13 @@ class UnifiedClient:
             for count, students in sorted(stats['student_course_count'].items()):
                 print(f"  选{count}门课: {students}人")
                 
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(1)
     def _show_score_statistics(self):
         """成绩统计"""
-        semester = input("请输入学期 (回车查看全部): ").strip() or None
+        semester = wait_input("请输入学期 (回车查看全部): ").strip() or None
         stats = self.enrollment_model.get_score_statistics(semester)
         
         print(f"\n{Fore.CYAN}成绩统计")
@@ -1210,8 +1339,10 @@ class UnifiedClient:
             if len(stats['failed_students']) > 10:
                 print(f"  ... 共 {len(stats['failed_students'])} 人")
                 
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(1)
     def _view_all_users(self):
         """查看所有用户"""
         users = self.user_model.get_all_users()
@@ -1236,19 +1367,21 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无用户数据")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    @traced
+    @budgeted(2)
     def _create_user(self):
         """创建用户"""
         print(f"\n{Fore.CYAN}创建新用户")
         print("-" * 40)
         
         user_data = {
-            'username': input("用户名: ").strip(),
-            'password': input("密码 [123456]: ").strip() or '123456',
-            'role': input("角色 (admin/teacher/student): ").strip(),
-            'related_id': input("关联ID (学号或教师工号，可选): ").strip() or None,
-            'real_name': input("真实姓名: ").strip()
+            'username': wait_input("用户名: ").strip(),
+            'password': wait_input("密码 [123456]: ").strip() or '123456',
+            'role': wait_input("角色 (admin/teacher/student): ").strip(),
+            'related_id': wait_input("关联ID (学号或教师工号，可选): ").strip() or None,
+            'real_name': wait_input("真实姓名: ").strip()
         }
         
         if user_data['role'] not in ['admin', 'teacher', 'student']:
@@ -1262,12 +1395,14 @@ class UnifiedClient:
         else:
             print(f"{Fore.RED}✗ 用户创建失败")
             
+    @traced
+    @budgeted(2)
     def _toggle_user_status(self):
         """切换用户状态"""
         # 先显示用户列表
         self._view_all_users()
         
-        user_id = input(f"\n{Fore.GREEN}请输入要切换状态的用户ID: {Style.RESET_ALL}").strip()
+        user_id = wait_input(f"\n{Fore.GREEN}请输入要切换状态的用户ID: {Style.RESET_ALL}").strip()
         
         try:
             user_id = int(user_id)
@@ -1278,10 +1413,12 @@ class UnifiedClient:
         except ValueError:
             print(f"{Fore.RED}请输入有效的用户ID")
             
+    @traced
+    @budgeted(1)
     def _reset_user_password(self):
         """重置用户密码"""
-        user_id = input("请输入用户ID: ").strip()
-        new_password = input("新密码 [123456]: ").strip() or '123456'
+        user_id = wait_input("请输入用户ID: ").strip()
+        new_password = wait_input("新密码 [123456]: ").strip() or '123456'
         
         try:
             user_id = int(user_id)
@@ -1292,24 +1429,26 @@ class UnifiedClient:
         except ValueError:
             print(f"{Fore.RED}请输入有效的用户ID")
             
+    @traced
+    @budgeted(1)
     def _view_operation_logs(self):
         """查看操作日志"""
         print(f"\n{Fore.YELLOW}日志查询条件（直接回车跳过）")
         
         filters = {}
-        username = input("用户名: ").strip()
+        username = wait_input("用户名: ").strip()
         if username:
             filters['username'] = username
             
-        role = input("角色 (admin/teacher/student): ").strip()
+        role = wait_input("角色 (admin/teacher/student): ").strip()
         if role:
             filters['role'] = role
             
-        date = input("日期 (YYYY-MM-DD): ").strip()
+        date = wait_input("日期 (YYYY-MM-DD): ").strip()
         if date:
             filters['date'] = date
             
-        limit = input("显示条数 [50]: ").strip()
+        limit = wait_input("显示条数 [50]: ").strip()
         limit = int(limit) if limit else 50
         
         logs = self.user_model.get_operation_logs(limit, filters if filters else None)
@@ -1333,16 +1472,71 @@ class UnifiedClient:
         else:
             print(f"{Fore.YELLOW}暂无操作日志")
             
-        input(f"\n{Fore.GREEN}按回车键返回...")
+        wait_input(f"\n{Fore.GREEN}按回车键返回...")
         
+    def _show_query_stats(self):
+        """SQL性能统计（本客户端进程内执行过的语句）"""
+        while True:
+            summary = self.query_stats.summary()
+            print(f"\n{Fore.YELLOW}SQL性能统计（自 {summary['since']} 起，"
+                  f"{summary['statements']} 类语句，共执行 {summary['count']} 次，"
+                  f"总耗时 {summary['total_ms']:.1f}ms）")
+            print("1. 按总耗时排序")
+            print("2. 按平均耗时排序")
+            print("3. 按执行次数排序")
+            if self.entity_cache:
+                cache = self.entity_cache.get_stats()
+                print(f"实体缓存：{cache['size']}/{self.entity_cache.max_size} 条，"
+                      f"命中 {cache['hits']} 次，未命中 {cache['misses']} 次，"
+                      f"命中率 {cache['hit_rate']:.1%}，淘汰 {cache['evictions']}，过期 {cache['expired']}，"
+                      f"因其他客户端修改丢弃 {cache['stale_drops']}")
+            print(f"4. 最近慢查询（>= {self.query_stats.slow_threshold_ms:g}ms）")
+            print("5. 清空统计")
+            print("0. 返回主菜单")
+            
+            choice = wait_input(f"{Fore.GREEN}请选择 [0-5]: {Style.RESET_ALL}")
+            
+            if choice == '0':
+                break
+            elif choice in ('1', '2', '3'):
+                order_by = {'1': 'total_ms', '2': 'mean_ms', '3': 'count'}[choice]
+                rows = self.query_stats.snapshot(order_by, limit=20)
+                if not rows:
+                    print(f"{Fore.YELLOW}暂无统计数据")
+                    continue
+                print("-" * 120)
+                print(f"{'次数':>6} {'总耗时ms':>10} {'平均ms':>9} {'最大ms':>9} {'行数':>8}  语句")
+                print("-" * 120)
+                for r in rows:
+                    print(f"{r['count']:>6} {r['total_ms']:>10.1f} {r['mean_ms']:>9.2f} "
+                          f"{r['max_ms']:>9.2f} {r['rows']:>8}  {r['fingerprint'][:80]}")
+            elif choice == '4':
+                slow = self.query_stats.slow_queries()
+                if not slow:
+                    print(f"{Fore.YELLOW}暂无慢查询")
+                    continue
+                for entry in slow[:20]:
+                    print(f"{entry['time']}  {entry['elapsed_ms']:>9.1f}ms  行数 {entry['rows']}")
+                    print(f"    {entry['fingerprint'][:100]}")
+                    print(f"    参数: {entry['params']}")
+                if self.query_stats.slow_log_path:
+                    print(f"\n完整慢查询日志: {self.query_stats.slow_log_path}")
+            elif choice == '5':
+                self.query_stats.reset()
+                print(f"{Fore.GREEN}✓ 统计已清空")
+            else:
+                print(f"{Fore.RED}无效选择，请重试")
+                
+    @traced
+    @budgeted(1)
     def _change_password(self):
         """修改密码"""
         print(f"\n{Fore.CYAN}修改密码")
         print("-" * 40)
         
-        old_password = input("请输入原密码: ").strip()
-        new_password = input("请输入新密码: ").strip()
-        confirm_password = input("请确认新密码: ").strip()
+        old_password = wait_input("请输入原密码: ").strip()
+        new_password = wait_input("请输入新密码: ").strip()
+        confirm_password = wait_input("请确认新密码: ").strip()
         
         if new_password != confirm_password:
             print(f"{Fore.RED}两次输入的密码不一致")
@@ -1360,6 +1554,9 @@ class UnifiedClient:
     def cleanup(self):
         """清理资源"""
         self.user_model.logout()
+        self.log_writer.close()
+        if self.tracer:
+            self.tracer.close()
         self.db_conn.disconnect()
         print(f"{Fore.GREEN}已安全退出系统")
 
@@ -5,6 +5,10 @@ db_config.py
 import os
 from typing import Dict, Any
 
+# 默认慢查询日志位置：项目目录下的logs/（首次写入时才创建），不随启动目录散落
+DEFAULT_SLOW_LOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'slow_query.log')
+
 class DBConfig:
     """数据库配置类"""
     
@@ -32,3 +36,55 @@ class DBConfig:
             'database': 'student_management',
             'charset': 'utf8mb4'
         }
+    
+    @staticmethod
+    def get_query_stats_config() -> Dict[str, Any]:
+        """获取SQL统计配置（可用环境变量SMS_SLOW_QUERY_MS、SMS_SLOW_QUERY_LOG覆盖，后者为空表示不写文件）"""
+        return {
+            'slow_threshold_ms': float(os.environ.get('SMS_SLOW_QUERY_MS', 200)),
+            'slow_log_path': os.environ.get('SMS_SLOW_QUERY_LOG', DEFAULT_SLOW_LOG_PATH) or None,
+        }
+    
+    @staticmethod
+    def get_cache_config() -> Dict[str, Any]:
+        """
+        获取实体缓存配置（可用环境变量覆盖）
+        
+        SMS_CACHE_SIZE: 最大条目数，0表示关闭缓存
+        SMS_CACHE_TTL: 条目有效秒数
+        SMS_CACHE_POLL: 检查缓存版本表（其他客户端的修改）的最小间隔秒数
+        """
+        return {
+            'max_size': int(os.environ.get('SMS_CACHE_SIZE', 2000)),
+            'ttl': float(os.environ.get('SMS_CACHE_TTL', 300)),
+            'poll_interval': float(os.environ.get('SMS_CACHE_POLL', 2)),
+        }
+    
+    @staticmethod
+    def get_api_config() -> Dict[str, Any]:
+        """
+        获取HTTP/JSON API服务配置（可用环境变量覆盖）
+
+        SMS_API_HOST / SMS_API_PORT: 监听地址和端口
+        SMS_API_WORKERS: 工作线程数（同时也是连接池上限）
+        SMS_API_KEEPALIVE: 长连接空闲多少秒后关闭
+        SMS_API_SESSION_TTL: 登录会话空闲多少秒后失效
+        """
+        return {
+            'host': os.environ.get('SMS_API_HOST', '127.0.0.1'),
+            'port': int(os.environ.get('SMS_API_PORT', 8080)),
+            'workers': int(os.environ.get('SMS_API_WORKERS', 32)),
+            'keepalive': float(os.environ.get('SMS_API_KEEPALIVE', 5)),
+            'session_ttl': float(os.environ.get('SMS_API_SESSION_TTL', 1800)),
+        }
+
+    @staticmethod
+    def get_trace_file() -> str:
+        """获取操作追踪输出文件（环境变量SMS_TRACE_FILE，.jsonl为逐行格式；未设置时不追踪）"""
+        return os.environ.get('SMS_TRACE_FILE') or None
+    
+    @staticmethod
+    def get_query_budget_mode() -> str:
+        """获取SQL预算检查模式（环境变量SMS_QUERY_BUDGET=warn/raise；未设置时不检查）"""
+        mode = os.environ.get('SMS_QUERY_BUDGET', '').lower()
+        return mode if mode in ('warn', 'raise') else None
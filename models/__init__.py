@@ -6,5 +6,7 @@ from .student import Student
 from .course import Course
 from .enrollment import Enrollment
 from .user import User
+from .async_models import AsyncStudent, AsyncCourse, AsyncEnrollment, AsyncUser
 
-__all__ = ['Student', 'Course', 'Enrollment', 'User']
+__all__ = ['Student', 'Course', 'Enrollment', 'User',
+           'AsyncStudent', 'AsyncCourse', 'AsyncEnrollment', 'AsyncUser']
@@ -0,0 +1,139 @@
+"""
+async_models.py
+异步模型 - Student/Course/Enrollment/User的协程版本
+
+每个异步方法把对应的同步模型方法整体放到AsyncDatabaseConnection的工作线程中执行，
+SQL、事务、缓存失效和统计汇总维护与同步模型完全相同（同一份代码）。
+同步模型中的逐行迭代方法（iter_all等）需要长时间占用连接，异步版本不提供，请使用page分页。
+
+用法：
+    adb = AsyncDatabaseConnection.from_config(DBConfig.get_local_config(), {'max_size': 20})
+    students = AsyncStudent(adb)
+    student = await students.get_by_id('2024001')
+"""
+from typing import Optional
+
+from utils.async_db import AsyncDatabaseConnection
+from utils.admission import AdmissionGate
+from utils.cache import EntityCache
+from utils.log_writer import OperationLogWriter
+from .student import Student
+from .course import Course
+from .enrollment import Enrollment
+from .user import User
+
+
+def _delegate(name: str):
+    """生成在工作线程中调用同步模型同名方法的协程方法"""
+    async def method(self, *args, **kwargs):
+        return await self.db.run(getattr(self.model, name), *args, **kwargs)
+    method.__name__ = name
+    method.__qualname__ = name
+    return method
+
+
+class _AsyncModel:
+    """异步模型基类：持有异步连接和同一连接池上的同步模型"""
+
+    def __init__(self, db: AsyncDatabaseConnection, model):
+        self.db = db
+        self.model = model
+
+
+class AsyncStudent(_AsyncModel):
+    """学生模型的异步版本"""
+
+    def __init__(self, db: AsyncDatabaseConnection, cache: Optional[EntityCache] = None):
+        super().__init__(db, Student(db.db, cache))
+
+    create = _delegate('create')
+    bulk_import = _delegate('bulk_import')
+    get_by_id = _delegate('get_by_id')
+    get_many = _delegate('get_many')
+    get_all = _delegate('get_all')
+    update = _delegate('update')
+    delete = _delegate('delete')
+    search = _delegate('search')
+    page = _delegate('page')
+    get_statistics = _delegate('get_statistics')
+
+
+class AsyncCourse(_AsyncModel):
+    """课程模型的异步版本"""
+
+    def __init__(self, db: AsyncDatabaseConnection, cache: Optional[EntityCache] = None):
+        super().__init__(db, Course(db.db, cache))
+
+    create = _delegate('create')
+    get_by_id = _delegate('get_by_id')
+    get_many = _delegate('get_many')
+    is_taught_by = _delegate('is_taught_by')
+    get_all = _delegate('get_all')
+    update = _delegate('update')
+    delete = _delegate('delete')
+    search = _delegate('search')
+    page = _delegate('page')
+    get_available_courses = _delegate('get_available_courses')
+    get_by_teacher = _delegate('get_by_teacher')
+    get_statistics = _delegate('get_statistics')
+
+
+class AsyncEnrollment(_AsyncModel):
+    """
+    选课模型的异步版本
+
+    准入门（AdmissionGate）在工作线程中等待，等待期间占用一个工作线程。
+    """
+
+    def __init__(self, db: AsyncDatabaseConnection, admission: Optional[AdmissionGate] = None,
+                 cache: Optional[EntityCache] = None):
+        super().__init__(db, Enrollment(db.db, admission, cache))
+
+    enroll = _delegate('enroll')
+    try_enroll = _delegate('try_enroll')
+    drop_course = _delegate('drop_course')
+    reconcile_enrolled_counts = _delegate('reconcile_enrolled_counts')
+    get_student_courses = _delegate('get_student_courses')
+    get_course_students = _delegate('get_course_students')
+    input_score = _delegate('input_score')
+    input_scores = _delegate('input_scores')
+    get_student_scores = _delegate('get_student_scores')
+    get_course_score_distribution = _delegate('get_course_score_distribution')
+    get_statistics = _delegate('get_statistics')
+    get_score_statistics = _delegate('get_score_statistics')
+
+
+class AsyncUser(_AsyncModel):
+    """
+    用户模型的异步版本
+
+    与同步User一样保存当前登录用户，每个会话使用一个实例。
+    """
+
+    def __init__(self, db: AsyncDatabaseConnection, log_writer: Optional[OperationLogWriter] = None,
+                 cache: Optional[EntityCache] = None):
+        super().__init__(db, User(db.db, log_writer, cache))
+
+    login = _delegate('login')
+    logout = _delegate('logout')
+    log_operation = _delegate('log_operation')
+    change_password = _delegate('change_password')
+    create_user = _delegate('create_user')
+    get_all_users = _delegate('get_all_users')
+    get_many = _delegate('get_many')
+    toggle_user_status = _delegate('toggle_user_status')
+    reset_password = _delegate('reset_password')
+    get_operation_logs = _delegate('get_operation_logs')
+
+    @property
+    def current_user(self):
+        """当前登录用户"""
+        return self.model.current_user
+
+    def get_role(self) -> str:
+        """当前用户角色（不访问数据库）"""
+        return self.model.get_role()
+
+    def get_related_id(self) -> str:
+        """当前用户关联的学号/工号（不访问数据库）"""
+        return self.model.get_related_id()
@@ -2,15 +2,45 @@
 course.py
 课程数据模型
 """
-from typing import Dict, Any, List, Optional
+from collections import Counter
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
 from utils.db_connection import DatabaseConnection
+from utils.cache import EntityCache, bump_version
+from .summary import StatisticsSummary, STAT_COURSES
+
+# 参与统计汇总的字段
+_STAT_FIELDS = {'course_type', 'semester', 'department'}
 
 class Course:
     """课程模型类"""
     
-    def __init__(self, db_connection: DatabaseConnection):
-        """初始化课程模型"""
+    # 缓存键的实体类型
+    CACHE_NAMESPACE = 'course'
+    
+    # 可选课程列表（含选课人数）的缓存键类型，选课/退选时失效
+    CATALOG_NAMESPACE = 'catalog'
+    
+    def __init__(self, db_connection: DatabaseConnection, cache: Optional[EntityCache] = None):
+        """
+        初始化课程模型
+        
+        Args:
+            db_connection: 数据库连接
+            cache: 实体缓存（可与其他模型共用），为None时不缓存
+        """
         self.db = db_connection
+        self.cache = cache
+        self.summary = StatisticsSummary(db_connection)
+        if cache:
+            cache.depends_on(self.CACHE_NAMESPACE, 'courses', 'teachers')
+            cache.depends_on(self.CATALOG_NAMESPACE, 'courses', 'teachers', 'enrollments')
+        
+    def _invalidate(self, *course_ids: str):
+        """写操作后使缓存失效（教师归属校验也读同一条目）"""
+        if self.cache:
+            for course_id in course_ids:
+                self.cache.invalidate((self.CACHE_NAMESPACE, course_id))
+            self.cache.invalidate_namespace(self.CATALOG_NAMESPACE)
         
     def create(self, course_data: Dict[str, Any]) -> bool:
         """创建课程"""
@@ -35,27 +65,89 @@ class Course:
                 course_data.get('schedule', ''),
                 course_data.get('description', '')
             )
-            result = self.db.execute_update(query, params)
+            with self.db.transaction():
+                result = self.db.execute_update(query, params)
+                if result > 0 and course_data.get('semester'):
+                    # 预建选课人数计数行，选课时直接带条件更新
+                    self.db.execute_update("""
+                        INSERT IGNORE INTO course_enrollment_counts (course_id, semester, enrolled_count)
+                        VALUES (%s, %s, 0)
+                    """, (course_data['course_id'], course_data['semester']))
+                if result > 0:
+                    self.summary.course_changed(
+                        None, {'course_type': params[7], 'semester': params[6], 'department': params[5]})
+                    bump_version(self.db, 'courses', course_data['course_id'])
+            self._invalidate(course_data['course_id'])
             return result > 0
         except Exception as e:
             print(f"创建课程失败: {e}")
             return False
             
-    def get_by_id(self, course_id: str) -> Optional[Dict[str, Any]]:
-        """根据课程编号获取课程"""
+    def get_by_id(self, course_id: str, bypass_cache: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        根据课程编号获取课程
+        
+        Args:
+            course_id: 课程编号
+            bypass_cache: 为True时直接查库（结果仍会刷新缓存）
+        """
         query = """
             SELECT c.*, COALESCE(t.name, '-') as teacher
             FROM courses c
             LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
             WHERE c.course_id = %s
         """
-        try:
+        
+        def load():
             results = self.db.execute_query(query, (course_id,))
             return results[0] if results else None
+            
+        try:
+            if self.cache is None:
+                return load()
+            return self.cache.get_or_load((self.CACHE_NAMESPACE, course_id), load, bypass_cache)
         except Exception as e:
             print(f"查询课程失败: {e}")
             return None
             
+    def get_many(self, course_ids: Iterable[str], bypass_cache: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取课程（含教师姓名；IN列表分批查询，命中缓存的不再查库）
+        
+        Args:
+            course_ids: 课程编号列表
+            bypass_cache: 为True时全部查库
+            
+        Returns:
+            按传入顺序排列的{课程编号: 课程}，不存在的编号不出现在结果中
+        """
+        query = """
+            SELECT c.*, COALESCE(t.name, '-') as teacher
+            FROM courses c
+            LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
+            WHERE c.course_id IN ({placeholders})
+        """
+        
+        def load(ids):
+            return {r['course_id']: r for r in self.db.execute_query_in(query, ids)}
+            
+        try:
+            if self.cache is None:
+                ids = list(dict.fromkeys(course_ids))
+                found = load(ids)
+                return {i: found[i] for i in ids if i in found}
+            return self.cache.get_many_or_load(self.CACHE_NAMESPACE, course_ids, load, bypass_cache)
+        except Exception as e:
+            print(f"批量查询课程失败: {e}")
+            return {}
+            
+    def is_taught_by(self, course_id: str, teacher_id: str, bypass_cache: bool = False) -> bool:
+        """课程是否由该教师授课（教师权限校验，经get_by_id走缓存）"""
+        if not course_id or not teacher_id:
+            return False
+        course = self.get_by_id(course_id, bypass_cache)
+        return bool(course) and course.get('teacher_id') == teacher_id
+            
     def get_all(self) -> List[Dict[str, Any]]:
         """获取所有课程"""
         query = """
@@ -70,6 +162,19 @@ class Course:
             print(f"查询所有课程失败: {e}")
             return []
             
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """流式获取所有课程（适用于大数据量）"""
+        query = """
+            SELECT c.*, COALESCE(t.name, '-') as teacher
+            FROM courses c
+            LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
+            ORDER BY c.course_id
+        """
+        try:
+            yield from self.db.iter_query(query, batch_size=batch_size)
+        except Exception as e:
+            print(f"查询所有课程失败: {e}")
+            
     def update(self, course_id: str, update_data: Dict[str, Any]) -> bool:
         """更新课程信息"""
         if not update_data:
@@ -91,7 +196,17 @@ class Course:
         """
         
         try:
-            result = self.db.execute_update(query, tuple(params))
+            with self.db.transaction():
+                # 统计维度变化时先锁定原值，用于调整汇总
+                old = None
+                if _STAT_FIELDS & update_data.keys():
+                    old = self._lock_for_summary(course_id)
+                result = self.db.execute_update(query, tuple(params))
+                if result > 0 and old:
+                    self.summary.course_changed(old, {**old, **update_data})
+                if result > 0:
+                    bump_version(self.db, 'courses', course_id)
+            self._invalidate(course_id, update_data.get('course_id', course_id))
             return result > 0
         except Exception as e:
             print(f"更新课程失败: {e}")
@@ -101,52 +216,137 @@ class Course:
         """删除课程"""
         query = "DELETE FROM courses WHERE course_id = %s"
         try:
-            result = self.db.execute_update(query, (course_id,))
+            with self.db.transaction():
+                old = self._lock_for_summary(course_id)
+                if old:
+                    # 先扣减汇总，再显式删除选课记录（db_init建的表没有外键级联）
+                    self.summary.course_removed(old)
+                    self.db.execute_update("DELETE FROM enrollments WHERE course_id = %s", (course_id,))
+                result = self.db.execute_update(query, (course_id,))
+                if result > 0:
+                    self.db.execute_update(
+                        "DELETE FROM course_enrollment_counts WHERE course_id = %s", (course_id,))
+                    bump_version(self.db, 'courses', course_id)
+                    bump_version(self.db, 'enrollments', course_id)
+            self._invalidate(course_id)
             return result > 0
         except Exception as e:
             print(f"删除课程失败: {e}")
             return False
             
+    def _lock_for_summary(self, course_id: str) -> Optional[Dict[str, Any]]:
+        """锁定并读取课程的统计维度（需在事务中调用）"""
+        result = self.db.execute_query(
+            "SELECT course_id, course_type, semester, department FROM courses "
+            "WHERE course_id = %s FOR UPDATE", (course_id,))
+        return result[0] if result else None
+        
+    def _build_filters(self, filters: Dict[str, Any]) -> Tuple[List[str], list]:
+        """构建课程筛选条件（keyword/semester/department/course_type/teacher_id）"""
+        clauses = []
+        params = []
+        
+        if filters.get('keyword'):
+            clauses.append("(c.course_id LIKE %s OR c.course_name LIKE %s OR t.name LIKE %s)")
+            keyword_pattern = f"%{filters['keyword']}%"
+            params.extend([keyword_pattern, keyword_pattern, keyword_pattern])
+            
+        for field in ('semester', 'department', 'course_type', 'teacher_id'):
+            if filters.get(field):
+                clauses.append(f"c.{field} = %s")
+                params.append(filters[field])
+                
+        return clauses, params
+        
     def search(self, keyword: str) -> List[Dict[str, Any]]:
         """搜索课程"""
+        clauses, params = self._build_filters({'keyword': keyword})
         query = """
             SELECT c.*, COALESCE(t.name, '-') as teacher
             FROM courses c
             LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
-            WHERE c.course_id LIKE %s 
-               OR c.course_name LIKE %s 
-               OR t.name LIKE %s
-            ORDER BY c.course_id
         """
-        keyword_pattern = f"%{keyword}%"
-        params = (keyword_pattern, keyword_pattern, keyword_pattern)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY c.course_id"
         
         try:
-            return self.db.execute_query(query, params)
+            return self.db.execute_query(query, tuple(params) if params else None)
         except Exception as e:
             print(f"搜索课程失败: {e}")
             return []
             
-    def get_available_courses(self, semester: str) -> List[Dict[str, Any]]:
-        """获取可选课程"""
+    def page(self, after_id: str = None, limit: int = 20, filters: Dict[str, Any] = None,
+             before_id: str = None) -> List[Dict[str, Any]]:
+        """
+        按课程编号分页查询（键集分页，不使用OFFSET）
+        
+        Args:
+            after_id: 返回课程编号大于after_id的一页，None表示第一页
+            limit: 每页条数
+            filters: 筛选条件（keyword/semester/department/course_type/teacher_id）
+            before_id: 返回课程编号小于before_id的一页（上一页，优先于after_id）
+            
+        Returns:
+            按课程编号升序排列的课程列表
+        """
+        clauses, params = self._build_filters(filters or {})
+        if before_id is not None:
+            clauses.append("c.course_id < %s")
+            params.append(before_id)
+            order = "DESC"
+        else:
+            if after_id is not None:
+                clauses.append("c.course_id > %s")
+                params.append(after_id)
+            order = "ASC"
+            
+        query = """
+            SELECT c.*, COALESCE(t.name, '-') as teacher
+            FROM courses c
+            LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
+        """
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY c.course_id {order} LIMIT %s"
+        params.append(limit)
+        
+        try:
+            rows = self.db.execute_query(query, tuple(params))
+            if before_id is not None:
+                rows = list(reversed(rows))
+            return rows
+        except Exception as e:
+            print(f"分页查询课程失败: {e}")
+            return []
+            
+    def get_available_courses(self, semester: str, bypass_cache: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取可选课程
+        
+        Args:
+            semester: 学期
+            bypass_cache: 为True时直接查库（结果仍会刷新缓存）
+        """
+        # 选课人数读取维护好的计数表，避免每门课两次COUNT(*)子查询
         query = """
             SELECT c.*, COALESCE(t.name, '-') as teacher,
-                   (SELECT COUNT(*) FROM enrollments e 
-                    WHERE e.course_id = c.course_id 
-                      AND e.semester = %s) as enrolled_count
+                   COALESCE(n.enrolled_count, 0) as enrolled_count
             FROM courses c
             LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
+            LEFT JOIN course_enrollment_counts n 
+                   ON n.course_id = c.course_id AND n.semester = %s
             WHERE c.semester = %s
-              AND c.max_students > (
-                  SELECT COUNT(*) FROM enrollments e 
-                  WHERE e.course_id = c.course_id 
-                    AND e.semester = %s
-              )
+              AND c.max_students > COALESCE(n.enrolled_count, 0)
             ORDER BY c.course_id
         """
         
         try:
-            return self.db.execute_query(query, (semester, semester, semester))
+            if self.cache is None:
+                return self.db.execute_query(query, (semester, semester))
+            return self.cache.get_or_load(
+                (self.CATALOG_NAMESPACE, semester),
+                lambda: self.db.execute_query(query, (semester, semester)), bypass_cache)
         except Exception as e:
             print(f"查询可选课程失败: {e}")
             return []
@@ -167,45 +367,27 @@ class Course:
             return []
             
     def get_statistics(self) -> Dict[str, Any]:
-        """获取课程统计信息"""
+        """
+        获取课程统计信息
+        
+        读取汇总表中按(类型, 学期, 学院)维护的分组计数，各维度的计数在分组上汇总。
+        """
         stats = {}
         
         try:
-            # 总课程数
-            query = "SELECT COUNT(*) as total FROM courses"
-            result = self.db.execute_query(query)
-            stats['total_courses'] = result[0]['total'] if result else 0
-            
-            # 按类型统计
-            query = """
-                SELECT course_type, COUNT(*) as count 
-                FROM courses 
-                GROUP BY course_type
-            """
-            result = self.db.execute_query(query)
-            stats['by_type'] = {row['course_type']: row['count'] for row in result}
-            
-            # 按学期统计
-            query = """
-                SELECT semester, COUNT(*) as count 
-                FROM courses 
-                WHERE semester IS NOT NULL AND semester != ''
-                GROUP BY semester
-                ORDER BY semester DESC
-            """
-            result = self.db.execute_query(query)
-            stats['by_semester'] = {row['semester']: row['count'] for row in result}
-            
-            # 按学院统计
-            query = """
-                SELECT department, COUNT(*) as count 
-                FROM courses 
-                WHERE department IS NOT NULL AND department != ''
-                GROUP BY department
-                ORDER BY count DESC
-            """
-            result = self.db.execute_query(query)
-            stats['by_department'] = {row['department']: row['count'] for row in result}
+            by_type, by_semester, by_department = Counter(), Counter(), Counter()
+            for row in self.summary.groups(STAT_COURSES):
+                count = int(row['count'])
+                by_type[row['k1'] or None] += count
+                if row['k2']:
+                    by_semester[row['k2']] += count
+                if row['k3']:
+                    by_department[row['k3']] += count
+                    
+            stats['total_courses'] = sum(by_type.values())
+            stats['by_type'] = dict(by_type)
+            stats['by_semester'] = dict(sorted(by_semester.items(), reverse=True))
+            stats['by_department'] = dict(by_department.most_common())
             
         except Exception as e:
             print(f"获取统计信息失败: {e}")
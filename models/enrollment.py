@@ -2,53 +2,203 @@
 enrollment.py
 选课数据模型
 """
-from typing import Dict, Any, List, Optional
+from bisect import bisect_right
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import pymysql
 from utils.db_connection import DatabaseConnection
+from utils.admission import AdmissionGate, AdmissionRejected
+from utils.cache import EntityCache, bump_version
+from .course import Course
+from .summary import StatisticsSummary, STAT_STUDENT_LOAD, STAT_SCORES, STAT_FAILING, PASS_SCORE
+
+# 成绩等级划分（分数下限 -> 等级）
+GRADE_THRESHOLDS = [60, 70, 80, 90]
+GRADE_NAMES = ['不及格', '及格', '中等', '良好', '优秀']
+
+
+# 选课结果
+ENROLL_SUCCESS = 'success'
+ENROLL_DUPLICATE = 'duplicate'
+ENROLL_FULL = 'full'
+ENROLL_NOT_FOUND = 'not_found'
+ENROLL_BUSY = 'busy'
+ENROLL_ERROR = 'error'
+
+ENROLL_MESSAGES = {
+    ENROLL_SUCCESS: '选课成功',
+    ENROLL_DUPLICATE: '该学生已选修此课程',
+    ENROLL_FULL: '课程已满',
+    ENROLL_NOT_FOUND: '课程不存在',
+    ENROLL_BUSY: '选课人数过多，请稍后重试',
+    ENROLL_ERROR: '选课失败',
+}
+
+# 死锁、锁等待超时时重试
+_RETRYABLE_ERRORS = (1205, 1213)
+
+
+def calc_grade(score: float) -> str:
+    """根据分数计算等级"""
+    return GRADE_NAMES[bisect_right(GRADE_THRESHOLDS, score)]
+
+
+class _CourseFull(Exception):
+    """课程名额已满（用于回滚选课事务）"""
+
 
 class Enrollment:
     """选课模型类"""
     
-    def __init__(self, db_connection: DatabaseConnection):
-        """初始化选课模型"""
+    # 批量录入成绩时单条UPDATE语句最多包含的学生数
+    SCORE_BATCH_SIZE = 500
+    
+    # 遇到死锁或锁等待超时时的最大重试次数
+    ENROLL_RETRIES = 2
+    
+    def __init__(self, db_connection: DatabaseConnection,
+                 admission: Optional[AdmissionGate] = None,
+                 cache: Optional[EntityCache] = None):
+        """
+        初始化选课模型
+        
+        Args:
+            db_connection: 数据库连接
+            admission: 高并发准入门（抢课高峰时启用），为None时不做限流
+            cache: 与Course共用的缓存，选课/退选后使该学期的可选课程列表失效
+        """
         self.db = db_connection
+        self.admission = admission
+        self.cache = cache
+        self.summary = StatisticsSummary(db_connection)
+        
+    def _invalidate_catalog(self, semester: str):
+        """选课人数变化后使本进程缓存的可选课程列表失效（其他进程由版本表通知）"""
+        if self.cache:
+            self.cache.invalidate((Course.CATALOG_NAMESPACE, semester))
+            
+    def _publish_change(self, course_id: str, semester: str):
+        """
+        选课/退选提交后通知缓存
+        
+        版本号在选课事务之外单独递增：同一张表只有VERSION_SLOTS个版本行，
+        放在事务内会让不同课程的选课事务互相等待版本行锁。版本号更新失败只影响
+        其他进程的缓存（由TTL兜底），不影响已提交的选课结果。
+        """
+        try:
+            bump_version(self.db, 'enrollments', course_id)
+        except Exception as e:
+            print(f"更新缓存版本失败: {e}")
+        self._invalidate_catalog(semester)
         
     def enroll(self, enrollment_data: Dict[str, Any]) -> bool:
         """学生选课"""
-        # 检查是否已选
-        check_query = """
-            SELECT COUNT(*) as count FROM enrollments 
-            WHERE student_id = %s AND course_id = %s AND semester = %s
+        result = self.try_enroll(enrollment_data['student_id'],
+                                 enrollment_data['course_id'],
+                                 enrollment_data['semester'])
+        if result != ENROLL_SUCCESS:
+            print(ENROLL_MESSAGES[result])
+        return result == ENROLL_SUCCESS
+        
+    def try_enroll(self, student_id: str, course_id: str, semester: str) -> str:
         """
+        选课（名额检查与插入在同一个短事务内原子完成）
         
-        try:
-            result = self.db.execute_query(check_query, (
-                enrollment_data['student_id'],
-                enrollment_data['course_id'],
-                enrollment_data['semester']
-            ))
-            
-            if result[0]['count'] > 0:
-                print("该学生已选修此课程")
-                return False
-                
-            # 执行选课
-            insert_query = """
-                INSERT INTO enrollments (student_id, course_id, semester, status)
-                VALUES (%s, %s, %s, '已选')
-            """
+        Returns:
+            ENROLL_SUCCESS / ENROLL_DUPLICATE / ENROLL_FULL / ENROLL_NOT_FOUND /
+            ENROLL_BUSY / ENROLL_ERROR
+        """
+        key = (course_id, semester)
+        if self.admission is None:
+            return self._enroll_with_retry(student_id, course_id, semester)
             
-            result = self.db.execute_update(insert_query, (
-                enrollment_data['student_id'],
-                enrollment_data['course_id'],
-                enrollment_data['semester']
-            ))
+        try:
+            with self.admission.admit(key):
+                result = self._enroll_with_retry(student_id, course_id, semester)
+        except AdmissionRejected as e:
+            return ENROLL_FULL if str(e) == 'full' else ENROLL_BUSY
             
-            return result > 0
+        if result == ENROLL_FULL:
+            self.admission.mark_full(key)
+        return result
+        
+    def _enroll_with_retry(self, student_id: str, course_id: str, semester: str) -> str:
+        """执行选课事务，死锁或锁等待超时时重试"""
+        for attempt in range(self.ENROLL_RETRIES + 1):
+            try:
+                return self._enroll_once(student_id, course_id, semester)
+            except pymysql.OperationalError as e:
+                if e.args[0] not in _RETRYABLE_ERRORS or attempt == self.ENROLL_RETRIES:
+                    print(f"选课失败: {e}")
+                    return ENROLL_ERROR
+            except Exception as e:
+                print(f"选课失败: {e}")
+                return ENROLL_ERROR
+        return ENROLL_ERROR
+        
+    def _enroll_once(self, student_id: str, course_id: str, semester: str) -> str:
+        """
+        选课事务
+        
+        先插入选课记录（由唯一索引判重，只锁新行）并更新统计汇总，最后才带条件地占用名额，
+        这样热门课程计数行上的行锁只持有到紧接着的提交为止。
+        """
+        insert_query = """
+            INSERT INTO enrollments (student_id, course_id, semester, status)
+            VALUES (%s, %s, %s, '已选')
+        """
+        try:
+            with self.db.transaction():
+                self.db.execute_update(insert_query, (student_id, course_id, semester))
+                self.summary.student_load_changed(student_id, 1)
+                # 占用名额必须是提交前的最后一条语句
+                if not self._reserve_seat(course_id, semester):
+                    raise _CourseFull()
+        except pymysql.IntegrityError as e:
+            # 1062: 唯一索引冲突；1452: 外键约束（课程或学生不存在）
+            if e.args[0] == 1062:
+                return ENROLL_DUPLICATE
+            if e.args[0] == 1452:
+                return ENROLL_NOT_FOUND
+            raise
+        except _CourseFull:
+            return ENROLL_FULL if self._course_exists(course_id) else ENROLL_NOT_FOUND
+        self._publish_change(course_id, semester)
+        return ENROLL_SUCCESS
+        
+    def _reserve_seat(self, course_id: str, semester: str) -> bool:
+        """在计数表上带容量条件地占用一个名额，返回是否成功"""
+        query = """
+            UPDATE course_enrollment_counts n
+            JOIN courses c ON c.course_id = n.course_id
+            SET n.enrolled_count = n.enrolled_count + 1
+            WHERE n.course_id = %s AND n.semester = %s
+              AND n.enrolled_count < c.max_students
+        """
+        if self.db.execute_update(query, (course_id, semester)) > 0:
+            return True
             
-        except Exception as e:
-            print(f"选课失败: {e}")
+        # 计数行由Course.create、初始化和修复脚本建立，存在即说明已满（主键点查，不扫描选课记录）
+        if self.db.execute_query(
+                "SELECT 1 FROM course_enrollment_counts WHERE course_id = %s AND semester = %s",
+                (course_id, semester)):
             return False
             
+        # 计数行不存在时（旧数据或新学期）按现有选课记录补建后重试；
+        # 并发补建时INSERT IGNORE不做任何修改
+        self.db.execute_update("""
+            INSERT IGNORE INTO course_enrollment_counts (course_id, semester, enrolled_count)
+            SELECT %s, %s, GREATEST(COUNT(*) - 1, 0)
+            FROM enrollments
+            WHERE course_id = %s AND semester = %s
+        """, (course_id, semester, course_id, semester))
+        return self.db.execute_update(query, (course_id, semester)) > 0
+        
+    def _course_exists(self, course_id: str) -> bool:
+        """课程是否存在"""
+        result = self.db.execute_query(
+            "SELECT 1 FROM courses WHERE course_id = %s", (course_id,))
+        return bool(result)
+            
     def drop_course(self, student_id: str, course_id: str, semester: str) -> bool:
         """学生退选"""
         query = """
@@ -57,12 +207,100 @@ class Enrollment:
         """
         
         try:
-            result = self.db.execute_update(query, (student_id, course_id, semester))
+            with self.db.transaction():
+                old = self._lock_score(student_id, course_id, semester)
+                result = self.db.execute_update(query, (student_id, course_id, semester))
+                if result > 0:
+                    self.summary.student_load_changed(student_id, -1)
+                    if old and old['score'] is not None:
+                        self.summary.scores_changed(
+                            course_id, semester, [(old['score'], old['grade'], None, None)])
+                    # 最后才调整热门的计数行，使其行锁只持有到提交为止
+                    self._adjust_enrolled_count(course_id, semester, -1)
+            if result > 0:
+                self._publish_change(course_id, semester)
+            if result > 0 and self.admission:
+                self.admission.clear_full((course_id, semester))
             return result > 0
         except Exception as e:
             print(f"退选失败: {e}")
             return False
             
+    def _lock_score(self, student_id: str, course_id: str, semester: str) -> Optional[Dict[str, Any]]:
+        """锁定选课记录并读取原成绩（需在事务中调用）"""
+        result = self.db.execute_query("""
+            SELECT score, grade FROM enrollments
+            WHERE student_id = %s AND course_id = %s AND semester = %s FOR UPDATE
+        """, (student_id, course_id, semester))
+        return result[0] if result else None
+        
+    def _adjust_enrolled_count(self, course_id: str, semester: str, delta: int):
+        """调整课程选课人数计数（需在选课/退选的同一事务中调用）"""
+        query = """
+            INSERT INTO course_enrollment_counts (course_id, semester, enrolled_count)
+            VALUES (%s, %s, GREATEST(%s, 0))
+            ON DUPLICATE KEY UPDATE enrolled_count = GREATEST(enrolled_count + %s, 0)
+        """
+        self.db.execute_update(query, (course_id, semester, delta, delta))
+        
+    def reconcile_enrolled_counts(self, semester: str = None) -> List[Dict[str, Any]]:
+        """
+        校正选课人数计数：按enrollments表重新统计并修复偏差
+        
+        Args:
+            semester: 只校正指定学期，None表示全部
+            
+        Returns:
+            被修复的计数列表，每条包含course_id、semester、old_count、new_count
+        """
+        where_clause = "WHERE semester = %s" if semester else ""
+        params = (semester,) if semester else None
+        
+        actual_query = f"""
+            SELECT course_id, semester, COUNT(*) as count
+            FROM enrollments
+            {where_clause}
+            GROUP BY course_id, semester
+        """
+        counter_query = f"""
+            SELECT course_id, semester, enrolled_count
+            FROM course_enrollment_counts
+            {where_clause}
+        """
+        
+        with self.db.transaction():
+            # 先锁定计数行，再用加锁读统计选课记录：两次读取之间提交的选课/退选
+            # 要么已计入统计，要么等本事务提交后再调整计数，不会被旧的统计值覆盖
+            stored = {
+                (r['course_id'], r['semester']): r['enrolled_count']
+                for r in self.db.execute_query(counter_query + " FOR UPDATE", params)
+            }
+            actual = {
+                (r['course_id'], r['semester']): r['count']
+                for r in self.db.execute_query(actual_query + " LOCK IN SHARE MODE", params)
+            }
+            
+            repaired = []
+            for key in actual.keys() | stored.keys():
+                old_count = stored.get(key)
+                new_count = actual.get(key, 0)
+                if old_count != new_count:
+                    repaired.append({'course_id': key[0], 'semester': key[1],
+                                     'old_count': old_count, 'new_count': new_count})
+                    
+            if repaired:
+                self.db.execute_many("""
+                    INSERT INTO course_enrollment_counts (course_id, semester, enrolled_count)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE enrolled_count = VALUES(enrolled_count)
+                """, [(r['course_id'], r['semester'], r['new_count']) for r in repaired])
+                bump_version(self.db, 'enrollments')
+                
+        for repaired_semester in {r['semester'] for r in repaired}:
+            self._invalidate_catalog(repaired_semester)
+                
+        return repaired
+            
     def get_student_courses(self, student_id: str) -> List[Dict[str, Any]]:
         """获取学生选课列表"""
         # 修复：通过JOIN teachers表获取教师姓名
@@ -101,17 +339,7 @@ class Enrollment:
     def input_score(self, student_id: str, course_id: str, 
                    semester: str, score: float) -> bool:
         """录入成绩"""
-        # 计算等级
-        if score >= 90:
-            grade = '优秀'
-        elif score >= 80:
-            grade = '良好'
-        elif score >= 70:
-            grade = '中等'
-        elif score >= 60:
-            grade = '及格'
-        else:
-            grade = '不及格'
+        grade = calc_grade(score)
             
         query = """
             UPDATE enrollments 
@@ -120,13 +348,115 @@ class Enrollment:
         """
         
         try:
-            result = self.db.execute_update(query, 
-                (score, grade, student_id, course_id, semester))
+            with self.db.transaction():
+                old = self._lock_score(student_id, course_id, semester)
+                result = self.db.execute_update(query, 
+                    (score, grade, student_id, course_id, semester))
+                if result > 0:
+                    self.summary.scores_changed(
+                        course_id, semester, [(old['score'], old['grade'], score, grade)])
+                    bump_version(self.db, 'enrollments', course_id)
             return result > 0
         except Exception as e:
             print(f"录入成绩失败: {e}")
             return False
             
+    def input_scores(self, course_id: str, semester: str,
+                     scores: Sequence[Tuple[str, float]]) -> List[Dict[str, Any]]:
+        """
+        批量录入成绩（整批校验，按SCORE_BATCH_SIZE分批查询和写入，一次提交）
+        
+        Args:
+            course_id: 课程编号
+            semester: 学期
+            scores: [(学号, 成绩), ...]
+            
+        Returns:
+            与输入顺序一致的逐条结果，每条包含student_id、score、grade、
+            status（ok/invalid/duplicate/not_enrolled/failed）和message
+        """
+        results = []
+        valid = {}
+        
+        # 1. 校验分数和批内重复
+        for student_id, score in scores:
+            row = {'student_id': student_id, 'score': score, 'grade': None,
+                   'status': 'ok', 'message': ''}
+            results.append(row)
+            try:
+                score = float(score)
+            except (TypeError, ValueError):
+                row.update(status='invalid', message='成绩不是有效数字')
+                continue
+            if not 0 <= score <= 100:
+                row.update(status='invalid', message='成绩必须在0-100之间')
+            elif student_id in valid:
+                row.update(status='duplicate', message='同一学生重复录入')
+            else:
+                row.update(score=score, grade=calc_grade(score))
+                valid[student_id] = row
+                
+        if not valid:
+            return results
+            
+        try:
+            with self.db.transaction():
+                # 2. 按与写入相同的批大小确认哪些学生选了该课程，同时锁定原成绩用于调整汇总
+                query = """
+                    SELECT student_id, score, grade FROM enrollments
+                    WHERE course_id = %s AND semester = %s
+                      AND student_id IN ({placeholders})
+                    FOR UPDATE
+                """
+                enrolled = {
+                    r['student_id']: r for r in self.db.execute_query_in(
+                        query, list(valid), (course_id, semester), self.SCORE_BATCH_SIZE)
+                }
+                for student_id in list(valid):
+                    if student_id not in enrolled:
+                        valid.pop(student_id).update(
+                            status='not_enrolled', grade=None, message='该学生未选修此课程')
+                            
+                # 3. 用 UPDATE ... CASE 一次写入一批
+                rows = list(valid.values())
+                for i in range(0, len(rows), self.SCORE_BATCH_SIZE):
+                    self._update_score_batch(course_id, semester, rows[i:i + self.SCORE_BATCH_SIZE])
+                if rows:
+                    self.summary.scores_changed(course_id, semester, [
+                        (enrolled[r['student_id']]['score'], enrolled[r['student_id']]['grade'],
+                         r['score'], r['grade'])
+                        for r in rows
+                    ])
+                    bump_version(self.db, 'enrollments', course_id)
+        except Exception as e:
+            print(f"批量录入成绩失败: {e}")
+            for row in valid.values():
+                row.update(status='failed', message=str(e))
+                
+        return results
+        
+    def _update_score_batch(self, course_id: str, semester: str, rows: List[Dict[str, Any]]):
+        """用一条UPDATE ... CASE语句写入一批成绩"""
+        if not rows:
+            return
+        case_clause = ' '.join(['WHEN %s THEN %s'] * len(rows))
+        placeholders = ', '.join(['%s'] * len(rows))
+        query = f"""
+            UPDATE enrollments
+            SET score = CASE student_id {case_clause} END,
+                grade = CASE student_id {case_clause} END
+            WHERE course_id = %s AND semester = %s
+              AND student_id IN ({placeholders})
+        """
+        params = []
+        for r in rows:
+            params.extend((r['student_id'], r['score']))
+        for r in rows:
+            params.extend((r['student_id'], r['grade']))
+        params.extend((course_id, semester))
+        params.extend(r['student_id'] for r in rows)
+        self.db.execute_update(query, tuple(params))
+            
     def get_student_scores(self, student_id: str) -> List[Dict[str, Any]]:
         """获取学生成绩"""
         query = """
@@ -148,41 +478,42 @@ class Enrollment:
         """获取课程成绩分布"""
         stats = {}
         
+        # 基本统计
+        basic_query = """
+            SELECT 
+                COUNT(*) as total,
+                AVG(score) as avg_score,
+                MAX(score) as max_score,
+                MIN(score) as min_score
+            FROM enrollments
+            WHERE course_id = %s AND semester = %s AND score IS NOT NULL
+        """
+        
+        # 分数段分布
+        range_query = """
+            SELECT 
+                CASE 
+                    WHEN score >= 90 THEN '90-100'
+                    WHEN score >= 80 THEN '80-89'
+                    WHEN score >= 70 THEN '70-79'
+                    WHEN score >= 60 THEN '60-69'
+                    ELSE '0-59'
+                END as score_range,
+                COUNT(*) as count
+            FROM enrollments
+            WHERE course_id = %s AND semester = %s AND score IS NOT NULL
+            GROUP BY score_range
+            ORDER BY score_range DESC
+        """
+        
         try:
-            # 基本统计
-            query = """
-                SELECT 
-                    COUNT(*) as total,
-                    AVG(score) as avg_score,
-                    MAX(score) as max_score,
-                    MIN(score) as min_score
-                FROM enrollments
-                WHERE course_id = %s AND semester = %s AND score IS NOT NULL
-            """
-            
-            result = self.db.execute_query(query, (course_id, semester))
-            if result:
-                stats.update(result[0])
-                
-            # 分数段分布
-            query = """
-                SELECT 
-                    CASE 
-                        WHEN score >= 90 THEN '90-100'
-                        WHEN score >= 80 THEN '80-89'
-                        WHEN score >= 70 THEN '70-79'
-                        WHEN score >= 60 THEN '60-69'
-                        ELSE '0-59'
-                    END as score_range,
-                    COUNT(*) as count
-                FROM enrollments
-                WHERE course_id = %s AND semester = %s AND score IS NOT NULL
-                GROUP BY score_range
-                ORDER BY score_range DESC
-            """
-            
-            result = self.db.execute_query(query, (course_id, semester))
-            stats['distribution'] = {row['score_range']: row['count'] for row in result}
+            basic, ranges = self.db.execute_batch([
+                (basic_query, (course_id, semester)),
+                (range_query, (course_id, semester)),
+            ])
+            if basic:
+                stats.update(basic[0])
+            stats['distribution'] = {row['score_range']: row['count'] for row in ranges}
             
         except Exception as e:
             print(f"获取成绩分布失败: {e}")
@@ -190,42 +521,39 @@ class Enrollment:
         return stats
         
     def get_statistics(self) -> Dict[str, Any]:
-        """获取选课统计信息"""
+        """
+        获取选课统计信息
+        
+        选课人数读取计数表course_enrollment_counts，学生选课数分布读取统计汇总表，
+        耗时与课程数、分组数成正比，与选课记录数无关。
+        """
         stats = {}
         
+        # 总选课记录数
+        total_query = "SELECT COALESCE(SUM(enrolled_count), 0) as total FROM course_enrollment_counts"
+        
+        # 热门课程
+        popular_query = """
+            SELECT c.course_name, SUM(n.enrolled_count) as count
+            FROM course_enrollment_counts n
+            JOIN courses c ON n.course_id = c.course_id
+            GROUP BY c.course_id, c.course_name
+            HAVING SUM(n.enrolled_count) > 0
+            ORDER BY count DESC
+            LIMIT 10
+        """
+        
         try:
-            # 总选课记录数
-            query = "SELECT COUNT(*) as total FROM enrollments"
-            result = self.db.execute_query(query)
-            stats['total_enrollments'] = result[0]['total'] if result else 0
-            
-            # 热门课程
-            query = """
-                SELECT c.course_name, COUNT(*) as count
-                FROM enrollments e
-                JOIN courses c ON e.course_id = c.course_id
-                GROUP BY c.course_id, c.course_name
-                ORDER BY count DESC
-                LIMIT 10
-            """
-            result = self.db.execute_query(query)
-            stats['popular_courses'] = result
-            
-            # 学生选课数分布
-            query = """
-                SELECT course_count, COUNT(*) as student_count
-                FROM (
-                    SELECT student_id, COUNT(*) as course_count
-                    FROM enrollments
-                    GROUP BY student_id
-                ) t
-                GROUP BY course_count
-                ORDER BY course_count
-            """
-            result = self.db.execute_query(query)
-            stats['student_course_count'] = {
-                row['course_count']: row['student_count'] for row in result
-            }
+            total, popular, load = self.db.execute_batch([
+                (total_query, None),
+                (popular_query, None),
+                self.summary.groups_query(STAT_STUDENT_LOAD),   # 学生选课数分布
+            ])
+            stats['total_enrollments'] = int(total[0]['total']) if total else 0
+            stats['popular_courses'] = popular
+            stats['student_course_count'] = dict(sorted(
+                (int(row['k1']), int(row['count'])) for row in load
+            ))
             
         except Exception as e:
             print(f"获取统计信息失败: {e}")
@@ -233,52 +561,51 @@ class Enrollment:
         return stats
         
     def get_score_statistics(self, semester: str = None) -> Dict[str, Any]:
-        """获取成绩统计"""
+        """
+        获取成绩统计
+        
+        成绩数、平均分和等级分布读取统计汇总表中各课程的分组；
+        不及格学生只在汇总中有不及格记录的课程里查找。
+        """
         stats = {}
         
+        # 不及格学生
+        where_clause = "AND k2 = %s" if semester else ""
+        failed_query = f"""
+            SELECT DISTINCT s.student_id, s.name
+            FROM (
+                SELECT k1 AS course_id, k2 AS semester
+                FROM statistics_summary
+                WHERE stat = %s {where_clause}
+                GROUP BY k1, k2
+                HAVING SUM(item_count) > 0
+            ) f
+            JOIN enrollments e ON e.course_id = f.course_id AND e.semester = f.semester
+            JOIN students s ON e.student_id = s.student_id
+            WHERE e.score < %s
+        """
+        failed_params = (STAT_FAILING, semester, PASS_SCORE) if semester else (STAT_FAILING, PASS_SCORE)
+        
         try:
-            # 构建查询条件
-            where_clause = "WHERE score IS NOT NULL"
-            params = []
-            
-            if semester:
-                where_clause += " AND semester = %s"
-                params.append(semester)
-                
-            # 总体统计
-            query = f"""
-                SELECT 
-                    COUNT(*) as total_scores,
-                    AVG(score) as overall_avg
-                FROM enrollments
-                {where_clause}
-            """
+            groups, failed = self.db.execute_batch([
+                self.summary.groups_query(STAT_SCORES, semester),
+                (failed_query, failed_params),
+            ])
             
-            result = self.db.execute_query(query, tuple(params) if params else None)
-            if result:
-                stats.update(result[0])
+            # 总体统计和等级分布
+            total_scores, score_sum = 0, 0
+            grade_distribution = {}
+            for row in groups:
+                count = int(row['count'])
+                total_scores += count
+                score_sum += row['total']
+                grade = row['k3'] or None
+                grade_distribution[grade] = grade_distribution.get(grade, 0) + count
                 
-            # 等级分布
-            query = f"""
-                SELECT grade, COUNT(*) as count
-                FROM enrollments
-                {where_clause}
-                GROUP BY grade
-            """
-            
-            result = self.db.execute_query(query, tuple(params) if params else None)
-            stats['grade_distribution'] = {row['grade']: row['count'] for row in result}
-            
-            # 不及格学生
-            query = f"""
-                SELECT DISTINCT s.student_id, s.name
-                FROM enrollments e
-                JOIN students s ON e.student_id = s.student_id
-                {where_clause} AND e.score < 60
-            """
-            
-            result = self.db.execute_query(query, tuple(params) if params else None)
-            stats['failed_students'] = result
+            stats['total_scores'] = total_scores
+            stats['overall_avg'] = score_sum / total_scores if total_scores else None
+            stats['grade_distribution'] = grade_distribution
+            stats['failed_students'] = failed
             
         except Exception as e:
             print(f"获取成绩统计失败: {e}")
@@ -0,0 +1,218 @@
+"""
+search_index.py
+学生搜索倒排索引 - 姓名、专业按单字和二元组切分，学号走主键前缀查询
+"""
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from utils.db_connection import DatabaseConnection
+
+# 各字段命中时的权重（姓名优先于专业）
+FIELD_WEIGHTS = {'name': 3, 'major': 1}
+
+# 可以按学号前缀查询的关键词
+_STUDENT_ID_RE = re.compile(r'^[0-9A-Za-z]+$')
+
+
+def _normalize(text: Optional[str]) -> str:
+    """去掉空白并转为小写"""
+    return re.sub(r'\s+', '', text or '').lower()
+
+
+def tokenize(text: Optional[str]) -> set:
+    """索引词元：全部单字和相邻二元组（中文姓名、专业没有分词边界）"""
+    text = _normalize(text)
+    tokens = set(text)
+    tokens.update(text[i:i + 2] for i in range(len(text) - 1))
+    return tokens
+
+
+def query_tokens(keyword: str) -> set:
+    """查询词元：单字关键词用单字，否则用全部二元组（须全部命中）"""
+    keyword = _normalize(keyword)
+    if len(keyword) <= 1:
+        return set(keyword)
+    return {keyword[i:i + 2] for i in range(len(keyword) - 1)}
+
+
+def index_rows(student_id: str, name: Optional[str], major: Optional[str]) -> List[Tuple[str, str, str]]:
+    """一个学生的全部索引行 (token, student_id, field)"""
+    rows = []
+    for field, text in (('name', name), ('major', major)):
+        rows.extend((token, student_id, field) for token in sorted(tokenize(text)))
+    return rows
+
+
+def relevance(student: Dict[str, Any], keyword: str) -> int:
+    """
+    计算相关度（0表示不匹配）
+
+    学号完全匹配 > 学号前缀 > 姓名完全匹配 > 姓名前缀 > 姓名包含 > 专业匹配
+    """
+    keyword = _normalize(keyword)
+    student_id = (student.get('student_id') or '').lower()
+    name = _normalize(student.get('name'))
+    major = _normalize(student.get('major'))
+
+    if student_id == keyword:
+        return 100
+    if student_id.startswith(keyword):
+        return 80
+    if name == keyword:
+        return 60
+    if name.startswith(keyword):
+        return 50
+    if keyword in name:
+        return 40
+    if major == keyword:
+        return 20
+    if keyword in major:
+        return 10
+    return 0
+
+
+class StudentSearchIndex:
+    """学生搜索索引表student_search_tokens的维护与查询"""
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS student_search_tokens (
+            token VARCHAR(8) NOT NULL COMMENT '词元（单字或二元组）',
+            student_id VARCHAR(20) NOT NULL COMMENT '学号',
+            field VARCHAR(10) NOT NULL COMMENT '来源字段',
+            PRIMARY KEY (token, field, student_id),
+            INDEX idx_student (student_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='学生搜索倒排索引'
+    """
+
+    INSERT_SQL = "INSERT IGNORE INTO student_search_tokens (token, student_id, field) VALUES (%s, %s, %s)"
+
+    # 重建索引时每批处理的学生数
+    REBUILD_BATCH = 1000
+
+    def __init__(self, db_connection: DatabaseConnection):
+        """初始化搜索索引"""
+        self.db = db_connection
+
+    def index(self, student_id: str, name: Optional[str], major: Optional[str]):
+        """写入一个学生的索引（调用方负责事务）"""
+        rows = index_rows(student_id, name, major)
+        if rows:
+            self.db.execute_many(self.INSERT_SQL, rows)
+
+    def remove(self, student_id: str):
+        """删除一个学生的索引（调用方负责事务）"""
+        self.db.execute_update("DELETE FROM student_search_tokens WHERE student_id = %s", (student_id,))
+
+    def index_many(self, students: List[Tuple[str, Optional[str], Optional[str]]]):
+        """写入一批学生的索引 [(学号, 姓名, 专业)]（调用方负责事务）"""
+        rows = []
+        for student_id, name, major in students:
+            rows.extend(index_rows(student_id, name, major))
+        if rows:
+            self.db.execute_many(self.INSERT_SQL, rows)
+
+    def remove_many(self, student_ids: List[str]):
+        """删除一批学生的索引（调用方负责事务）"""
+        if student_ids:
+            placeholders = ', '.join(['%s'] * len(student_ids))
+            self.db.execute_update(
+                f"DELETE FROM student_search_tokens WHERE student_id IN ({placeholders})",
+                tuple(student_ids))
+
+    def reindex(self, student_id: str):
+        """按学生表当前数据重建一个学生的索引（调用方负责事务）"""
+        self.remove(student_id)
+        result = self.db.execute_query(
+            "SELECT name, major FROM students WHERE student_id = %s", (student_id,))
+        if result:
+            self.index(student_id, result[0]['name'], result[0]['major'])
+
+    def match_subquery(self, keyword: str) -> Tuple[Optional[str], list]:
+        """
+        索引匹配子查询：返回命中关键词的学号（所有词元须在同一字段中命中）
+
+        Returns:
+            (子查询SQL, 参数)，关键词没有可用词元时SQL为None
+        """
+        tokens = sorted(query_tokens(keyword))
+        if not tokens:
+            return None, []
+        placeholders = ', '.join(['%s'] * len(tokens))
+        query = f"""
+            SELECT student_id FROM student_search_tokens
+            WHERE token IN ({placeholders})
+            GROUP BY student_id, field
+            HAVING COUNT(DISTINCT token) = %s
+        """
+        return query, [*tokens, len(tokens)]
+
+    def candidates(self, keyword: str, limit: int) -> List[str]:
+        """按索引权重取候选学号（姓名命中优先）"""
+        tokens = sorted(query_tokens(keyword))
+        if not tokens:
+            return []
+        placeholders = ', '.join(['%s'] * len(tokens))
+        weight_cases = ' '.join(f"WHEN '{field}' THEN {weight}" for field, weight in FIELD_WEIGHTS.items())
+        query = f"""
+            SELECT student_id, SUM(weight) AS weight
+            FROM (
+                SELECT student_id, CASE field {weight_cases} ELSE 1 END AS weight
+                FROM student_search_tokens
+                WHERE token IN ({placeholders})
+                GROUP BY student_id, field
+                HAVING COUNT(DISTINCT token) = %s
+            ) m
+            GROUP BY student_id
+            ORDER BY weight DESC, student_id
+            LIMIT %s
+        """
+        rows = self.db.execute_query(query, (*tokens, len(tokens), limit))
+        return [r['student_id'] for r in rows]
+
+    @staticmethod
+    def can_prefix_match(keyword: str) -> bool:
+        """关键词是否可能是学号（前缀）"""
+        return bool(_STUDENT_ID_RE.match(keyword or ''))
+
+    def rebuild(self) -> int:
+        """
+        全量重建索引（批量导入学生后使用）
+
+        新索引写入影子表，完成后用RENAME TABLE原子地替换正式表，重建期间搜索仍使用旧索引。
+        重建期间新增或修改的学生（updated_at不早于开始时间）在替换后补建索引；
+        期间删除的学生留下的词元不影响结果（搜索结果总是再与students表关联）。
+
+        Returns:
+            索引的学生数
+        """
+        self.db.execute_update(self.CREATE_TABLE)
+        self.db.execute_update("DROP TABLE IF EXISTS student_search_tokens_new")
+        self.db.execute_update("CREATE TABLE student_search_tokens_new LIKE student_search_tokens")
+        started = self.db.execute_query("SELECT NOW() AS started")[0]['started']
+
+        insert_new = self.INSERT_SQL.replace('student_search_tokens', 'student_search_tokens_new')
+        total = 0
+        for batch in self.db.iter_query("SELECT student_id, name, major FROM students",
+                                        batch_size=self.REBUILD_BATCH, batches=True):
+            rows = []
+            for s in batch:
+                rows.extend(index_rows(s['student_id'], s['name'], s['major']))
+            with self.db.transaction():
+                if rows:
+                    self.db.execute_many(insert_new, rows)
+            total += len(batch)
+
+        self.db.execute_update("DROP TABLE IF EXISTS student_search_tokens_old")
+        self.db.execute_update(
+            "RENAME TABLE student_search_tokens TO student_search_tokens_old, "
+            "student_search_tokens_new TO student_search_tokens")
+        self.db.execute_update("DROP TABLE student_search_tokens_old")
+
+        # 补建重建期间变化的学生
+        changed = self.db.execute_query(
+            "SELECT student_id, name, major FROM students WHERE updated_at >= %s", (started,))
+        for i in range(0, len(changed), self.REBUILD_BATCH):
+            chunk = changed[i:i + self.REBUILD_BATCH]
+            with self.db.transaction():
+                self.remove_many([s['student_id'] for s in chunk])
+                self.index_many([(s['student_id'], s['name'], s['major']) for s in chunk])
+        return total
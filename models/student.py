@@ -2,15 +2,85 @@
 student.py
 学生数据模型
 """
-from typing import Dict, Any, List, Optional
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
 from utils.db_connection import DatabaseConnection
+from utils.cache import EntityCache, bump_version
+from .search_index import StudentSearchIndex, relevance
+from .summary import StatisticsSummary, STAT_STUDENTS
+from .student_import import (IMPORT_COLUMNS, read_rows, validate_chunk, write_error_report,
+                             default_report_path)
+
+# 参与统计汇总的字段
+_STAT_FIELDS = {'status', 'major', 'gender'}
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """按size切块"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _escape_like(value: str) -> str:
+    """转义LIKE中的通配符"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 
 class Student:
     """学生模型类"""
     
-    def __init__(self, db_connection: DatabaseConnection):
-        """初始化学生模型"""
+    # 搜索默认返回的最大条数
+    SEARCH_LIMIT = 100
+    
+    # 缓存键的实体类型
+    CACHE_NAMESPACE = 'student'
+    
+    # 批量导入：每批写入并提交的行数、每个校验任务的行数
+    IMPORT_BATCH_SIZE = 1000
+    VALIDATE_CHUNK_SIZE = 500
+    
+    # 批量导入的新学生缺少的列（与create的默认值一致）
+    _IMPORT_DEFAULTS = {'gender': '男', 'age': 18, 'major': '', 'class_name': '',
+                        'phone': '', 'email': '', 'status': '在读'}
+    
+    # 批量导入：学号已存在时只更新文件中给出的列（未给出的列参数为NULL，保留原值）
+    _UPSERT_SQL = """
+        INSERT INTO students ({columns}) VALUES ({placeholders})
+        ON DUPLICATE KEY UPDATE name = VALUES(name), {updates}
+    """.format(
+        columns=', '.join(IMPORT_COLUMNS),
+        placeholders=', '.join(['%s'] * len(IMPORT_COLUMNS)),
+        updates=', '.join(f"{c} = COALESCE(VALUES({c}), {c})"
+                          for c in IMPORT_COLUMNS if c not in ('student_id', 'name')),
+    )
+    
+    def __init__(self, db_connection: DatabaseConnection, cache: Optional[EntityCache] = None):
+        """
+        初始化学生模型
+        
+        Args:
+            db_connection: 数据库连接
+            cache: 实体缓存（可与其他模型共用），为None时不缓存
+        """
         self.db = db_connection
+        self.cache = cache
+        if cache:
+            cache.depends_on(self.CACHE_NAMESPACE, 'students')
+        self.search_index = StudentSearchIndex(db_connection)
+        self.summary = StatisticsSummary(db_connection)
+        
+    def _invalidate(self, *student_ids: str):
+        """写操作后使缓存失效"""
+        if self.cache:
+            for student_id in student_ids:
+                self.cache.invalidate((self.CACHE_NAMESPACE, student_id))
         
     def create(self, student_data: Dict[str, Any]) -> bool:
         """创建学生"""
@@ -33,22 +103,195 @@ class Student:
                 student_data.get('enrollment_date'),
                 student_data.get('status', '在读')
             )
-            result = self.db.execute_update(query, params)
+            # 学生和搜索索引一次提交
+            with self.db.transaction():
+                result = self.db.execute_update(query, params)
+                if result > 0:
+                    self.search_index.index(params[0], params[1], params[4])
+                    self.summary.student_changed(
+                        None, {'status': params[9], 'major': params[4], 'gender': params[2]})
+                    bump_version(self.db, 'students', params[0])
+            self._invalidate(params[0])
             return result > 0
         except Exception as e:
             print(f"创建学生失败: {e}")
             return False
             
-    def get_by_id(self, student_id: str) -> Optional[Dict[str, Any]]:
-        """根据学号获取学生"""
-        query = "SELECT * FROM students WHERE student_id = %s"
+    def bulk_import(self, source, file_format: str = None, error_report: str = None,
+                    batch_size: int = None, workers: int = None,
+                    progress: bool = True) -> Dict[str, Any]:
+        """
+        从CSV/XLSX批量导入学生（学号已存在时更新）
+
+        逐行流式读取，按块在进程池中校验（学号格式、性别/状态取值、日期、文件内重复学号），
+        合格的行每batch_size条用一条executemany写入并单独提交；某批写入失败只回滚该批。
+        搜索索引、统计汇总和缓存版本与逐条创建时一样在同一事务中维护。
+
+        Args:
+            source: 文件路径或文件对象；表头为students列名或中文列名（学号、姓名…）
+            file_format: csv/xlsx，默认按扩展名判断
+            error_report: 错误报告CSV路径，默认为与源文件同目录的<文件名>.errors.csv
+            batch_size: 每批写入并提交的行数，默认IMPORT_BATCH_SIZE
+            workers: 校验进程数，默认CPU数；0或1时在当前进程中校验
+            progress: 是否打印进度
+
+        Returns:
+            {'total', 'inserted', 'updated', 'failed', 'error_report'}
+        """
+        batch_size = batch_size or self.IMPORT_BATCH_SIZE
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        summary = {'total': 0, 'inserted': 0, 'updated': 0, 'failed': 0, 'error_report': None}
+        errors = []
+        seen = {}       # 学号 -> 首次出现的行号
+        batch = []
+
+        def consume(results):
+            for line_no, row, row_errors, raw_id in results:
+                summary['total'] += 1
+                if row is not None and row['student_id'] in seen:
+                    row_errors = [('student_id', f"与第{seen[row['student_id']]}行学号重复")]
+                    row = None
+                if row is None:
+                    errors.extend({'line': line_no, 'student_id': raw_id, 'field': field, 'message': message}
+                                  for field, message in row_errors)
+                    summary['failed'] += 1
+                    continue
+                seen[row['student_id']] = line_no
+                batch.append((line_no, row))
+                if len(batch) >= batch_size:
+                    flush()
+
+        def flush():
+            rows = batch[:]
+            batch.clear()
+            try:
+                inserted, updated = self._upsert_batch([row for _, row in rows])
+                summary['inserted'] += inserted
+                summary['updated'] += updated
+            except Exception as e:
+                summary['failed'] += len(rows)
+                errors.extend({'line': line_no, 'student_id': row['student_id'], 'field': '',
+                               'message': f"写入失败，该批已回滚: {e}"} for line_no, row in rows)
+            if progress:
+                print(f"已处理 {summary['total']} 行：新增 {summary['inserted']}，"
+                      f"更新 {summary['updated']}，失败 {summary['failed']}")
+
         try:
+            chunks = _chunked(read_rows(source, file_format), self.VALIDATE_CHUNK_SIZE)
+            if workers <= 1:
+                for chunk in chunks:
+                    consume(validate_chunk(chunk))
+            else:
+                # 按提交顺序取结果，保证行号顺序和重复判断稳定；在途块数有上限
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    pending = deque()
+                    for chunk in chunks:
+                        pending.append(executor.submit(validate_chunk, chunk))
+                        if len(pending) >= workers * 2:
+                            consume(pending.popleft().result())
+                    while pending:
+                        consume(pending.popleft().result())
+            if batch:
+                flush()
+        except Exception as e:
+            print(f"批量导入学生失败: {e}")
+            errors.append({'line': '', 'student_id': '', 'field': '', 'message': f"导入中止: {e}"})
+
+        if errors:
+            errors.sort(key=lambda e: (e['line'] == '', e['line'] or 0))
+            report = error_report or default_report_path(source)
+            if report:
+                try:
+                    write_error_report(report, errors)
+                    summary['error_report'] = report
+                except OSError as e:
+                    print(f"写入错误报告失败: {e}")
+            if progress:
+                print(f"共 {summary['failed']} 行未导入" +
+                      (f"，详见 {summary['error_report']}" if summary['error_report'] else ""))
+        return summary
+
+    def _upsert_batch(self, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        在一个事务中写入一批已校验的学生
+
+        已存在的学生只更新文件中给出的列；新学生缺少的列使用与create相同的默认值。
+
+        Returns:
+            (新增数, 更新数)
+        """
+        ids = [row['student_id'] for row in rows]
+        with self.db.transaction():
+            existing = {r['student_id']: r for r in self.db.execute_query_in(
+                "SELECT student_id, name, gender, major, status FROM students "
+                "WHERE student_id IN ({placeholders}) FOR UPDATE", ids)}
+
+            params, changes, index = [], [], []
+            for row in rows:
+                old = existing.get(row['student_id'])
+                if old is None:
+                    row = {**self._IMPORT_DEFAULTS, **row}
+                params.append(tuple(row.get(c) for c in IMPORT_COLUMNS))
+                new = {**(old or {}), **row}
+                changes.append((old, new))
+                index.append((new['student_id'], new['name'], new.get('major')))
+
+            self.db.execute_many(self._UPSERT_SQL, params)
+            self.summary.students_changed(changes)
+            self.search_index.remove_many(list(existing))
+            self.search_index.index_many(index)
+            bump_version(self.db, 'students')
+        self._invalidate(*ids)
+        return len(rows) - len(existing), len(existing)
+
+    def get_by_id(self, student_id: str, bypass_cache: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        根据学号获取学生
+        
+        Args:
+            student_id: 学号
+            bypass_cache: 为True时直接查库（结果仍会刷新缓存）
+        """
+        query = "SELECT * FROM students WHERE student_id = %s"
+        
+        def load():
             results = self.db.execute_query(query, (student_id,))
             return results[0] if results else None
+            
+        try:
+            if self.cache is None:
+                return load()
+            return self.cache.get_or_load((self.CACHE_NAMESPACE, student_id), load, bypass_cache)
         except Exception as e:
             print(f"查询学生失败: {e}")
             return None
             
+    def get_many(self, student_ids: Iterable[str], bypass_cache: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取学生（IN列表分批查询，命中缓存的不再查库）
+        
+        Args:
+            student_ids: 学号列表
+            bypass_cache: 为True时全部查库
+            
+        Returns:
+            按传入顺序排列的{学号: 学生}，不存在的学号不出现在结果中
+        """
+        query = "SELECT * FROM students WHERE student_id IN ({placeholders})"
+        
+        def load(ids):
+            return {r['student_id']: r for r in self.db.execute_query_in(query, ids)}
+            
+        try:
+            if self.cache is None:
+                ids = list(dict.fromkeys(student_ids))
+                found = load(ids)
+                return {i: found[i] for i in ids if i in found}
+            return self.cache.get_many_or_load(self.CACHE_NAMESPACE, student_ids, load, bypass_cache)
+        except Exception as e:
+            print(f"批量查询学生失败: {e}")
+            return {}
+            
     def get_all(self) -> List[Dict[str, Any]]:
         """获取所有学生"""
         query = "SELECT * FROM students ORDER BY student_id"
@@ -58,6 +301,30 @@ class Student:
             print(f"查询所有学生失败: {e}")
             return []
             
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """流式获取所有学生（适用于大数据量）"""
+        query = "SELECT * FROM students ORDER BY student_id"
+        try:
+            yield from self.db.iter_query(query, batch_size=batch_size)
+        except Exception as e:
+            print(f"查询所有学生失败: {e}")
+            
+    def iter_filtered(self, filters: Dict[str, Any], batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        按筛选条件流式获取全部匹配的学生（按学号键集分页，不受SEARCH_LIMIT限制）
+        
+        Args:
+            filters: 筛选条件（keyword/major/class_name/status）
+            batch_size: 每页查询的条数
+        """
+        after_id = None
+        while True:
+            rows = self.page(after_id, batch_size, filters)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1]['student_id']
+            
     def update(self, student_id: str, update_data: Dict[str, Any]) -> bool:
         """更新学生信息"""
         if not update_data:
@@ -80,7 +347,20 @@ class Student:
         """
         
         try:
-            result = self.db.execute_update(query, tuple(params))
+            with self.db.transaction():
+                # 统计维度变化时先锁定原值，用于调整汇总
+                old = None
+                if _STAT_FIELDS & update_data.keys():
+                    old = self._lock_for_summary(student_id)
+                result = self.db.execute_update(query, tuple(params))
+                if result > 0 and {'student_id', 'name', 'major'} & update_data.keys():
+                    self.search_index.remove(student_id)
+                    self.search_index.reindex(update_data.get('student_id', student_id))
+                if result > 0 and old:
+                    self.summary.student_changed(old, {**old, **update_data})
+                if result > 0:
+                    bump_version(self.db, 'students', student_id)
+            self._invalidate(student_id, update_data.get('student_id', student_id))
             return result > 0
         except Exception as e:
             print(f"更新学生失败: {e}")
@@ -90,77 +370,176 @@ class Student:
         """删除学生"""
         query = "DELETE FROM students WHERE student_id = %s"
         try:
-            result = self.db.execute_update(query, (student_id,))
+            with self.db.transaction():
+                old = self._lock_for_summary(student_id)
+                if old:
+                    # 先扣减汇总，再显式删除选课记录（db_init建的表没有外键级联）
+                    self.summary.student_removed(old)
+                    self.db.execute_update("DELETE FROM enrollments WHERE student_id = %s", (student_id,))
+                result = self.db.execute_update(query, (student_id,))
+                if result > 0:
+                    self.search_index.remove(student_id)
+                    bump_version(self.db, 'students', student_id)
+                    bump_version(self.db, 'enrollments', student_id)
+            self._invalidate(student_id)
             return result > 0
         except Exception as e:
             print(f"删除学生失败: {e}")
             return False
             
-    def search(self, keyword: str = None, major: str = None, 
-               class_name: str = None) -> List[Dict[str, Any]]:
-        """搜索学生"""
-        query = "SELECT * FROM students WHERE 1=1"
+    def _lock_for_summary(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """锁定并读取学生的统计维度（需在事务中调用）"""
+        result = self.db.execute_query(
+            "SELECT student_id, status, major, gender FROM students WHERE student_id = %s FOR UPDATE",
+            (student_id,))
+        return result[0] if result else None
+        
+    def _build_filters(self, filters: Dict[str, Any]) -> Tuple[List[str], list]:
+        """构建学生筛选条件（keyword/major/class_name/status）"""
+        clauses = []
         params = []
         
-        if keyword:
-            query += " AND (student_id LIKE %s OR name LIKE %s OR major LIKE %s)"
-            keyword_pattern = f"%{keyword}%"
-            params.extend([keyword_pattern, keyword_pattern, keyword_pattern])
+        if filters.get('keyword'):
+            # 学号前缀走主键范围扫描，姓名/专业走倒排索引
+            keyword = filters['keyword'].strip()
+            conditions = ["student_id LIKE %s"]
+            params.append(f"{_escape_like(keyword)}%")
+            match_query, match_params = self.search_index.match_subquery(keyword)
+            if match_query:
+                conditions.append(f"student_id IN ({match_query})")
+                params.extend(match_params)
+            clauses.append(f"({' OR '.join(conditions)})")
             
-        if major:
-            query += " AND major LIKE %s"
-            params.append(f"%{major}%")
+        if filters.get('major'):
+            clauses.append("major LIKE %s")
+            params.append(f"%{filters['major']}%")
             
-        if class_name:
-            query += " AND class_name = %s"
-            params.append(class_name)
+        if filters.get('class_name'):
+            clauses.append("class_name = %s")
+            params.append(filters['class_name'])
             
-        query += " ORDER BY student_id"
+        if filters.get('status'):
+            clauses.append("status = %s")
+            params.append(filters['status'])
+            
+        return clauses, params
+            
+    def search(self, keyword: str = None, major: str = None, 
+               class_name: str = None, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        搜索学生
+        
+        有关键词时通过搜索索引查找（学号前缀、姓名/专业中的片段），按相关度排序；
+        只按专业、班级筛选时按学号排序。
+        
+        Args:
+            keyword: 学号、姓名或专业关键词
+            major: 专业（模糊匹配）
+            class_name: 班级
+            limit: 最多返回条数，默认SEARCH_LIMIT
+        """
+        limit = limit or self.SEARCH_LIMIT
+        keyword = (keyword or '').strip()
+        clauses, params = self._build_filters({'major': major, 'class_name': class_name})
         
         try:
-            return self.db.execute_query(query, tuple(params) if params else None)
+            if not keyword:
+                query = "SELECT * FROM students"
+                if clauses:
+                    query += " WHERE " + " AND ".join(clauses)
+                query += " ORDER BY student_id LIMIT %s"
+                return self.db.execute_query(query, (*params, limit))
+                
+            found = {}
+            # 姓名、专业命中的候选（多取一些，二元组匹配可能有误命中）
+            candidate_ids = self.search_index.candidates(keyword, limit * 2)
+            if candidate_ids:
+                placeholders = ', '.join(['%s'] * len(candidate_ids))
+                query = f"SELECT * FROM students WHERE student_id IN ({placeholders})"
+                if clauses:
+                    query += " AND " + " AND ".join(clauses)
+                for row in self.db.execute_query(query, (*candidate_ids, *params)):
+                    found[row['student_id']] = row
+                    
+            # 学号前缀
+            if self.search_index.can_prefix_match(keyword):
+                query = "SELECT * FROM students WHERE student_id LIKE %s"
+                if clauses:
+                    query += " AND " + " AND ".join(clauses)
+                query += " ORDER BY student_id LIMIT %s"
+                for row in self.db.execute_query(query, (f"{_escape_like(keyword)}%", *params, limit)):
+                    found[row['student_id']] = row
+                    
+            ranked = [(relevance(row, keyword), row) for row in found.values()]
+            ranked = [item for item in ranked if item[0] > 0]
+            ranked.sort(key=lambda item: (-item[0], item[1]['student_id']))
+            return [row for _, row in ranked[:limit]]
         except Exception as e:
             print(f"搜索学生失败: {e}")
             return []
             
+    def page(self, after_id: str = None, limit: int = 20, filters: Dict[str, Any] = None,
+             before_id: str = None) -> List[Dict[str, Any]]:
+        """
+        按学号分页查询（键集分页，不使用OFFSET，任何一页的代价只与limit有关）
+        
+        Args:
+            after_id: 返回学号大于after_id的一页，None表示第一页
+            limit: 每页条数
+            filters: 筛选条件（keyword/major/class_name/status）
+            before_id: 返回学号小于before_id的一页（上一页，优先于after_id）
+            
+        Returns:
+            按学号升序排列的学生列表
+        """
+        clauses, params = self._build_filters(filters or {})
+        if before_id is not None:
+            clauses.append("student_id < %s")
+            params.append(before_id)
+            order = "DESC"
+        else:
+            if after_id is not None:
+                clauses.append("student_id > %s")
+                params.append(after_id)
+            order = "ASC"
+            
+        query = "SELECT * FROM students"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY student_id {order} LIMIT %s"
+        params.append(limit)
+        
+        try:
+            rows = self.db.execute_query(query, tuple(params))
+            if before_id is not None:
+                rows = list(reversed(rows))
+            return rows
+        except Exception as e:
+            print(f"分页查询学生失败: {e}")
+            return []
+            
     def get_statistics(self) -> Dict[str, Any]:
-        """获取学生统计信息"""
+        """
+        获取学生统计信息
+        
+        读取汇总表中按(状态, 专业, 性别)维护的分组计数，各维度的计数在分组上汇总，
+        耗时只与取值组合数有关，与学生人数无关。
+        """
         stats = {}
         
         try:
-            # 总人数
-            query = "SELECT COUNT(*) as total FROM students"
-            result = self.db.execute_query(query)
-            stats['total_students'] = result[0]['total'] if result else 0
-            
-            # 按状态统计
-            query = """
-                SELECT status, COUNT(*) as count 
-                FROM students 
-                GROUP BY status
-            """
-            result = self.db.execute_query(query)
-            stats['by_status'] = {row['status']: row['count'] for row in result}
-            
-            # 按专业统计
-            query = """
-                SELECT major, COUNT(*) as count 
-                FROM students 
-                WHERE major IS NOT NULL AND major != ''
-                GROUP BY major
-                ORDER BY count DESC
-            """
-            result = self.db.execute_query(query)
-            stats['by_major'] = {row['major']: row['count'] for row in result}
-            
-            # 按性别统计
-            query = """
-                SELECT gender, COUNT(*) as count 
-                FROM students 
-                GROUP BY gender
-            """
-            result = self.db.execute_query(query)
-            stats['by_gender'] = {row['gender']: row['count'] for row in result}
+            by_status, by_major, by_gender = Counter(), Counter(), Counter()
+            for row in self.summary.groups(STAT_STUDENTS):
+                count = int(row['count'])
+                by_status[row['k1'] or None] += count
+                by_gender[row['k3'] or None] += count
+                if row['k2']:
+                    by_major[row['k2']] += count
+                    
+            stats['total_students'] = sum(by_status.values())
+            stats['by_status'] = dict(by_status)
+            stats['by_major'] = dict(by_major.most_common())
+            stats['by_gender'] = dict(by_gender)
             
         except Exception as e:
             print(f"获取统计信息失败: {e}")
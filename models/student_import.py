@@ -0,0 +1,227 @@
+"""
+student_import.py
+学生批量导入 - 读取CSV/XLSX、逐行校验（在进程池中执行）、错误报告
+
+读取和校验都是流式的：行按块交给进程池校验，同时在途的块数有上限，
+不会把整个文件读入内存。写库由Student.bulk_import按批完成。
+"""
+import csv
+import io
+import os
+import re
+from datetime import date, datetime
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+# 与students表的ENUM一致
+GENDERS = ('男', '女')
+STATUSES = ('在读', '休学', '退学', '毕业')
+
+# 学号：4-20位字母或数字
+STUDENT_ID_RE = re.compile(r'^[0-9A-Za-z]{4,20}$')
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# 导入的列及长度上限（与students表一致）
+COLUMN_LIMITS = {
+    'student_id': 20,
+    'name': 50,
+    'gender': None,
+    'age': None,
+    'major': 100,
+    'class_name': 50,
+    'phone': 20,
+    'email': 100,
+    'address': 200,
+    'enrollment_date': None,
+    'status': None,
+}
+IMPORT_COLUMNS = tuple(COLUMN_LIMITS)
+
+# 表头也可以使用中文列名
+HEADER_ALIASES = {
+    '学号': 'student_id',
+    '姓名': 'name',
+    '性别': 'gender',
+    '年龄': 'age',
+    '专业': 'major',
+    '班级': 'class_name',
+    '电话': 'phone',
+    '邮箱': 'email',
+    '地址': 'address',
+    '入学日期': 'enrollment_date',
+    '状态': 'status',
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y%m%d', '%Y.%m.%d')
+
+Source = Union[str, os.PathLike, IO]
+
+
+def _column(header: Any) -> Optional[str]:
+    """表头 -> 列名（不认识的列返回None，导入时忽略）"""
+    name = str(header or '').strip()
+    name = HEADER_ALIASES.get(name, name.lower())
+    return name if name in COLUMN_LIMITS else None
+
+
+def _source_format(source: Source, file_format: Optional[str]) -> str:
+    """按参数、文件扩展名判断格式（csv/xlsx）"""
+    if file_format:
+        return file_format.lower()
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return 'xlsx' if str(name).lower().endswith('.xlsx') else 'csv'
+
+
+def _iter_csv(source: Source) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            yield from _iter_csv(f)
+        return
+    if isinstance(source, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(source, 'mode', ''):
+        source = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    reader = csv.reader(source)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [_column(h.lstrip('\ufeff')) for h in header]
+    for line_no, values in enumerate(reader, 2):
+        if not any(v.strip() for v in values):
+            continue
+        yield line_no, {c: v for c, v in zip(columns, values) if c}
+
+
+def _iter_xlsx(source: Source) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("读取xlsx文件需要安装openpyxl（pip install openpyxl），或将表格另存为CSV")
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_column(h) for h in header]
+        for line_no, values in enumerate(rows, 2):
+            if all(v is None or str(v).strip() == '' for v in values):
+                continue
+            yield line_no, {c: v for c, v in zip(columns, values) if c}
+    finally:
+        workbook.close()
+
+
+def read_rows(source: Source, file_format: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    流式读取导入文件
+
+    Args:
+        source: 文件路径或文件对象（CSV可以是文本或二进制流）
+        file_format: csv/xlsx，默认按扩展名判断
+
+    Yields:
+        (行号, {列名: 原始值})，行号从表头下一行的2开始，与表格软件中看到的一致
+    """
+    if _source_format(source, file_format) == 'xlsx':
+        return _iter_xlsx(source)
+    return _iter_csv(source)
+
+
+def _text(value: Any) -> Optional[str]:
+    """原始值 -> 去空白的字符串（空值为None；表格中的整数学号不带小数点）"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError
+
+
+def validate_row(line_no: int, raw: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    校验并规范化一行
+
+    Returns:
+        (规范化后的行（有错误时为None）, [(字段, 错误信息)])；
+        行中没有出现的可选列不出现在结果中
+    """
+    row, errors = {}, []
+    for column, limit in COLUMN_LIMITS.items():
+        if column not in raw:
+            continue
+        value = raw[column] if column == 'enrollment_date' and isinstance(raw[column], date) \
+            else _text(raw[column])
+        if value is None:
+            continue
+        if limit and len(value) > limit:
+            errors.append((column, f"长度超过{limit}"))
+            continue
+        row[column] = value
+
+    student_id = row.get('student_id')
+    if not student_id:
+        errors.append(('student_id', '学号不能为空'))
+    elif not STUDENT_ID_RE.match(student_id):
+        errors.append(('student_id', '学号须为4-20位字母或数字'))
+    if not row.get('name'):
+        errors.append(('name', '姓名不能为空'))
+    if 'gender' in row and row['gender'] not in GENDERS:
+        errors.append(('gender', f"性别须为{'/'.join(GENDERS)}"))
+    if 'status' in row and row['status'] not in STATUSES:
+        errors.append(('status', f"状态须为{'/'.join(STATUSES)}"))
+    if 'age' in row:
+        try:
+            row['age'] = int(float(row['age']))
+            if not 0 < row['age'] < 150:
+                raise ValueError
+        except ValueError:
+            errors.append(('age', '年龄须为1-149的整数'))
+    if 'email' in row and not EMAIL_RE.match(row['email']):
+        errors.append(('email', '邮箱格式不正确'))
+    if 'enrollment_date' in row:
+        try:
+            row['enrollment_date'] = _parse_date(row['enrollment_date'])
+        except ValueError:
+            errors.append(('enrollment_date', '入学日期格式应为YYYY-MM-DD'))
+
+    return (None if errors else row), errors
+
+
+def validate_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Optional[Dict[str, Any]], List[Tuple[str, str]], Optional[str]]]:
+    """
+    校验一块行（在进程池中执行，必须是模块级函数）
+
+    Returns:
+        [(行号, 规范化后的行或None, 错误列表, 原始学号)]
+    """
+    results = []
+    for line_no, raw in chunk:
+        row, errors = validate_row(line_no, raw)
+        results.append((line_no, row, errors, _text(raw.get('student_id'))))
+    return results
+
+
+def write_error_report(path: str, errors: List[Dict[str, Any]]):
+    """写出错误报告CSV（带BOM，表格软件可直接打开）"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=['line', 'student_id', 'field', 'message'])
+        writer.writeheader()
+        writer.writerows(errors)
+
+
+def default_report_path(source: Source) -> Optional[str]:
+    """文件路径输入的默认错误报告位置：与原文件同目录的<文件名>.errors.csv"""
+    if isinstance(source, (str, os.PathLike)):
+        return f"{os.path.splitext(os.fspath(source))[0]}.errors.csv"
+    return None
@@ -0,0 +1,290 @@
+"""
+summary.py
+统计汇总表 - 学生/课程分布、学生选课数分布、各课程成绩汇总
+
+汇总表statistics_summary的每一行是一个分组的计数和求和，由模型在写操作的同一事务中增量维护，
+统计方法只需读取分组行（与分组数成正比，与学生、选课记录数无关）。
+批量导入或直接改库后运行 scripts/rebuild_statistics.py 全量重建。
+"""
+import zlib
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from utils.db_connection import DatabaseConnection
+
+# 汇总类型（stat列）及各自的分组键(k1, k2, k3)
+STAT_STUDENTS = 'students'          # (status, major, gender)
+STAT_COURSES = 'courses'            # (course_type, semester, department)
+STAT_STUDENT_LOAD = 'student_load'  # (选课门数, '', '')，计数为学生人数
+STAT_SCORES = 'scores'              # (course_id, semester, grade)，求和为分数之和
+STAT_FAILING = 'failing'            # (course_id, semester, '')，计数为不及格记录数
+
+PASS_SCORE = 60
+
+# 学生选课数分布在每次选课/退选时都要更新，分散到多行避免不同学生争用同一行锁
+LOAD_SLOTS = 16
+
+# 全量重建用的分组查询（列顺序与statistics_summary一致）
+REBUILD_SQL = {
+    STAT_STUDENTS: """
+        SELECT 'students', COALESCE(status, ''), COALESCE(major, ''), COALESCE(gender, ''),
+               0, COUNT(*), 0
+        FROM students
+        GROUP BY COALESCE(status, ''), COALESCE(major, ''), COALESCE(gender, '')
+    """,
+    STAT_COURSES: """
+        SELECT 'courses', COALESCE(course_type, ''), COALESCE(semester, ''), COALESCE(department, ''),
+               0, COUNT(*), 0
+        FROM courses
+        GROUP BY COALESCE(course_type, ''), COALESCE(semester, ''), COALESCE(department, '')
+    """,
+    STAT_STUDENT_LOAD: """
+        SELECT 'student_load', CAST(course_count AS CHAR), '', '', 0, COUNT(*), 0
+        FROM (
+            SELECT student_id, COUNT(*) AS course_count
+            FROM enrollments
+            GROUP BY student_id
+        ) t
+        GROUP BY course_count
+    """,
+    STAT_SCORES: """
+        SELECT 'scores', course_id, semester, COALESCE(grade, ''), 0, COUNT(*), SUM(score)
+        FROM enrollments
+        WHERE score IS NOT NULL
+        GROUP BY course_id, semester, COALESCE(grade, '')
+    """,
+    STAT_FAILING: f"""
+        SELECT 'failing', course_id, semester, '', 0, COUNT(*), 0
+        FROM enrollments
+        WHERE score < {PASS_SCORE}
+        GROUP BY course_id, semester
+    """,
+}
+
+
+def _key(value) -> str:
+    """分组键（NULL记为空串）"""
+    return '' if value is None else str(value)
+
+
+def _load_slot(student_id: str) -> int:
+    return zlib.crc32(student_id.encode('utf-8')) % LOAD_SLOTS
+
+
+class StatisticsSummary:
+    """统计汇总表statistics_summary的维护与查询（维护方法均由调用方负责事务）"""
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS statistics_summary (
+            stat VARCHAR(20) NOT NULL COMMENT '汇总类型',
+            k1 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键1',
+            k2 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键2',
+            k3 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键3',
+            slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '分散行编号',
+            item_count BIGINT NOT NULL DEFAULT 0 COMMENT '计数',
+            value_sum DECIMAL(20,2) NOT NULL DEFAULT 0 COMMENT '求和',
+            PRIMARY KEY (stat, k1, k2, k3, slot)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计汇总表'
+    """
+
+    UPSERT_SQL = """
+        INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE item_count = item_count + VALUES(item_count),
+                                value_sum = value_sum + VALUES(value_sum)
+    """
+
+    def __init__(self, db_connection: DatabaseConnection):
+        """初始化统计汇总"""
+        self.db = db_connection
+
+    # ---------- 增量维护 ----------
+
+    def apply(self, deltas: Iterable[Tuple]):
+        """
+        累加一组增量 (stat, k1, k2, k3, slot, 计数增量, 求和增量)
+
+        相同分组先合并，抵消为0的不写；按主键顺序写入，减少并发事务间的死锁。
+        """
+        merged = {}
+        for stat, k1, k2, k3, slot, count, total in deltas:
+            key = (stat, _key(k1), _key(k2), _key(k3), slot)
+            acc = merged.setdefault(key, [0, 0.0])
+            acc[0] += count
+            acc[1] += float(total)
+        rows = [(*key, count, round(total, 2)) for key, (count, total) in sorted(merged.items())
+                if count or total]
+        if rows:
+            self.db.execute_many(self.UPSERT_SQL, rows)
+
+    @staticmethod
+    def _student_key(student: Dict[str, Any]) -> Tuple:
+        return (STAT_STUDENTS, student.get('status'), student.get('major'), student.get('gender'), 0)
+
+    @staticmethod
+    def _course_key(course: Dict[str, Any]) -> Tuple:
+        return (STAT_COURSES, course.get('course_type'), course.get('semester'), course.get('department'), 0)
+
+    def student_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """学生新增（old为None）、修改或删除（new为None）"""
+        self.students_changed([(old, new)])
+
+    def students_changed(self, changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+        """一批学生变化 [(原值, 新值)]，合并为一次写入（批量导入使用）"""
+        deltas = []
+        for old, new in changes:
+            if old:
+                deltas.append((*self._student_key(old), -1, 0))
+            if new:
+                deltas.append((*self._student_key(new), 1, 0))
+        self.apply(deltas)
+
+    def course_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """课程新增（old为None）、修改或删除（new为None）"""
+        deltas = []
+        if old:
+            deltas.append((*self._course_key(old), -1, 0))
+        if new:
+            deltas.append((*self._course_key(new), 1, 0))
+        self.apply(deltas)
+
+    def student_load_changed(self, student_id: str, delta: int):
+        """
+        学生选课门数变化（在插入/删除选课记录之后调用）
+
+        锁定读取该学生当前的选课记录，同一学生的并发选课按顺序计算门数。
+        """
+        rows = self.db.execute_query(
+            "SELECT course_id FROM enrollments WHERE student_id = %s FOR UPDATE", (student_id,))
+        new_count = len(rows)
+        old_count = new_count - delta
+        slot = _load_slot(student_id)
+        deltas = []
+        if old_count > 0:
+            deltas.append((STAT_STUDENT_LOAD, old_count, '', '', slot, -1, 0))
+        if new_count > 0:
+            deltas.append((STAT_STUDENT_LOAD, new_count, '', '', slot, 1, 0))
+        self.apply(deltas)
+
+    @staticmethod
+    def _score_deltas(course_id: str, semester: str, score, grade, sign: int) -> List[Tuple]:
+        if score is None:
+            return []
+        score = float(score)
+        deltas = [(STAT_SCORES, course_id, semester, grade, 0, sign, sign * score)]
+        if score < PASS_SCORE:
+            deltas.append((STAT_FAILING, course_id, semester, '', 0, sign, 0))
+        return deltas
+
+    def scores_changed(self, course_id: str, semester: str,
+                       changes: Iterable[Tuple[Any, Any, Any, Any]]):
+        """
+        成绩变化
+
+        Args:
+            changes: [(原成绩, 原等级, 新成绩, 新等级)]，成绩为None表示未录入/记录已删除
+        """
+        deltas = []
+        for old_score, old_grade, new_score, new_grade in changes:
+            deltas.extend(self._score_deltas(course_id, semester, old_score, old_grade, -1))
+            deltas.extend(self._score_deltas(course_id, semester, new_score, new_grade, 1))
+        self.apply(deltas)
+
+    def student_removed(self, student: Dict[str, Any]):
+        """
+        删除学生及其选课记录之前调用：选课记录同样从汇总和选课人数计数中扣除
+        """
+        student_id = student['student_id']
+        enrollments = self.db.execute_query("""
+            SELECT course_id, semester, score, grade FROM enrollments
+            WHERE student_id = %s FOR UPDATE
+        """, (student_id,))
+
+        deltas = [(*self._student_key(student), -1, 0)]
+        if enrollments:
+            deltas.append((STAT_STUDENT_LOAD, len(enrollments), '', '', _load_slot(student_id), -1, 0))
+            for e in enrollments:
+                deltas.extend(self._score_deltas(e['course_id'], e['semester'], e['score'], e['grade'], -1))
+            self.db.execute_many("""
+                UPDATE course_enrollment_counts
+                SET enrolled_count = GREATEST(enrolled_count - 1, 0)
+                WHERE course_id = %s AND semester = %s
+            """, [(e['course_id'], e['semester']) for e in enrollments])
+        self.apply(deltas)
+
+    def course_removed(self, course: Dict[str, Any]):
+        """
+        删除课程及其选课记录之前调用：选课记录从成绩汇总和学生选课数分布中扣除
+        """
+        course_id = course['course_id']
+        # 选了该课程的学生按(总门数, 该课程门数)分组，删除后总门数相应减少
+        shifts = self.db.execute_query("""
+            SELECT total, removed, COUNT(*) AS students
+            FROM (
+                SELECT student_id, COUNT(*) AS total,
+                       SUM(CASE WHEN course_id = %s THEN 1 ELSE 0 END) AS removed
+                FROM enrollments
+                WHERE student_id IN (SELECT student_id FROM enrollments WHERE course_id = %s)
+                GROUP BY student_id
+            ) t
+            GROUP BY total, removed
+        """, (course_id, course_id))
+
+        deltas = [(*self._course_key(course), -1, 0)]
+        for row in shifts:
+            total, remaining = int(row['total']), int(row['total']) - int(row['removed'])
+            deltas.append((STAT_STUDENT_LOAD, total, '', '', 0, -row['students'], 0))
+            if remaining > 0:
+                deltas.append((STAT_STUDENT_LOAD, remaining, '', '', 0, row['students'], 0))
+        self.apply(deltas)
+        self.db.execute_update(
+            "DELETE FROM statistics_summary WHERE stat IN (%s, %s) AND k1 = %s",
+            (STAT_SCORES, STAT_FAILING, course_id))
+
+    # ---------- 查询 ----------
+
+    def groups(self, stat: str, k2: str = None) -> List[Dict[str, Any]]:
+        """
+        读取一种汇总的全部非空分组
+
+        Args:
+            stat: 汇总类型
+            k2: 只读取k2等于该值的分组（如按学期筛选成绩）
+
+        Returns:
+            [{'k1', 'k2', 'k3', 'count', 'total'}]
+        """
+        return self.db.execute_query(*self.groups_query(stat, k2))
+
+    @staticmethod
+    def groups_query(stat: str, k2: str = None) -> Tuple[str, tuple]:
+        """groups()的(SQL, 参数)，供与其他查询合并为一次往返（execute_batch）"""
+        where = "stat = %s"
+        params = [stat]
+        if k2 is not None:
+            where += " AND k2 = %s"
+            params.append(k2)
+        query = f"""
+            SELECT k1, k2, k3, SUM(item_count) AS count, SUM(value_sum) AS total
+            FROM statistics_summary
+            WHERE {where}
+            GROUP BY k1, k2, k3
+            HAVING SUM(item_count) > 0
+        """
+        return query, tuple(params)
+
+    # ---------- 重建 ----------
+
+    def rebuild(self) -> Dict[str, int]:
+        """
+        按业务表全量重建汇总（批量导入或直接改库后使用；应在业务低峰期运行）
+
+        Returns:
+            各汇总类型的分组数
+        """
+        self.db.execute_update(self.CREATE_TABLE)
+        groups = {}
+        with self.db.transaction():
+            self.db.execute_update("DELETE FROM statistics_summary")
+            for stat, select in REBUILD_SQL.items():
+                groups[stat] = self.db.execute_update(
+                    f"INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum) {select}")
+        return groups
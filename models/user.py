@@ -3,17 +3,35 @@ user.py
 用户数据模型 - 包含登录验证、密码加密、操作日志
 """
 import hashlib
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
 from datetime import datetime
 from utils.db_connection import DatabaseConnection
+from utils.log_writer import OperationLogWriter
+from utils.cache import EntityCache, bump_version
 
 
 class User:
     """用户模型类"""
     
-    def __init__(self, db_connection: DatabaseConnection):
-        """初始化用户模型"""
+    # 缓存键的实体类型
+    CACHE_NAMESPACE = 'user'
+    
+    def __init__(self, db_connection: DatabaseConnection,
+                 log_writer: Optional[OperationLogWriter] = None,
+                 cache: Optional[EntityCache] = None):
+        """
+        初始化用户模型
+        
+        Args:
+            db_connection: 数据库连接
+            log_writer: 操作日志异步写入器，为None时同步写入日志
+            cache: 实体缓存（get_many使用），为None时不缓存
+        """
         self.db = db_connection
+        self.log_writer = log_writer
+        self.cache = cache
+        if cache:
+            cache.depends_on(self.CACHE_NAMESPACE, 'system_users')
         self.current_user = None
         
     def _encrypt_password(self, password: str) -> str:
@@ -40,6 +58,7 @@ class User:
             if results and results[0]['is_active']:
                 self.current_user = results[0]
                 self._update_last_login(results[0]['user_id'])
+                # 登录日志在事务之外记录，交给异步写入器，不在登录路径上同步写库
                 self.log_operation("用户登录", "system_users", str(results[0]['user_id']))
                 return results[0]
             elif results and not results[0]['is_active']:
@@ -83,17 +102,25 @@ class User:
             record_id: 操作的记录ID
             ip_address: IP地址
         """
+        self.log_operations([(operation, table_name, record_id, ip_address)])
+        
+    def log_operations(self, entries: Iterable[tuple]):
+        """
+        批量记录操作日志（如批量录入成绩时每条记录一条日志）
+        
+        有异步写入器且不在事务中时逐条入队；否则用一条executemany写入，
+        事务中的日志在事务连接上与业务数据一起提交或回滚。
+        
+        Args:
+            entries: (operation, table_name, record_id[, ip_address]) 元组
+        """
         if not self.current_user:
             return
             
-        query = """
-            INSERT INTO operation_logs 
-            (user_id, username, role, operation, table_name, record_id, ip_address)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        try:
-            self.db.execute_update(query, (
+        rows = []
+        for operation, table_name, record_id, *rest in entries:
+            ip_address = rest[0] if rest else None
+            rows.append((
                 self.current_user['user_id'],
                 self.current_user['username'],
                 self.current_user['role'],
@@ -102,6 +129,24 @@ class User:
                 record_id,
                 ip_address or 'localhost'
             ))
+        if not rows:
+            return
+        
+        # 有异步写入器时只入队，由后台线程批量写入；
+        # 事务中的日志须与业务数据一起提交或回滚，仍在事务连接上同步写入
+        if self.log_writer and not self.db.in_transaction():
+            for row in rows:
+                self.log_writer.submit(row)
+            return
+            
+        query = """
+            INSERT INTO operation_logs 
+            (user_id, username, role, operation, table_name, record_id, ip_address)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        
+        try:
+            self.db.execute_many(query, rows)
         except Exception as e:
             print(f"记录日志失败: {e}")
             
@@ -120,11 +165,11 @@ class User:
         query = "UPDATE system_users SET password_hash = %s WHERE user_id = %s"
         
         try:
-            result = self.db.execute_update(query, (new_hash, self.current_user['user_id']))
-            if result > 0:
-                self.log_operation("修改密码", "system_users", str(self.current_user['user_id']))
-                return True
-            return False
+            with self.db.transaction():
+                result = self.db.execute_update(query, (new_hash, self.current_user['user_id']))
+                if result > 0:
+                    self.log_operation("修改密码", "system_users", str(self.current_user['user_id']))
+            return result > 0
         except Exception as e:
             print(f"修改密码失败: {e}")
             return False
@@ -146,19 +191,20 @@ class User:
         """
         
         try:
-            result = self.db.execute_update(query, (
-                user_data['username'],
-                password_hash,
-                user_data['role'],
-                user_data.get('related_id'),
-                user_data.get('real_name', ''),
-                user_data.get('is_active', True)
-            ))
-            
-            if result > 0:
-                self.log_operation(f"创建用户: {user_data['username']}", "system_users")
-                return True
-            return False
+            with self.db.transaction():
+                result = self.db.execute_update(query, (
+                    user_data['username'],
+                    password_hash,
+                    user_data['role'],
+                    user_data.get('related_id'),
+                    user_data.get('real_name', ''),
+                    user_data.get('is_active', True)
+                ))
+                
+                if result > 0:
+                    self.log_operation(f"创建用户: {user_data['username']}", "system_users")
+                    bump_version(self.db, 'system_users')
+            return result > 0
         except Exception as e:
             print(f"创建用户失败: {e}")
             return False
@@ -183,6 +229,38 @@ class User:
             print(f"查询用户失败: {e}")
             return []
             
+    def get_many(self, user_ids: Iterable[int], bypass_cache: bool = False) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取用户（IN列表分批查询，命中缓存的不再查库）
+        
+        只返回账号信息（不含密码哈希，也不含随登录变化的last_login/login_count）。
+        
+        Args:
+            user_ids: 用户ID列表
+            bypass_cache: 为True时全部查库
+            
+        Returns:
+            按传入顺序排列的{用户ID: 用户}，不存在的ID不出现在结果中
+        """
+        query = """
+            SELECT user_id, username, role, related_id, real_name, is_active, created_at
+            FROM system_users
+            WHERE user_id IN ({placeholders})
+        """
+        
+        def load(ids):
+            return {r['user_id']: r for r in self.db.execute_query_in(query, ids)}
+            
+        try:
+            if self.cache is None:
+                ids = list(dict.fromkeys(user_ids))
+                found = load(ids)
+                return {i: found[i] for i in ids if i in found}
+            return self.cache.get_many_or_load(self.CACHE_NAMESPACE, user_ids, load, bypass_cache)
+        except Exception as e:
+            print(f"批量查询用户失败: {e}")
+            return {}
+            
     def toggle_user_status(self, user_id: int) -> bool:
         """切换用户启用/禁用状态"""
         if not self.current_user or self.current_user['role'] != 'admin':
@@ -195,11 +273,14 @@ class User:
         """
         
         try:
-            result = self.db.execute_update(query, (user_id, self.current_user['user_id']))
-            if result > 0:
-                self.log_operation(f"切换用户状态: {user_id}", "system_users", str(user_id))
-                return True
-            return False
+            with self.db.transaction():
+                result = self.db.execute_update(query, (user_id, self.current_user['user_id']))
+                if result > 0:
+                    self.log_operation(f"切换用户状态: {user_id}", "system_users", str(user_id))
+                    bump_version(self.db, 'system_users', user_id)
+            if self.cache:
+                self.cache.invalidate((self.CACHE_NAMESPACE, user_id))
+            return result > 0
         except Exception as e:
             print(f"切换状态失败: {e}")
             return False
@@ -214,23 +295,19 @@ class User:
         query = "UPDATE system_users SET password_hash = %s WHERE user_id = %s"
         
         try:
-            result = self.db.execute_update(query, (password_hash, user_id))
-            if result > 0:
-                self.log_operation(f"重置密码: {user_id}", "system_users", str(user_id))
-                return True
-            return False
+            with self.db.transaction():
+                result = self.db.execute_update(query, (password_hash, user_id))
+                if result > 0:
+                    self.log_operation(f"重置密码: {user_id}", "system_users", str(user_id))
+            return result > 0
         except Exception as e:
             print(f"重置密码失败: {e}")
             return False
 
 
             
-    def get_operation_logs(self, limit: int = 100, 
-                          filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """获取操作日志（仅管理员）"""
-        if not self.current_user or self.current_user['role'] != 'admin':
-            return []
-            
+    def _build_log_query(self, filters: Dict[str, Any] = None) -> Tuple[str, list]:
+        """构建操作日志查询语句（不含排序和条数限制）"""
         query = """
             SELECT log_id, username, role, operation, table_name, 
                    record_id, ip_address, operation_time
@@ -250,6 +327,15 @@ class User:
                 query += " AND DATE(operation_time) = %s"
                 params.append(filters['date'])
                 
+        return query, params
+            
+    def get_operation_logs(self, limit: int = 100, 
+                          filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """获取操作日志（仅管理员）"""
+        if not self.current_user or self.current_user['role'] != 'admin':
+            return []
+            
+        query, params = self._build_log_query(filters)
         query += " ORDER BY operation_time DESC LIMIT %s"
         params.append(limit)
         
@@ -259,6 +345,24 @@ class User:
             print(f"查询日志失败: {e}")
             return []
             
+    def iter_operation_logs(self, filters: Dict[str, Any] = None, limit: int = None,
+                            batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """流式获取操作日志（仅管理员，适用于导出全部日志）"""
+        if not self.current_user or self.current_user['role'] != 'admin':
+            return
+            
+        query, params = self._build_log_query(filters)
+        query += " ORDER BY operation_time DESC"
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+            
+        try:
+            yield from self.db.iter_query(query, tuple(params) if params else None,
+                                          batch_size=batch_size)
+        except Exception as e:
+            print(f"查询日志失败: {e}")
+            
     def get_role(self) -> str:
         """获取当前用户角色"""
         return self.current_user['role'] if self.current_user else None
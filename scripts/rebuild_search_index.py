@@ -0,0 +1,37 @@
+"""
+学生搜索索引重建脚本
+批量导入学生（绕过Student模型）后，按students表全量重建student_search_tokens
+
+新索引先写入影子表student_search_tokens_new，完成后原子替换，重建期间搜索不受影响；
+需要数据库账号有CREATE、DROP权限。
+"""
+import os
+import sys
+from colorama import init, Fore
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.db_config import DBConfig
+from utils import DatabaseConnection
+from models.search_index import StudentSearchIndex
+
+init(autoreset=True)
+
+
+def rebuild():
+    """重建学生搜索索引"""
+    print(f"{Fore.CYAN}开始重建学生搜索索引...")
+
+    db = DatabaseConnection(DBConfig.get_local_config())
+    try:
+        total = StudentSearchIndex(db).rebuild()
+        print(f"{Fore.GREEN}✓ 已为 {total} 名学生建立索引")
+    except Exception as e:
+        print(f"{Fore.RED}重建失败: {e}")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    rebuild()
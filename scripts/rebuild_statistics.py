@@ -0,0 +1,42 @@
+"""
+统计汇总重建脚本
+批量导入数据（绕过模型）或发现统计与明细不一致时，按业务表全量重建statistics_summary，
+并校正选课统计所依赖的选课人数计数
+"""
+import os
+import sys
+from colorama import init, Fore
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.db_config import DBConfig
+from utils import DatabaseConnection
+from models import Enrollment
+from models.summary import StatisticsSummary
+
+init(autoreset=True)
+
+
+def rebuild():
+    """重建统计汇总"""
+    print(f"{Fore.CYAN}开始重建统计汇总...")
+
+    db = DatabaseConnection(DBConfig.get_local_config())
+    try:
+        groups = StatisticsSummary(db).rebuild()
+        for stat, count in groups.items():
+            print(f"  {stat}: {count} 个分组")
+
+        repaired = Enrollment(db).reconcile_enrolled_counts()
+        if repaired:
+            print(f"{Fore.YELLOW}已修复 {len(repaired)} 条选课人数计数")
+        print(f"{Fore.GREEN}✓ 统计汇总重建完成")
+    except Exception as e:
+        print(f"{Fore.RED}重建失败: {e}")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,7 @@
+"""
+server包
+HTTP/JSON API服务
+"""
+from .app import ApiServer, ApiService, ApiError, create_server
+
+__all__ = ['ApiServer', 'ApiService', 'ApiError', 'create_server']
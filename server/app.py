@@ -0,0 +1,524 @@
+"""
+app.py
+HTTP/JSON API服务：登录、课程列表、选课/退课、成绩录入、成绩单和统计
+
+一个服务进程代替大量终端客户端：所有请求共用一个连接池和实体缓存，
+由固定大小的工作线程池处理；HTTP/1.1长连接，空闲超时后关闭；按接口记录请求耗时。
+角色权限与终端客户端的管理员/教师/学生菜单一致。
+
+接口（除登录和健康检查外，请求头需带 Authorization: Bearer <token>）：
+    POST /api/login                 {username, password} -> {token, user}
+    POST /api/logout
+    GET  /api/health
+    GET  /api/me                    当前用户（学生附带学籍信息）
+    GET  /api/courses?semester=     可选课程
+    GET  /api/my/courses            学生：已选课程；教师：授课课程
+    POST /api/enrollments           {course_id, semester[, student_id]} 选课（学生/管理员）
+    POST /api/enrollments/drop      {course_id, semester[, student_id]} 退课（学生/管理员）
+    GET  /api/courses/students?course_id=&semester=   选课名单（本课程教师/管理员）
+    POST /api/scores                {course_id, semester, scores: [{student_id, score}]}（本课程教师/管理员）
+    GET  /api/transcript[?student_id=]                成绩单（学生本人/管理员）
+    GET  /api/stats/course?course_id=&semester=       课程成绩分布（本课程教师/管理员）
+    GET  /api/stats[?semester=]     全局统计（管理员）
+    GET  /api/metrics               请求耗时、连接池、缓存和SQL统计（管理员）
+"""
+import json
+import time
+import secrets
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from models import Student, Course, Enrollment, User
+from models.enrollment import ENROLL_SUCCESS, ENROLL_MESSAGES
+from config.db_config import DBConfig
+from utils import (DatabaseConnection, OperationLogWriter, QueryStats, AdmissionGate,
+                   EntityCache, CacheVersions)
+
+logger = logging.getLogger(__name__)
+
+
+def _error_id() -> str:
+    """错误编号：返回给客户端，并随异常详情写入服务端日志，便于对照排查"""
+    return secrets.token_hex(6)
+
+# 请求体上限（字节）
+MAX_BODY = 1024 * 1024
+
+# 每个接口保留的最近耗时样本数（用于计算百分位）
+LATENCY_SAMPLES = 1000
+
+
+class ApiError(Exception):
+    """返回给客户端的错误（HTTP状态码 + 消息）"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    """JSON序列化数据库返回的Decimal和日期"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class RequestMetrics:
+    """按接口统计请求数、错误数和耗时（线程安全）"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._routes = {}    # 接口 -> {'count', 'errors', 'total', 'max', 'recent'}
+        self.started_at = time.time()
+
+    def record(self, route: str, elapsed: float, error: bool = False):
+        """记录一次请求"""
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0,
+                    'recent': deque(maxlen=self.samples),
+                }
+            stats['count'] += 1
+            stats['errors'] += int(error)
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            stats['recent'].append(elapsed)
+
+    @staticmethod
+    def _percentile(values: list, pct: float) -> float:
+        return values[max(0, int(round(pct / 100 * len(values))) - 1)] if values else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """各接口的计数和耗时（毫秒；百分位基于最近的样本）"""
+        with self._lock:
+            routes = {route: (dict(s), sorted(s['recent'])) for route, s in self._routes.items()}
+        result = {}
+        for route, (s, recent) in sorted(routes.items()):
+            result[route] = {
+                'count': s['count'],
+                'errors': s['errors'],
+                'mean_ms': round(s['total'] / s['count'] * 1000, 3),
+                'p50_ms': round(self._percentile(recent, 50) * 1000, 3),
+                'p95_ms': round(self._percentile(recent, 95) * 1000, 3),
+                'p99_ms': round(self._percentile(recent, 99) * 1000, 3),
+                'max_ms': round(s['max'] * 1000, 3),
+            }
+        return {'uptime_sec': round(time.time() - self.started_at, 1), 'routes': result}
+
+
+class SessionStore:
+    """登录会话：令牌 -> 该会话的User模型（保存当前用户），空闲超过ttl秒失效"""
+
+    def __init__(self, ttl: float = 1800.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = {}    # token -> [User, 最后访问时间]
+
+    def create(self, user_model: User) -> str:
+        """保存已登录的User模型，返回令牌"""
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            self._reap(now)
+            self._sessions[token] = [user_model, now]
+        return token
+
+    def get(self, token: str) -> Optional[User]:
+        """按令牌取会话（过期返回None）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            if now - entry[1] > self.ttl:
+                del self._sessions[token]
+                return None
+            entry[1] = now
+            return entry[0]
+
+    def remove(self, user_model: User):
+        """删除该用户模型的会话"""
+        with self._lock:
+            for token in [t for t, (u, _) in self._sessions.items() if u is user_model]:
+                del self._sessions[token]
+
+    def _reap(self, now: float):
+        """清理过期会话（调用方持有锁）"""
+        expired = [t for t, (_, seen) in self._sessions.items() if now - seen > self.ttl]
+        for token in expired:
+            del self._sessions[token]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class ApiService:
+    """接口实现：参数校验、角色权限和模型调用（与HTTP无关）"""
+
+    def __init__(self, db_conn: DatabaseConnection, session_ttl: float = 1800.0,
+                 query_stats: Optional[QueryStats] = None):
+        self.db_conn = db_conn
+        self.query_stats = query_stats
+        self.log_writer = OperationLogWriter(db_conn)
+        self.sessions = SessionStore(session_ttl)
+        self.metrics = RequestMetrics()
+
+        cache_config = DBConfig.get_cache_config()
+        self.entity_cache = None
+        if cache_config['max_size'] > 0:
+            versions = CacheVersions(db_conn, cache_config.pop('poll_interval'))
+            self.entity_cache = EntityCache(versions=versions, **cache_config)
+
+        # 模型无会话状态，所有请求共用；User保存当前用户，每个会话一个
+        self.student_model = Student(db_conn, self.entity_cache)
+        self.course_model = Course(db_conn, self.entity_cache)
+        self.enrollment_model = Enrollment(db_conn, AdmissionGate(), self.entity_cache)
+
+        # (方法, 路径) -> (处理函数, 允许的角色；None表示无需登录)
+        self.routes: Dict[Tuple[str, str], Tuple[Callable, Optional[tuple]]] = {
+            ('GET', '/api/health'): (self.health, None),
+            ('POST', '/api/login'): (self.login, None),
+            ('POST', '/api/logout'): (self.logout, ('admin', 'teacher', 'student')),
+            ('GET', '/api/me'): (self.me, ('admin', 'teacher', 'student')),
+            ('GET', '/api/courses'): (self.available_courses, ('admin', 'teacher', 'student')),
+            ('GET', '/api/my/courses'): (self.my_courses, ('teacher', 'student')),
+            ('POST', '/api/enrollments'): (self.enroll, ('admin', 'student')),
+            ('POST', '/api/enrollments/drop'): (self.drop, ('admin', 'student')),
+            ('GET', '/api/courses/students'): (self.course_students, ('admin', 'teacher')),
+            ('POST', '/api/scores'): (self.input_scores, ('admin', 'teacher')),
+            ('GET', '/api/transcript'): (self.transcript, ('admin', 'student')),
+            ('GET', '/api/stats/course'): (self.course_statistics, ('admin', 'teacher')),
+            ('GET', '/api/stats'): (self.statistics, ('admin',)),
+            ('GET', '/api/metrics'): (self.server_metrics, ('admin',)),
+        }
+
+    def close(self):
+        """停止日志写入"""
+        self.log_writer.close()
+
+    # ---------- 分发 ----------
+
+    def dispatch(self, method: str, path: str, token: Optional[str],
+                 params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按路由调用处理函数
+
+        Raises:
+            ApiError: 路由不存在、未登录、无权限或参数错误
+        """
+        route = self.routes.get((method, path))
+        if route is None:
+            if any(p == path for _, p in self.routes):
+                raise ApiError(405, '不支持的请求方法')
+            raise ApiError(404, '接口不存在')
+        handler, roles = route
+        if roles is None:
+            return handler(token, params)
+
+        user_model = self.sessions.get(token) if token else None
+        if user_model is None:
+            raise ApiError(401, '未登录或登录已过期')
+        if user_model.get_role() not in roles:
+            raise ApiError(403, '没有权限执行该操作')
+        return handler(user_model, params)
+
+    @staticmethod
+    def _require(params: Dict[str, Any], *names: str) -> list:
+        """读取必填参数（去除首尾空白）"""
+        values = []
+        for name in names:
+            value = params.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, ''):
+                raise ApiError(400, f"缺少参数: {name}")
+            values.append(value)
+        return values
+
+    def _target_student(self, user_model: User, params: Dict[str, Any]) -> str:
+        """学生只能操作本人；管理员需指定student_id"""
+        if user_model.get_role() == 'student':
+            return user_model.get_related_id()
+        return self._require(params, 'student_id')[0]
+
+    def _check_teaches(self, user_model: User, course_id: str):
+        """教师只能访问自己的课程"""
+        if user_model.get_role() == 'teacher' and \
+                not self.course_model.is_taught_by(course_id, user_model.get_related_id()):
+            raise ApiError(403, '您没有权限访问该课程')
+
+    # ---------- 接口 ----------
+
+    def health(self, token, params) -> Dict[str, Any]:
+        """健康检查"""
+        return {'status': 'ok', 'sessions': len(self.sessions)}
+
+    def login(self, token, params) -> Dict[str, Any]:
+        """登录，返回会话令牌"""
+        username, password = self._require(params, 'username', 'password')
+        user_model = User(self.db_conn, self.log_writer, self.entity_cache)
+        user = user_model.login(username, password)
+        if not user:
+            raise ApiError(401, '用户名或密码错误，或账号已被禁用')
+        user = {k: v for k, v in user.items() if k != 'password'}
+        return {'token': self.sessions.create(user_model), 'user': user}
+
+    def logout(self, user_model: User, params) -> Dict[str, Any]:
+        """登出"""
+        user_model.logout()
+        self.sessions.remove(user_model)
+        return {'ok': True}
+
+    def me(self, user_model: User, params) -> Dict[str, Any]:
+        """当前用户"""
+        user = {k: v for k, v in user_model.current_user.items() if k != 'password'}
+        result = {'user': user}
+        if user_model.get_role() == 'student':
+            result['student'] = self.student_model.get_by_id(user_model.get_related_id())
+        return result
+
+    def available_courses(self, user_model: User, params) -> Dict[str, Any]:
+        """某学期的可选课程"""
+        semester, = self._require(params, 'semester')
+        return {'courses': self.course_model.get_available_courses(semester)}
+
+    def my_courses(self, user_model: User, params) -> Dict[str, Any]:
+        """学生的已选课程或教师的授课课程"""
+        related_id = user_model.get_related_id()
+        if user_model.get_role() == 'student':
+            return {'courses': self.enrollment_model.get_student_courses(related_id)}
+        return {'courses': self.course_model.get_by_teacher(related_id)}
+
+    def enroll(self, user_model: User, params) -> Dict[str, Any]:
+        """选课"""
+        course_id, semester = self._require(params, 'course_id', 'semester')
+        student_id = self._target_student(user_model, params)
+        result = self.enrollment_model.try_enroll(student_id, course_id, semester)
+        if result == ENROLL_SUCCESS:
+            if user_model.get_role() == 'student':
+                user_model.log_operation(f"选课: {course_id}", "enrollments")
+            else:
+                user_model.log_operation(f"选课: {student_id} - {course_id}", "enrollments")
+        return {'ok': result == ENROLL_SUCCESS, 'result': result, 'message': ENROLL_MESSAGES[result]}
+
+    def drop(self, user_model: User, params) -> Dict[str, Any]:
+        """退课"""
+        course_id, semester = self._require(params, 'course_id', 'semester')
+        student_id = self._target_student(user_model, params)
+        if not self.enrollment_model.drop_course(student_id, course_id, semester):
+            raise ApiError(409, '退课失败')
+        if user_model.get_role() == 'student':
+            user_model.log_operation(f"退课: {course_id}", "enrollments")
+        else:
+            user_model.log_operation(f"退课: {student_id} - {course_id}", "enrollments")
+        return {'ok': True}
+
+    def course_students(self, user_model: User, params) -> Dict[str, Any]:
+        """课程选课名单"""
+        course_id, semester = self._require(params, 'course_id', 'semester')
+        self._check_teaches(user_model, course_id)
+        return {'students': self.enrollment_model.get_course_students(course_id, semester)}
+
+    def input_scores(self, user_model: User, params) -> Dict[str, Any]:
+        """批量录入成绩（成绩和日志在一个事务中提交）"""
+        course_id, semester, scores = self._require(params, 'course_id', 'semester', 'scores')
+        self._check_teaches(user_model, course_id)
+        if not isinstance(scores, list):
+            raise ApiError(400, 'scores必须是列表')
+        try:
+            pending = [(str(s['student_id']), float(s['score'])) for s in scores]
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, 'scores的每一项须包含student_id和数字score')
+
+        try:
+            with self.db_conn.transaction():
+                results = self.enrollment_model.input_scores(course_id, semester, pending)
+                user_model.log_operations(
+                    (f"录入成绩: {r['student_id']} - {course_id} - {r['score']}", "enrollments", None)
+                    for r in results if r['status'] == 'ok'
+                )
+        except Exception:
+            error_id = _error_id()
+            logger.exception(f"成绩保存失败 [{error_id}]: {course_id} {semester}")
+            raise ApiError(500, f"成绩保存失败，本次录入已全部撤销（错误编号 {error_id}）")
+        failed = [r for r in results if r['status'] == 'failed']
+        if failed:
+            # 逐条结果中的数据库错误只写入服务端日志
+            error_id = _error_id()
+            logger.error(f"成绩保存失败 [{error_id}]: {course_id} {semester}: {failed[0]['message']}")
+            for r in failed:
+                r['message'] = f"保存失败（错误编号 {error_id}）"
+        saved = sum(1 for r in results if r['status'] == 'ok')
+        return {'saved': saved, 'total': len(pending), 'results': results}
+
+    def transcript(self, user_model: User, params) -> Dict[str, Any]:
+        """成绩单及加权平均分"""
+        student_id = self._target_student(user_model, params)
+        scores = self.enrollment_model.get_student_scores(student_id)
+        total_credits = sum(float(s['credits']) for s in scores)
+        total_points = sum(float(s['score']) * float(s['credits']) for s in scores)
+        return {
+            'student_id': student_id,
+            'scores': scores,
+            'total_credits': total_credits,
+            'weighted_avg': round(total_points / total_credits, 2) if total_credits else None,
+        }
+
+    def course_statistics(self, user_model: User, params) -> Dict[str, Any]:
+        """课程成绩分布"""
+        course_id, semester = self._require(params, 'course_id', 'semester')
+        self._check_teaches(user_model, course_id)
+        return self.enrollment_model.get_course_score_distribution(course_id, semester)
+
+    def statistics(self, user_model: User, params) -> Dict[str, Any]:
+        """学生、课程、选课和成绩统计"""
+        return {
+            'students': self.student_model.get_statistics(),
+            'courses': self.course_model.get_statistics(),
+            'enrollments': self.enrollment_model.get_statistics(),
+            'scores': self.enrollment_model.get_score_statistics(params.get('semester') or None),
+        }
+
+    def server_metrics(self, user_model: User, params) -> Dict[str, Any]:
+        """请求耗时、连接池、缓存和SQL统计"""
+        return {
+            'requests': self.metrics.snapshot(),
+            'sessions': len(self.sessions),
+            'pool': self.db_conn.pool_status(),
+            'cache': self.entity_cache.get_stats() if self.entity_cache else None,
+            'queries': self.query_stats.summary() if self.query_stats else None,
+        }
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """把HTTP请求解析为(方法, 路径, 令牌, 参数)交给ApiService，结果以JSON返回"""
+
+    protocol_version = 'HTTP/1.1'    # 默认保持长连接
+    server_version = 'SMS-API/1.0'
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _read_params(self, query: str) -> Dict[str, Any]:
+        """查询串参数，POST时合并JSON请求体"""
+        params = {k: v[-1] for k, v in parse_qs(query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            raise ApiError(413, '请求体过大')
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length).decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise ApiError(400, '请求体不是有效的JSON')
+            if not isinstance(body, dict):
+                raise ApiError(400, '请求体必须是JSON对象')
+            params.update(body)
+        return params
+
+    def _handle(self, method: str):
+        service: ApiService = self.server.service
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        route = f"{method} {url.path}"
+        status = 200
+        try:
+            params = self._read_params(url.query)
+            auth = self.headers.get('Authorization', '')
+            token = auth[7:].strip() if auth.startswith('Bearer ') else None
+            payload = service.dispatch(method, url.path, token, params)
+        except ApiError as e:
+            status, payload = e.status, {'error': e.message}
+        except Exception:
+            error_id = _error_id()
+            logger.exception(f"处理请求失败 [{error_id}]: {route}")
+            status, payload = 500, {'error': f"服务器内部错误（错误编号 {error_id}）"}
+
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        if (method, url.path) not in service.routes:
+            route = 'unknown'
+        service.metrics.record(route, time.perf_counter() - started, error=status >= 500)
+
+    def log_message(self, format, *args):
+        """访问日志降为debug级别"""
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ApiServer(HTTPServer):
+    """由固定大小的工作线程池处理连接的HTTP服务器"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], service: ApiService,
+                 workers: int = 32, keepalive: float = 5.0):
+        """
+        初始化服务器
+
+        Args:
+            address: (监听地址, 端口)
+            service: 接口实现
+            workers: 工作线程数；每个长连接在其存活期间占用一个工作线程
+            keepalive: 长连接空闲多少秒后关闭，释放工作线程
+        """
+        self.service = service
+        handler = type('Handler', (ApiRequestHandler,), {'timeout': keepalive})
+        super().__init__(address, handler)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sms-api')
+
+    def process_request(self, request, client_address):
+        """把连接交给工作线程池（线程池满时排队）"""
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """停止接收连接，等待在途请求完成"""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def create_server(db_config: Dict[str, Any], api_config: Optional[Dict[str, Any]] = None) -> ApiServer:
+    """
+    按配置创建服务器（连接池上限与工作线程数一致）
+
+    Args:
+        db_config: 数据库配置
+        api_config: 服务配置，默认DBConfig.get_api_config()
+    """
+    api_config = api_config or DBConfig.get_api_config()
+    query_stats = QueryStats(**DBConfig.get_query_stats_config())
+    db_conn = DatabaseConnection(db_config,
+                                 {'min_size': 1, 'max_size': api_config['workers'], 'timeout': 30.0},
+                                 query_stats=query_stats)
+    service = ApiService(db_conn, api_config['session_ttl'], query_stats)
+    return ApiServer((api_config['host'], api_config['port']), service,
+                     api_config['workers'], api_config['keepalive'])
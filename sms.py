@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+sms.py
+学生信息管理系统 - 批处理命令行入口（供定时任务和脚本调用）
+
+用法示例：
+    python sms.py --user admin students list --major 计算机 > students.jsonl
+    python sms.py --user admin --format csv students export --output students.csv
+    python sms.py --user teacher1 scores load scores.csv --course CS101 --semester 2024-1
+    python sms.py --user admin stats --semester 2024-1
+    python sms.py --user admin --batch nightly.txt        # 每行一条命令，共用一次登录和一个连接
+"""
+import os
+import sys
+import getpass
+
+# 确保能正确导入模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.db_config import DBConfig
+from client.batch_cli import BatchCLI, build_parser, EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_AUTH
+
+
+def main() -> int:
+    """主函数，返回退出码"""
+    parser = build_parser()
+    args = parser.parse_args()
+    if not args.batch and not args.command:
+        parser.print_help(sys.stderr)
+        return EXIT_USAGE
+
+    username = args.user or os.environ.get('SMS_USER')
+    password = args.password or os.environ.get('SMS_PASSWORD')
+    if not username:
+        print("请通过--user或环境变量SMS_USER指定用户名", file=sys.stderr)
+        return EXIT_USAGE
+    if password is None:
+        if not sys.stdin.isatty():
+            print("请通过--password或环境变量SMS_PASSWORD指定密码", file=sys.stderr)
+            return EXIT_USAGE
+        password = getpass.getpass("密码: ")
+
+    db_config = DBConfig.get_remote_config(args.host) if args.host else DBConfig.get_local_config()
+    cli = BatchCLI(db_config, args.format)
+    try:
+        if not cli.login(username, password):
+            print("登录失败：用户名或密码错误，或账号已被禁用", file=sys.stderr)
+            return EXIT_AUTH
+
+        if args.batch:
+            if args.batch == '-':
+                failures = cli.run_batch(sys.stdin)
+            else:
+                with open(args.batch, encoding='utf-8') as f:
+                    failures = cli.run_batch(f)
+            return EXIT_FAILED if failures else EXIT_OK
+        return cli.execute(args)
+    finally:
+        cli.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
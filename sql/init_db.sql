@@ -58,6 +58,49 @@ CREATE TABLE enrollments (
     UNIQUE KEY uk_student_course_semester (student_id, course_id, semester)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='选课信息表';
 
+-- 创建课程选课人数计数表（选课/退选时在同一事务中维护）
+DROP TABLE IF EXISTS course_enrollment_counts;
+CREATE TABLE course_enrollment_counts (
+    course_id VARCHAR(20) NOT NULL COMMENT '课程编号',
+    semester VARCHAR(20) NOT NULL COMMENT '学期',
+    enrolled_count INT NOT NULL DEFAULT 0 COMMENT '已选人数',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+    PRIMARY KEY (course_id, semester)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='课程选课人数计数表';
+
+-- 创建学生搜索倒排索引表（姓名、专业的单字和二元组；导入数据后运行 scripts/rebuild_search_index.py 建立）
+DROP TABLE IF EXISTS student_search_tokens;
+CREATE TABLE student_search_tokens (
+    token VARCHAR(8) NOT NULL COMMENT '词元（单字或二元组）',
+    student_id VARCHAR(20) NOT NULL COMMENT '学号',
+    field VARCHAR(10) NOT NULL COMMENT '来源字段',
+    PRIMARY KEY (token, field, student_id),
+    INDEX idx_student (student_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='学生搜索倒排索引';
+
+-- 创建缓存版本表（写操作在同一事务中递增，各客户端据此丢弃其他进程修改过的缓存）
+DROP TABLE IF EXISTS cache_versions;
+CREATE TABLE cache_versions (
+    table_name VARCHAR(64) NOT NULL COMMENT '表名',
+    slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '版本行编号',
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '版本号',
+    PRIMARY KEY (table_name, slot)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='缓存版本表';
+
+-- 创建统计汇总表（学生/课程分布、学生选课数分布、各课程成绩汇总；写操作时在同一事务中增量维护，
+-- 批量导入后运行 scripts/rebuild_statistics.py 重建）
+DROP TABLE IF EXISTS statistics_summary;
+CREATE TABLE statistics_summary (
+    stat VARCHAR(20) NOT NULL COMMENT '汇总类型',
+    k1 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键1',
+    k2 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键2',
+    k3 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键3',
+    slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '分散行编号',
+    item_count BIGINT NOT NULL DEFAULT 0 COMMENT '计数',
+    value_sum DECIMAL(20,2) NOT NULL DEFAULT 0 COMMENT '求和',
+    PRIMARY KEY (stat, k1, k2, k3, slot)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计汇总表';
+
 -- 创建索引优化查询
 CREATE INDEX idx_student_major ON students(major);
 CREATE INDEX idx_student_class ON students(class_name);
@@ -88,6 +131,42 @@ INSERT INTO enrollments (student_id, course_id, semester, score, grade, status)
 ('2021002', 'CS103', '2024-1', 88.5, '良好', '正常'),
 ('2021003', 'CS102', '2024-1', 95.0, '优秀', '正常');
 
+INSERT INTO course_enrollment_counts (course_id, semester, enrolled_count)
+SELECT course_id, semester, COUNT(*) FROM enrollments GROUP BY course_id, semester;
+
+INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum)
+SELECT 'students', COALESCE(status, ''), COALESCE(major, ''), COALESCE(gender, ''),
+       0, COUNT(*), 0
+FROM students
+GROUP BY COALESCE(status, ''), COALESCE(major, ''), COALESCE(gender, '');
+
+INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum)
+SELECT 'courses', COALESCE(course_type, ''), COALESCE(semester, ''), COALESCE(department, ''),
+       0, COUNT(*), 0
+FROM courses
+GROUP BY COALESCE(course_type, ''), COALESCE(semester, ''), COALESCE(department, '');
+
+INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum)
+SELECT 'student_load', CAST(course_count AS CHAR), '', '', 0, COUNT(*), 0
+FROM (
+    SELECT student_id, COUNT(*) AS course_count
+    FROM enrollments
+    GROUP BY student_id
+) t
+GROUP BY course_count;
+
+INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum)
+SELECT 'scores', course_id, semester, COALESCE(grade, ''), 0, COUNT(*), SUM(score)
+FROM enrollments
+WHERE score IS NOT NULL
+GROUP BY course_id, semester, COALESCE(grade, '');
+
+INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum)
+SELECT 'failing', course_id, semester, '', 0, COUNT(*), 0
+FROM enrollments
+WHERE score < 60
+GROUP BY course_id, semester;
+
 
 
 -- ============================================
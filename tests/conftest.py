@@ -0,0 +1,129 @@
+"""
+conftest.py
+测试公共夹具：不连接MySQL的记录型数据库连接
+
+FakeDatabaseConnection是真正的DatabaseConnection，只把连接池换成内存中的假连接，
+语句仍经过计时游标和记录器（query_budget、QueryStats），因此统计到的语句数与真实运行一致。
+查询结果由respond(片段, 行)按SQL片段预设，未预设的查询返回空结果。
+"""
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_connection import DatabaseConnection
+
+
+class FakeCursor:
+    """假游标：记录语句，按预设返回结果"""
+
+    def __init__(self, db: 'FakeDatabaseConnection'):
+        self.db = db
+        self.rowcount = 0
+        self._results = []
+
+    def execute(self, query, args=None):
+        self.db.executed.append((query, args))
+        # execute_batch以分号拼接的多条语句各有一个结果集
+        self._results = [self.db.rows_for(part) for part in query.split(';\n')]
+        self.rowcount = len(self._results[0]) or 1
+        return self.rowcount
+
+    def executemany(self, query, args):
+        args = list(args)
+        self.db.executed.append((query, args))
+        self._results = [[]]
+        self.rowcount = len(args)
+        return self.rowcount
+
+    def fetchall(self):
+        return self._results[0] if self._results else []
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def nextset(self):
+        if len(self._results) <= 1:
+            return None
+        self._results.pop(0)
+        return True
+
+    def mogrify(self, query, args=None):
+        if args is None:
+            return query
+        return query % tuple(repr(a) for a in args)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """假连接"""
+
+    def __init__(self, db: 'FakeDatabaseConnection'):
+        self.db = db
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    """只有一个假连接的连接池"""
+
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+
+    def acquire(self):
+        return self.connection
+
+    def release(self, conn, discard: bool = False):
+        pass
+
+    def warmup(self):
+        pass
+
+    def status(self):
+        return {'size': 1, 'in_use': 0}
+
+    def close_all(self):
+        pass
+
+
+class FakeDatabaseConnection(DatabaseConnection):
+    """不连接数据库的DatabaseConnection，executed中按顺序保存执行过的(SQL, 参数)"""
+
+    def __init__(self):
+        super().__init__({'host': 'fake', 'port': 0, 'database': 'test'})
+        self.executed = []
+        self._responses = []
+        self.connection = FakeConnection(self)
+        self.pool = FakePool(self.connection)
+        self.batch_pool = FakePool(self.connection)
+
+    def respond(self, fragment: str, rows: list):
+        """SQL中包含fragment的查询返回rows（后设置的优先）"""
+        self._responses.insert(0, (fragment, rows))
+
+    def rows_for(self, query: str) -> list:
+        for fragment, rows in self._responses:
+            if fragment in query:
+                return [dict(r) for r in rows]
+        return []
+
+
+@pytest.fixture
+def fake_db():
+    """记录型假数据库连接"""
+    return FakeDatabaseConnection()
@@ -0,0 +1,121 @@
+"""
+EntityCache测试：LRU淘汰、TTL过期、拷贝隔离、批量读穿、失效与加载并发和跨进程版本失效
+"""
+import time
+
+from utils.cache import CacheVersions, EntityCache, bump_version, VERSION_SLOTS
+
+
+def test_get_or_load_caches_found_values():
+    cache = EntityCache()
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {'student_id': '2024001'}
+
+    assert cache.get_or_load(('student', '2024001'), load) == {'student_id': '2024001'}
+    assert cache.get_or_load(('student', '2024001'), load) == {'student_id': '2024001'}
+    assert len(calls) == 1
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_none_is_not_cached():
+    cache = EntityCache()
+    calls = []
+    for _ in range(2):
+        cache.get_or_load(('student', 'missing'), lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_returned_values_are_copies():
+    cache = EntityCache()
+    cache.put(('student', '1'), {'name': '张三'})
+    cache.get(('student', '1'))['name'] = '李四'
+    assert cache.get(('student', '1'))['name'] == '张三'
+
+
+def test_lru_eviction():
+    cache = EntityCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_ttl_expiry():
+    cache = EntityCache(ttl=0.01)
+    cache.put('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.get_stats()['expired'] == 1
+
+
+def test_get_many_or_load_only_loads_misses():
+    cache = EntityCache()
+    cache.put(('student', '1'), {'id': '1'})
+    requested = []
+
+    def loader(ids):
+        requested.extend(ids)
+        return {i: {'id': i} for i in ids if i != '404'}
+
+    result = cache.get_many_or_load('student', ['2', '1', '2', '404'], loader)
+    assert list(result) == ['2', '1']
+    assert requested == ['2', '404']
+
+
+def test_invalidate_namespace():
+    cache = EntityCache()
+    cache.put(('student', '1'), 1)
+    cache.put(('course', '1'), 2)
+    cache.invalidate_namespace('student')
+    assert cache.get(('student', '1')) is None
+    assert cache.get(('course', '1')) == 2
+
+
+
+def test_invalidate_during_load_discards_stale_result():
+    cache = EntityCache()
+    key = ('student', '1')
+
+    def load():
+        # 加载读到旧值后、写入缓存前，另一个线程修改了该学生并使缓存失效
+        cache.invalidate(key)
+        return {'name': '旧名字'}
+
+    assert cache.get_or_load(key, load) == {'name': '旧名字'}
+    assert cache.get(key) is None
+
+    def load_many(ids):
+        cache.clear()
+        return {i: {'id': i} for i in ids}
+
+    cache.get_many_or_load('student', ['2'], load_many)
+    assert cache.get(('student', '2')) is None
+
+def test_bump_version_spreads_keys_over_slots(fake_db):
+    bump_version(fake_db, 'students', '2024001')
+    bump_version(fake_db, 'students')
+    (_, first), (_, second) = fake_db.executed
+    assert first[0] == 'students' and 0 <= first[1] < VERSION_SLOTS
+    assert second == ('students', 0)
+
+
+def test_version_change_drops_dependent_namespaces(fake_db):
+    fake_db.respond("FROM cache_versions", [{'table_name': 'students', 'version': 1},
+                                            {'table_name': 'courses', 'version': 1}])
+    cache = EntityCache(versions=CacheVersions(fake_db, poll_interval=0))
+    cache.depends_on('student', 'students')
+    cache.depends_on('course', 'courses')
+    cache.sync()
+    cache.put(('student', '1'), 1)
+    cache.put(('course', '1'), 2)
+
+    fake_db.respond("FROM cache_versions", [{'table_name': 'students', 'version': 2},
+                                            {'table_name': 'courses', 'version': 1}])
+    assert cache.get(('student', '1')) is None
+    assert cache.get(('course', '1')) == 2
@@ -0,0 +1,68 @@
+"""
+选课模型测试：成绩等级、批量录入成绩的校验和选课/退选的语句顺序
+"""
+import pytest
+
+from models.enrollment import calc_grade, Enrollment, ENROLL_SUCCESS
+
+
+@pytest.mark.parametrize('score, grade', [
+    (0, '不及格'), (59.9, '不及格'), (60, '及格'), (69.5, '及格'), (70, '中等'),
+    (80, '良好'), (89.99, '良好'), (90, '优秀'), (100, '优秀'),
+])
+def test_calc_grade(score, grade):
+    assert calc_grade(score) == grade
+
+
+def test_input_scores_validates_before_touching_database(fake_db):
+    results = Enrollment(fake_db).input_scores('CS101', '2024-2025-1', [
+        ('2024001', 'abc'), ('2024002', 101), ('2024003', -1),
+    ])
+    assert [r['status'] for r in results] == ['invalid', 'invalid', 'invalid']
+    assert fake_db.executed == []
+
+
+def test_input_scores_chunks_enrollment_check(fake_db, monkeypatch):
+    monkeypatch.setattr(Enrollment, 'SCORE_BATCH_SIZE', 2)
+    ids = [f"20240{i:02d}" for i in range(5)]
+    fake_db.respond("SELECT student_id, score, grade FROM enrollments",
+                    [{'student_id': i, 'score': None, 'grade': None} for i in ids])
+    results = Enrollment(fake_db).input_scores('CS101', '2024-2025-1',
+                                               [(i, 80) for i in ids] + [(ids[0], 90)])
+    assert [r['status'] for r in results] == ['ok'] * 5 + ['duplicate']
+    checks = [args for sql, args in fake_db.executed if 'FOR UPDATE' in sql and 'enrollments' in sql]
+    assert [len(args) - 2 for args in checks] == [2, 2, 1]
+
+
+@pytest.fixture
+def bumps(fake_db, monkeypatch):
+    """记录选课模型每次递增版本号时是否处于事务中"""
+    import models.enrollment as enrollment
+    calls = []
+    original = enrollment.bump_version
+
+    def bump_version(db, table, key=None):
+        calls.append((table, key, db.in_transaction()))
+        original(db, table, key)
+
+    monkeypatch.setattr(enrollment, 'bump_version', bump_version)
+    return calls
+
+
+def test_enroll_reserves_seat_last(fake_db, bumps):
+    assert Enrollment(fake_db).try_enroll('2024001', 'CS101', '2024-2025-1') == ENROLL_SUCCESS
+    statements = [' '.join(sql.split()) for sql, _ in fake_db.executed]
+    assert statements[0].startswith('INSERT INTO enrollments')
+    assert statements[-2].startswith('UPDATE course_enrollment_counts')
+    assert statements[-1].startswith('INSERT INTO cache_versions')
+    assert bumps == [('enrollments', 'CS101', False)]
+
+
+def test_drop_course_adjusts_counter_last(fake_db, bumps):
+    fake_db.respond("SELECT score, grade FROM enrollments", [{'score': 85, 'grade': '良好'}])
+    assert Enrollment(fake_db).drop_course('2024001', 'CS101', '2024-2025-1')
+    statements = [' '.join(sql.split()) for sql, _ in fake_db.executed]
+    assert statements[1].startswith('DELETE FROM enrollments')
+    assert statements[-2].startswith('INSERT INTO course_enrollment_counts')
+    assert statements[-1].startswith('INSERT INTO cache_versions')
+    assert bumps == [('enrollments', 'CS101', False)]
@@ -0,0 +1,205 @@
+"""
+query_budget测试：语句计数、预算超出、N+1检测，以及客户端处理函数声明的预算
+"""
+import logging
+import threading
+
+import pytest
+
+from utils.query_budget import (QueryBudgetExceeded, assert_max_queries, budgeted,
+                                query_budget)
+from models import Student
+
+
+def test_counts_statements_in_block(fake_db):
+    with query_budget(fake_db, 5) as report:
+        fake_db.execute_query("SELECT * FROM students WHERE student_id = %s", ('2024001',))
+        fake_db.execute_update("UPDATE students SET age = %s WHERE student_id = %s", (20, '2024001'))
+        fake_db.execute_many("INSERT INTO t (a) VALUES (%s)", [(1,), (2,), (3,)])
+    assert report.total == 3
+    assert report.problems() == []
+
+
+def test_recorder_removed_after_block(fake_db):
+    with query_budget(fake_db, 1) as report:
+        fake_db.execute_query("SELECT 1")
+    fake_db.execute_query("SELECT 1")
+    assert report.total == 1
+
+
+def test_exceeding_budget_raises(fake_db):
+    with pytest.raises(QueryBudgetExceeded, match="超出预算 1 条"):
+        with assert_max_queries(fake_db, 1):
+            fake_db.execute_query("SELECT 1")
+            fake_db.execute_query("SELECT 2")
+
+
+def test_warn_mode_logs_instead_of_raising(fake_db, caplog):
+    with caplog.at_level(logging.WARNING, logger='utils.query_budget'):
+        with query_budget(fake_db, 0, name='handler', mode='warn'):
+            fake_db.execute_query("SELECT 1")
+    assert "[handler]" in caplog.text
+
+
+def test_unknown_mode_rejected(fake_db):
+    with pytest.raises(ValueError):
+        with query_budget(fake_db, 1, mode='ignore'):
+            pass
+
+
+def test_detects_n_plus_one(fake_db):
+    student = Student(fake_db)
+    with pytest.raises(QueryBudgetExceeded, match="疑似N\\+1"):
+        with assert_max_queries(fake_db, None):
+            for i in range(10):
+                student.get_by_id(f"2024{i:03d}")
+
+
+def test_repeating_identical_statement_is_not_n_plus_one(fake_db):
+    with assert_max_queries(fake_db, None) as report:
+        for _ in range(10):
+            fake_db.execute_query("SELECT * FROM students WHERE student_id = %s", ('2024001',))
+    assert report.repeated() == []
+
+
+def test_below_repeat_threshold_is_not_n_plus_one(fake_db):
+    with assert_max_queries(fake_db, None, repeat_threshold=5) as report:
+        for i in range(4):
+            fake_db.execute_query("SELECT * FROM students WHERE student_id = %s", (str(i),))
+    assert report.by_fingerprint() == {"SELECT * FROM students WHERE student_id = ?": 4}
+
+
+def test_batched_lookup_stays_within_budget(fake_db):
+    fake_db.respond("FROM students WHERE student_id IN", [{'student_id': '2024001', 'name': '张三'}])
+    student = Student(fake_db)
+    with assert_max_queries(fake_db, 1):
+        found = student.get_many([f"2024{i:03d}" for i in range(100)])
+    assert list(found) == ['2024001']
+
+
+def test_only_current_thread_is_counted(fake_db):
+    with query_budget(fake_db, 1) as report:
+        worker = threading.Thread(target=lambda: [fake_db.execute_query("SELECT 1") for _ in range(3)])
+        worker.start()
+        worker.join()
+        fake_db.execute_query("SELECT 2")
+    assert report.total == 1
+
+
+class _Handler:
+    def __init__(self, db, mode):
+        self.db_conn = db
+        self.query_budget_mode = mode
+
+    @budgeted(1)
+    def two_queries(self):
+        self.db_conn.execute_query("SELECT 1")
+        self.db_conn.execute_query("SELECT 2")
+        return 'done'
+
+
+def test_budgeted_checks_only_in_dev_mode(fake_db):
+    assert _Handler(fake_db, None).two_queries() == 'done'
+    with pytest.raises(QueryBudgetExceeded):
+        _Handler(fake_db, 'raise').two_queries()
+    assert _Handler.two_queries.query_budget == 1
+
+
+# 不需要额外输入、只读数据库的管理员统计功能：实际语句数不得超过@budgeted声明的预算
+CLIENT_HANDLERS = [
+    '_show_student_statistics',
+    '_show_course_statistics',
+    '_show_enrollment_statistics',
+    '_show_score_statistics',
+    '_view_all_users',
+]
+
+
+@pytest.fixture
+def client(fake_db, monkeypatch):
+    """以管理员身份登录、使用假数据库连接的统一客户端（不启用实体缓存，预算检查为raise模式）"""
+    monkeypatch.setenv('SMS_CACHE_SIZE', '0')
+    monkeypatch.setenv('SMS_SLOW_QUERY_LOG', '')
+    import client.role_based_client as role_based_client
+    monkeypatch.setattr(role_based_client, 'wait_input', lambda prompt='': '')
+    monkeypatch.setattr(role_based_client, 'DatabaseConnection', lambda *a, **kw: fake_db)
+    instance = role_based_client.UnifiedClient({'host': 'fake', 'port': 0})
+    instance.query_budget_mode = 'raise'
+    instance.user_model.current_user = {'user_id': 1, 'username': 'admin', 'role': 'admin',
+                                        'related_id': None, 'real_name': '管理员'}
+    yield instance
+    instance.log_writer.close()
+
+
+@pytest.mark.parametrize('name', CLIENT_HANDLERS)
+def test_client_handler_budgets(client, fake_db, name, capsys):
+    handler = getattr(client, name)
+    with assert_max_queries(fake_db, None) as report:
+        handler()
+    assert 0 < report.total <= handler.query_budget
+    assert '失败' not in capsys.readouterr().out
+
+
+def test_save_scores_within_budget(client, fake_db, capsys):
+    student_ids = [f"2024{i:03d}" for i in range(10)]
+    fake_db.respond("SELECT student_id, score, grade FROM enrollments",
+                    [{'student_id': s, 'score': None, 'grade': None} for s in student_ids])
+    with assert_max_queries(fake_db, client._save_scores.query_budget) as report:
+        client._save_scores('C001', '2024-2025-1', [(s, 85) for s in student_ids])
+    assert "成功录入 10/10" in capsys.readouterr().out
+    (log_rows,) = [args for query, args in fake_db.executed if 'INSERT INTO operation_logs' in query]
+    assert len(log_rows) == 10
+    assert report.total == 5
+
+
+# 需要交互输入的学生管理、选课和成绩功能：(处理函数, 角色, 依次输入)
+INTERACTIVE_HANDLERS = [
+    ('_add_student', 'admin', ['2024009', '李四', '', '', '计算机', '', '', '', 'n']),
+    ('_search_student', 'admin', ['张三', '']),
+    ('_update_student', 'admin', ['2024001', '13800000000', '', '']),
+    ('_delete_student', 'admin', ['2024001', 'yes']),
+    ('_enroll_course', 'admin', ['2024001', 'CS101', '2024-1']),
+    ('_drop_course', 'admin', ['2024001', 'CS101', '2024-1', 'y']),
+    ('_view_student_courses', 'admin', ['2024001', '']),
+    ('_view_course_students', 'admin', ['CS101', '2024-1', '']),
+    ('_input_score', 'admin', ['CS101', '2024-1', '90']),
+    ('_view_student_scores', 'admin', ['2024001', '']),
+    ('_view_course_score_distribution', 'admin', ['CS101', '2024-1', '']),
+    ('_teacher_input_score', 'teacher', ['CS101', '2024-1', '90']),
+    ('_student_enroll_course', 'student', ['2024-1', 'CS101']),
+    ('_student_drop_course', 'student', ['CS101', '2024-1', 'y']),
+]
+
+USERS = {
+    'admin': {'user_id': 1, 'username': 'admin', 'role': 'admin', 'related_id': None, 'real_name': '管理员'},
+    'teacher': {'user_id': 2, 'username': 'tea_T001', 'role': 'teacher', 'related_id': 'T001', 'real_name': '李老师'},
+    'student': {'user_id': 3, 'username': 'stu_2024001', 'role': 'student', 'related_id': '2024001',
+                'real_name': '张三'},
+}
+
+# 学生、课程、选课查询都返回这一行，字段覆盖各功能显示用到的列
+SAMPLE_ROW = {
+    'student_id': '2024001', 'name': '张三', 'gender': '男', 'age': 20, 'major': '计算机科学',
+    'class_name': '计科1班', 'phone': '', 'email': '', 'status': '在读', 'enrollment_date': '2024-09-01',
+    'course_id': 'CS101', 'course_name': '数据结构', 'credits': 3, 'semester': '2024-1',
+    'teacher_id': 'T001', 'teacher': '李老师', 'course_type': '必修', 'max_students': 100,
+    'enrolled_count': 1, 'score': 85, 'grade': '良好', 'score_range': '80-89', 'count': 1,
+}
+
+
+@pytest.mark.parametrize('name, role, inputs', INTERACTIVE_HANDLERS)
+def test_interactive_handler_budgets(client, fake_db, monkeypatch, capsys, name, role, inputs):
+    import client.role_based_client as role_based_client
+    for fragment in ('FROM students', 'FROM courses', 'FROM enrollments'):
+        fake_db.respond(fragment, [SAMPLE_ROW])
+    answers = iter(inputs)
+    monkeypatch.setattr(role_based_client, 'wait_input', lambda prompt='': next(answers))
+    client.user_model.current_user = USERS[role]
+
+    handler = getattr(client, name)
+    with assert_max_queries(fake_db, None) as report:
+        handler()
+    assert 0 < report.total <= handler.query_budget
+    assert list(answers) == []
+    out = capsys.readouterr().out
+    assert '失败' not in out and '不存在' not in out
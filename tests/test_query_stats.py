@@ -0,0 +1,68 @@
+"""
+query_stats测试：SQL指纹、参数隐藏和慢查询日志
+"""
+from utils.query_stats import QueryStats, fingerprint, redact_params, slow_logger
+
+
+def test_fingerprint_replaces_literals_and_placeholders():
+    assert fingerprint("SELECT * FROM students WHERE student_id = '2024001' AND age > 18") == \
+        "SELECT * FROM students WHERE student_id = ? AND age > ?"
+    assert fingerprint("SELECT * FROM students WHERE student_id = %s") == \
+        "SELECT * FROM students WHERE student_id = ?"
+
+
+def test_fingerprint_collapses_whitespace_and_comments():
+    assert fingerprint("SELECT  1\n  FROM t -- 注释\n WHERE /* x */ a = %s") == \
+        "SELECT ? FROM t WHERE a = ?"
+
+
+def test_fingerprint_folds_in_lists_and_values_rows():
+    short = fingerprint("SELECT * FROM t WHERE id IN (%s, %s)")
+    long = fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s, %s, %s)")
+    assert short == long == "SELECT * FROM t WHERE id IN (?+)"
+    assert fingerprint("INSERT INTO t (a, b) VALUES (1, 2), (3, 4), (5, 6)") == \
+        fingerprint("INSERT INTO t (a, b) VALUES (%s, %s)")
+
+
+def test_redact_params_hides_values():
+    text = redact_params(('2024001', 95.5, None))
+    assert '2024001' not in text
+    assert 'str(7)' in text and 'float' in text and 'NULL' in text
+    assert redact_params(None) == '-'
+
+
+def test_query_stats_groups_by_fingerprint():
+    stats = QueryStats(slow_threshold_ms=10_000)
+    for student_id in ('1', '2', '3'):
+        stats.record("SELECT * FROM students WHERE student_id = %s", (student_id,), 0.001, 1)
+    stats.record("SELECT 1", None, 0.002, error=True)
+    rows = {r['fingerprint']: r for r in stats.snapshot()}
+    assert rows["SELECT * FROM students WHERE student_id = ?"]['count'] == 3
+    assert rows["SELECT ?"]['errors'] == 1
+    assert stats.summary()['count'] == 4
+    assert stats.slow_queries() == []
+
+
+def test_slow_queries_kept_without_log_file():
+    stats = QueryStats(slow_threshold_ms=1)
+    stats.record("SELECT * FROM students WHERE name = %s", ('张三',), 0.5)
+    slow = stats.slow_queries()
+    assert len(slow) == 1
+    assert '张三' not in str(slow[0])
+
+
+def test_slow_log_file_created_on_first_slow_query(tmp_path):
+    path = tmp_path / 'logs' / 'slow_query.log'
+    stats = QueryStats(slow_threshold_ms=1, slow_log_path=str(path))
+    try:
+        assert not path.parent.exists()
+        stats.record("SELECT 1", None, 0.0001)
+        assert not path.exists()
+        stats.record("SELECT 1", None, 0.5)
+        assert path.exists()
+    finally:
+        for handler in list(slow_logger.handlers):
+            if getattr(handler, 'baseFilename', None) == str(path):
+                slow_logger.removeHandler(handler)
+                handler.close()
+        slow_logger.propagate = True
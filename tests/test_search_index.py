@@ -0,0 +1,36 @@
+"""
+搜索索引测试：词元切分和相关度
+"""
+from models.search_index import index_rows, query_tokens, relevance, tokenize, StudentSearchIndex
+
+
+def test_tokenize_uses_chars_and_bigrams():
+    assert tokenize('张 三丰') == {'张', '三', '丰', '张三', '三丰'}
+    assert tokenize(None) == set()
+
+
+def test_query_tokens():
+    assert query_tokens('张') == {'张'}
+    assert query_tokens('计算机') == {'计算', '算机'}
+    assert query_tokens('  ') == set()
+
+
+def test_index_rows_cover_name_and_major():
+    rows = index_rows('2024001', '张三', '数学')
+    assert ('张三', '2024001', 'name') in rows
+    assert ('数学', '2024001', 'major') in rows
+    assert all(field in ('name', 'major') for _, _, field in rows)
+
+
+def test_relevance_order():
+    student = {'student_id': '2024001', 'name': '张三', 'major': '计算机科学'}
+    scores = [relevance(student, k) for k in ('2024001', '2024', '张三', '张', '三', '计算机科学', '计算机')]
+    assert scores == sorted(scores, reverse=True)
+    assert len(set(scores)) == len(scores)
+    assert relevance(student, '李四') == 0
+
+
+def test_can_prefix_match():
+    assert StudentSearchIndex.can_prefix_match('2024')
+    assert not StudentSearchIndex.can_prefix_match('张三')
+    assert not StudentSearchIndex.can_prefix_match('')
@@ -0,0 +1,68 @@
+"""
+学生批量导入测试：读取、逐行校验和错误报告（不写数据库）
+"""
+import csv
+import io
+from datetime import date
+
+from models.student_import import (default_report_path, read_rows, validate_chunk, validate_row,
+                                   write_error_report)
+
+
+def test_valid_row_is_normalized():
+    row, errors = validate_row(2, {'student_id': ' 2024001 ', 'name': '张三', 'gender': '女',
+                                   'age': '19', 'enrollment_date': '2024/09/01', 'phone': ''})
+    assert errors == []
+    assert row == {'student_id': '2024001', 'name': '张三', 'gender': '女', 'age': 19,
+                   'enrollment_date': date(2024, 9, 1)}
+
+
+def test_invalid_fields_are_reported():
+    row, errors = validate_row(3, {'student_id': '20-01', 'name': '', 'gender': '未知',
+                                   'age': '200', 'email': 'bad', 'status': '在校',
+                                   'enrollment_date': '2024-13-01'})
+    assert row is None
+    assert {field for field, _ in errors} == {'student_id', 'name', 'gender', 'age', 'email',
+                                               'status', 'enrollment_date'}
+
+
+def test_length_limit():
+    row, errors = validate_row(2, {'student_id': '2024001', 'name': '张' * 51})
+    assert row is None
+    assert errors[0][0] == 'name'
+
+
+def test_spreadsheet_numbers_and_dates():
+    row, errors = validate_row(2, {'student_id': 2024001.0, 'name': '张三', 'age': 19.0,
+                                   'enrollment_date': date(2024, 9, 1)})
+    assert errors == []
+    assert row['student_id'] == '2024001' and row['age'] == 19
+
+
+def test_validate_chunk_keeps_raw_id():
+    results = validate_chunk([(2, {'student_id': '2024001', 'name': '张三'}),
+                              (3, {'student_id': 'x', 'name': '李四'})])
+    assert [(line, row is not None, raw_id) for line, row, _, raw_id in results] == \
+        [(2, True, '2024001'), (3, False, 'x')]
+
+
+def test_read_rows_from_csv_stream_with_chinese_headers():
+    source = io.StringIO("学号,姓名,备注\n2024001,张三,忽略\n\n2024002,李四,\n")
+    rows = list(read_rows(source, 'csv'))
+    assert rows == [(2, {'student_id': '2024001', 'name': '张三'}),
+                    (4, {'student_id': '2024002', 'name': '李四'})]
+
+
+def test_read_rows_from_binary_stream_with_bom():
+    source = io.BytesIO("\ufeffstudent_id,name\n2024001,张三\n".encode('utf-8'))
+    assert list(read_rows(source, 'csv')) == [(2, {'student_id': '2024001', 'name': '张三'})]
+
+
+def test_error_report(tmp_path):
+    path = tmp_path / 'students.errors.csv'
+    write_error_report(str(path), [{'line': 3, 'student_id': 'x', 'field': 'student_id',
+                                    'message': '学号须为4-20位字母或数字'}])
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        assert list(csv.DictReader(f))[0]['line'] == '3'
+    assert default_report_path('data/students.csv') == 'data/students.errors.csv'
+    assert default_report_path(io.StringIO()) is None
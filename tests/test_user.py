@@ -0,0 +1,52 @@
+"""
+用户模型测试：操作日志的批量写入和登录日志
+"""
+from models import User
+from utils.log_writer import OperationLogWriter
+
+ADMIN = {'user_id': 1, 'username': 'admin', 'role': 'admin', 'related_id': None,
+         'real_name': '管理员', 'is_active': 1, 'last_login': None}
+
+
+def inserts(fake_db):
+    return [args for query, args in fake_db.executed if 'INSERT INTO operation_logs' in query]
+
+
+def test_log_operations_in_transaction_is_one_statement(fake_db):
+    writer = OperationLogWriter(fake_db, flush_interval=60)
+    user = User(fake_db, log_writer=writer)
+    user.current_user = ADMIN
+    try:
+        with fake_db.transaction():
+            user.log_operations([("录入成绩", "enrollments", f"2024{i:03d}") for i in range(10)])
+        assert len(fake_db.executed) == 1
+        (rows,) = inserts(fake_db)
+        assert len(rows) == 10
+        assert rows[0] == (1, 'admin', 'admin', "录入成绩", "enrollments", "2024000", 'localhost')
+        assert writer.get_stats()['submitted'] == 0
+    finally:
+        writer.close()
+
+
+def test_log_operations_outside_transaction_goes_to_writer(fake_db):
+    writer = OperationLogWriter(fake_db, flush_interval=60)
+    user = User(fake_db, log_writer=writer)
+    user.current_user = ADMIN
+    try:
+        user.log_operations([("删除学生", "students", '1'), ("删除学生", "students", '2', '10.0.0.1')])
+        assert fake_db.executed == []
+        assert writer.get_stats()['pending'] == 2
+    finally:
+        writer.close()
+
+
+def test_login_log_is_not_written_synchronously(fake_db):
+    fake_db.respond("FROM system_users", [ADMIN])
+    writer = OperationLogWriter(fake_db, flush_interval=60)
+    user = User(fake_db, log_writer=writer)
+    try:
+        assert user.login('admin', 'admin123')['user_id'] == 1
+        assert inserts(fake_db) == []
+        assert writer.get_stats()['pending'] == 1
+    finally:
+        writer.close()
@@ -1,6 +1,18 @@
 """
 工具模块
 """
-from .db_connection import DatabaseConnection
+from .db_connection import DatabaseConnection, TransactionRollbackError
+from .connection_pool import ConnectionPool, PoolTimeoutError
+from .log_writer import OperationLogWriter
+from .admission import AdmissionGate, AdmissionRejected
+from .query_stats import QueryStats
+from .tracing import Tracer
+from .query_budget import QueryBudgetExceeded, query_budget, assert_max_queries
+from .cache import EntityCache, CacheVersions
+from .async_db import AsyncDatabaseConnection
 
-__all__ = ['DatabaseConnection']
+__all__ = ['DatabaseConnection', 'TransactionRollbackError',
+           'ConnectionPool', 'PoolTimeoutError', 'OperationLogWriter',
+           'AdmissionGate', 'AdmissionRejected', 'QueryStats', 'Tracer',
+           'QueryBudgetExceeded', 'query_budget', 'assert_max_queries',
+           'EntityCache', 'CacheVersions', 'AsyncDatabaseConnection']
@@ -0,0 +1,104 @@
+"""
+admission.py
+选课高并发准入控制
+"""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any
+
+
+class AdmissionRejected(Exception):
+    """准入被拒绝（等待超时或课程已满）"""
+
+
+class AdmissionGate:
+    """
+    按课程限制同时进行的选课事务数
+
+    抢课高峰时成千上万的请求集中在少数热门课程上，全部打到数据库只会在
+    同一行计数上排队等锁。准入门为每门课程设一个信号量，只放行少量请求
+    进入数据库；课程一旦确认已满，在full_ttl秒内直接在本地拒绝。
+    """
+
+    def __init__(self, max_inflight: int = 8, wait_timeout: float = 5.0, full_ttl: float = 1.0):
+        """
+        初始化准入门
+
+        Args:
+            max_inflight: 每门课程同时进入数据库的最大请求数
+            wait_timeout: 等待放行的最长秒数
+            full_ttl: 课程满员标记的有效秒数（有人退课后可能又有名额）
+        """
+        self.max_inflight = max_inflight
+        self.wait_timeout = wait_timeout
+        self.full_ttl = full_ttl
+
+        self._lock = threading.Lock()
+        self._semaphores = {}    # key -> BoundedSemaphore
+        self._full_until = {}    # key -> 满员标记过期时间
+
+        self.stats = {
+            'admitted': 0,
+            'rejected_full': 0,
+            'rejected_timeout': 0,
+        }
+
+    def _semaphore(self, key) -> threading.BoundedSemaphore:
+        """获取课程对应的信号量"""
+        with self._lock:
+            sem = self._semaphores.get(key)
+            if sem is None:
+                sem = self._semaphores[key] = threading.BoundedSemaphore(self.max_inflight)
+            return sem
+
+    def is_full(self, key) -> bool:
+        """课程是否处于满员标记期内"""
+        with self._lock:
+            until = self._full_until.get(key)
+            if until is None:
+                return False
+            if time.monotonic() >= until:
+                del self._full_until[key]
+                return False
+            return True
+
+    def mark_full(self, key):
+        """标记课程已满"""
+        with self._lock:
+            self._full_until[key] = time.monotonic() + self.full_ttl
+
+    def clear_full(self, key):
+        """清除满员标记（有学生退课时调用）"""
+        with self._lock:
+            self._full_until.pop(key, None)
+
+    @contextmanager
+    def admit(self, key):
+        """
+        申请进入数据库
+
+        Raises:
+            AdmissionRejected: 课程已满或等待超时
+        """
+        if self.is_full(key):
+            with self._lock:
+                self.stats['rejected_full'] += 1
+            raise AdmissionRejected('full')
+
+        sem = self._semaphore(key)
+        if not sem.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.stats['rejected_timeout'] += 1
+            raise AdmissionRejected('timeout')
+        try:
+            with self._lock:
+                self.stats['admitted'] += 1
+            yield
+        finally:
+            sem.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取计数器"""
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,117 @@
+"""
+async_db.py
+异步数据库访问：在有界线程池上执行DatabaseConnection的阻塞调用
+
+pymysql是阻塞驱动。AsyncDatabaseConnection把每次调用交给固定大小的工作线程池执行，
+线程数默认等于连接池上限，因此同时在途的SQL不超过连接数；成千上万个协程会话只占用
+少量线程，等待的协程排在线程池队列中而不各占一个线程。
+
+事务状态按线程保存，跨多个await的事务无法固定在同一线程上，因此事务通过
+run_in_transaction(func)把整个事务函数放到一个工作线程中执行。
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .db_connection import DatabaseConnection
+
+# 连接池未配置max_size时的默认工作线程数（与ConnectionPool的默认上限一致）
+DEFAULT_WORKERS = 10
+
+
+class AsyncDatabaseConnection:
+    """DatabaseConnection的异步包装（execute_query/execute_update/execute_many等接口一致）"""
+
+    def __init__(self, db: DatabaseConnection, max_workers: Optional[int] = None):
+        """
+        初始化异步连接
+
+        Args:
+            db: 同步数据库连接（其连接池被所有协程共享）
+            max_workers: 工作线程数，默认等于连接池max_size
+        """
+        self.db = db
+        self.max_workers = max_workers or db.pool_config.get('max_size', DEFAULT_WORKERS)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='sms-db')
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], pool_config: Optional[Dict[str, Any]] = None,
+                    max_workers: Optional[int] = None, **kwargs) -> 'AsyncDatabaseConnection':
+        """按数据库配置创建（其余参数传给DatabaseConnection）"""
+        return cls(DatabaseConnection(config, pool_config, **kwargs), max_workers)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在工作线程中执行阻塞函数
+
+        调用方的上下文变量一并带入工作线程。
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def connect(self):
+        """建立连接池并预热"""
+        return await self.run(self.db.connect)
+
+    async def execute_query(self, query: str, params: Optional[tuple] = None) -> list:
+        """执行查询语句"""
+        return await self.run(self.db.execute_query, query, params)
+
+    async def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
+        """执行更新语句，返回影响行数"""
+        return await self.run(self.db.execute_update, query, params)
+
+    async def execute_many(self, query: str, params_list: list) -> int:
+        """批量执行语句，返回影响行数"""
+        return await self.run(self.db.execute_many, query, params_list)
+
+    async def execute_batch(self, statements: List[Tuple[str, Optional[tuple]]]) -> List[list]:
+        """一次往返执行多条查询"""
+        return await self.run(self.db.execute_batch, statements)
+
+    async def execute_query_in(self, query: str, values: list, params: Optional[tuple] = None,
+                               chunk_size: Optional[int] = None) -> list:
+        """分块执行IN查询"""
+        return await self.run(self.db.execute_query_in, query, values, params, chunk_size)
+
+    async def run_in_transaction(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在一个事务中执行func(*args, **kwargs)（func为同步函数，在工作线程中整体执行）
+
+        func抛出异常或其中语句失败时整个事务回滚，异常原样抛出。
+        """
+        def call():
+            with self.db.transaction():
+                return func(*args, **kwargs)
+        return await self.run(call)
+
+    async def test_connection(self) -> bool:
+        """测试数据库连接"""
+        return await self.run(self.db.test_connection)
+
+    def pool_status(self) -> Dict[str, Any]:
+        """获取连接池状态"""
+        return self.db.pool_status()
+
+    async def close(self, disconnect: bool = True):
+        """
+        等待在途调用完成并关闭工作线程池
+
+        Args:
+            disconnect: 是否同时关闭连接池（连接池还被同步代码使用时设为False）
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        if disconnect:
+            self.db.disconnect()
+
+    async def __aenter__(self) -> 'AsyncDatabaseConnection':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
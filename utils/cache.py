@@ -0,0 +1,290 @@
+"""
+cache.py
+实体读穿缓存：LRU淘汰 + TTL过期，写操作时由模型主动失效
+
+多个客户端进程共用一个数据库时，写操作递增cache_versions表中对应表的版本号
+（一般在同一事务中；高并发的选课/退选在提交后单独递增），
+各进程的缓存定期（至多每poll_interval秒一次）读取版本号，发现变化即丢弃依赖该表的条目。
+"""
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+# 每张表的版本号分散到多行，减少并发写操作争用同一行锁
+VERSION_SLOTS = 16
+
+_BUMP_SQL = """
+    INSERT INTO cache_versions (table_name, slot, version) VALUES (%s, %s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+
+def bump_version(db, table: str, key: Any = None):
+    """
+    递增表的版本号
+
+    一般在写操作的同一事务中调用，事务回滚时版本号一并回滚；高并发的写操作
+    （选课/退选）应在提交后于事务之外调用，避免事务持有共享的版本行锁。
+
+    Args:
+        db: DatabaseConnection实例
+        table: 被修改的表名
+        key: 被修改行的主键，用于选择版本行；None时使用第0行
+    """
+    slot = zlib.crc32(str(key).encode('utf-8')) % VERSION_SLOTS if key is not None else 0
+    db.execute_update(_BUMP_SQL, (table, slot))
+
+
+class CacheVersions:
+    """读取cache_versions表，找出自上次读取以来被其他事务修改过的表"""
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            table_name VARCHAR(64) NOT NULL COMMENT '表名',
+            slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '版本行编号',
+            version BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '版本号',
+            PRIMARY KEY (table_name, slot)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='缓存版本表'
+    """
+
+    def __init__(self, db, poll_interval: float = 2.0):
+        """
+        初始化版本读取器
+
+        Args:
+            db: DatabaseConnection实例
+            poll_interval: 两次读取版本表的最小间隔（秒）
+        """
+        self.db = db
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._versions = {}     # 表名 -> 各版本行之和
+        self._next_poll = 0.0
+        self.polls = 0
+        self.errors = 0
+
+    def poll(self, force: bool = False) -> Set[str]:
+        """
+        读取版本表（距上次读取不足poll_interval时直接返回空集合）
+
+        Returns:
+            版本号发生变化的表名（首次读取时为全部表）；读取失败时为空集合，下次到期再试
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_poll:
+                return set()
+            # 先占住本周期，其他线程不再重复读取
+            self._next_poll = now + self.poll_interval
+
+        try:
+            rows = self.db.execute_query(
+                "SELECT table_name, SUM(version) AS version FROM cache_versions GROUP BY table_name")
+        except Exception as e:
+            self.errors += 1
+            print(f"读取缓存版本失败: {e}")
+            return set()
+
+        current = {r['table_name']: int(r['version']) for r in rows}
+        with self._lock:
+            self.polls += 1
+            changed = {t for t in current.keys() | self._versions.keys()
+                       if current.get(t) != self._versions.get(t)}
+            self._versions = current
+        return changed
+
+
+class EntityCache:
+    """
+    进程内实体缓存（线程安全）
+
+    键一般为(实体类型, 主键)，如('student', '2024001')。只缓存查到的实体，
+    查不到（None）不缓存。字典及字典列表在存入和取出时都做浅拷贝，调用方修改返回值不影响缓存。
+
+    设置versions后，每次读取前检查版本表（至多每poll_interval秒一次），
+    丢弃依赖已变化表的实体类型（见depends_on）。
+    """
+
+    def __init__(self, max_size: int = 2000, ttl: float = 300.0,
+                 versions: Optional[CacheVersions] = None):
+        """
+        初始化缓存
+
+        Args:
+            max_size: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 条目有效秒数
+            versions: 跨进程版本读取器，为None时只依赖本进程的主动失效和TTL
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()    # key -> (过期时间, 值)
+        self._dependencies = {}          # 实体类型 -> 依赖的表名集合
+        self._generation = 0             # 每次丢弃数据（版本变化或主动失效）时递增
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0,
+            'invalidations': 0,
+            'stale_drops': 0,
+        }
+
+    def depends_on(self, namespace: str, *tables: str):
+        """声明实体类型依赖的表（这些表的版本号变化时丢弃该类型的全部条目）"""
+        with self._lock:
+            self._dependencies.setdefault(namespace, set()).update(tables)
+
+    def sync(self):
+        """检查版本表，丢弃其他进程修改过的数据（未到检查间隔时不查询）"""
+        if self.versions is None:
+            return
+        changed = self.versions.poll()
+        if not changed:
+            return
+        with self._lock:
+            stale = {ns for ns, tables in self._dependencies.items() if tables & changed}
+            if stale:
+                self._generation += 1
+            keys = [k for k in self._entries if isinstance(k, tuple) and k and k[0] in stale]
+            for key in keys:
+                del self._entries[key]
+            self.stats['stale_drops'] += len(keys)
+
+    @staticmethod
+    def _copy(value):
+        if isinstance(value, list):
+            return [dict(v) if isinstance(v, dict) else v for v in value]
+        return dict(value) if isinstance(value, dict) else value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取缓存值（未命中或已过期返回None）"""
+        self.sync()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._copy(value)
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        写入缓存（None不缓存）
+
+        Args:
+            generation: 开始加载时的代数；加载期间发生过版本变化或主动失效则不写入，以免缓存旧数据
+        """
+        if value is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, self._copy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], bypass: bool = False) -> Optional[Any]:
+        """
+        读穿：命中直接返回，否则调用loader加载并缓存
+
+        Args:
+            key: 缓存键
+            loader: 未命中时的加载函数
+            bypass: 为True时跳过缓存直接加载（加载结果仍会刷新缓存）
+        """
+        if not bypass:
+            value = self.get(key)
+            if value is not None:
+                return value
+        generation = self._generation
+        value = loader()
+        self.put(key, value, generation)
+        return value
+
+    def get_many_or_load(self, namespace: str, ids: Iterable[Hashable],
+                         loader: Callable[[List[Hashable]], Dict[Hashable, Any]],
+                         bypass: bool = False) -> Dict[Hashable, Any]:
+        """
+        批量读穿：命中的直接取缓存，其余ID一次交给loader加载
+
+        Args:
+            namespace: 实体类型，缓存键为(namespace, id)
+            ids: 要获取的ID（重复的只取一次）
+            loader: 接收未命中ID列表，返回{id: 值}
+            bypass: 为True时全部重新加载
+
+        Returns:
+            按ids顺序排列的{id: 值}，不存在的ID不出现在结果中
+        """
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        if not bypass:
+            self.sync()
+            now = time.monotonic()
+            with self._lock:
+                for id_ in ids:
+                    entry = self._entries.get((namespace, id_))
+                    if entry is None:
+                        self.stats['misses'] += 1
+                    elif now >= entry[0]:
+                        del self._entries[(namespace, id_)]
+                        self.stats['expired'] += 1
+                        self.stats['misses'] += 1
+                    else:
+                        self._entries.move_to_end((namespace, id_))
+                        self.stats['hits'] += 1
+                        found[id_] = self._copy(entry[1])
+
+        missing = [id_ for id_ in ids if id_ not in found]
+        if missing:
+            generation = self._generation
+            loaded = loader(missing)
+            for id_, value in loaded.items():
+                self.put((namespace, id_), value, generation)
+            found.update(loaded)
+        return {id_: found[id_] for id_ in ids if id_ in found}
+
+    def invalidate(self, key: Hashable):
+        """删除一个条目（正在进行的加载结果不再写入）"""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(key, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def invalidate_namespace(self, namespace: str):
+        """删除某类实体的全部条目（键的第一个元素为namespace）"""
+        with self._lock:
+            self._generation += 1
+            keys = [k for k in self._entries if isinstance(k, tuple) and k and k[0] == namespace]
+            for key in keys:
+                del self._entries[key]
+            self.stats['invalidations'] += len(keys)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中率等计数"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+            }
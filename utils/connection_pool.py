@@ -0,0 +1,204 @@
+"""
+connection_pool.py
+线程安全的数据库连接池
+"""
+import time
+import threading
+import logging
+from collections import deque
+from typing import Callable, Dict, Any, Optional
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """等待可用连接超时"""
+
+
+class ConnectionPool:
+    """有界连接池：支持最小/最大连接数、借出超时、借出前存活检测、空闲回收和最大生命周期"""
+
+    def __init__(self, factory: Callable[[], pymysql.Connection],
+                 min_size: int = 1, max_size: int = 10,
+                 timeout: float = 10.0, max_idle: float = 300.0,
+                 max_lifetime: float = 3600.0, ping_interval: float = 30.0):
+        """
+        初始化连接池
+
+        Args:
+            factory: 创建新连接的函数
+            min_size: 保持的最小空闲连接数
+            max_size: 最大连接数（含已借出）
+            timeout: 借出连接的默认等待秒数
+            max_idle: 空闲超过该秒数的连接被回收（保留min_size个）
+            max_lifetime: 连接存活超过该秒数后关闭重建
+            ping_interval: 空闲超过该秒数的连接在借出前先ping检测
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"连接池大小配置无效: min={min_size}, max={max_size}")
+
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._lock = threading.Condition()
+        self._idle = deque()          # (connection, last_used)
+        self._created_at = {}         # id(connection) -> 创建时间
+        self._size = 0                # 已创建且未关闭的连接数
+        self._closed = False
+
+        self.stats = {
+            'created': 0,
+            'closed': 0,
+            'borrowed': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+    def _open(self) -> pymysql.Connection:
+        """创建新连接（调用方已预留名额）"""
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self.stats['created'] += 1
+        return conn
+
+    def _close(self, conn: pymysql.Connection):
+        """关闭连接并释放名额（调用方持有锁）"""
+        self._created_at.pop(id(conn), None)
+        self._size -= 1
+        self.stats['closed'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._lock.notify()
+
+    def _expired(self, conn: pymysql.Connection, now: float) -> bool:
+        """连接是否超过最大生命周期"""
+        created = self._created_at.get(id(conn), now)
+        return self.max_lifetime > 0 and now - created > self.max_lifetime
+
+    def _reap_idle(self, now: float):
+        """回收空闲过久或超过生命周期的连接（调用方持有锁）"""
+        kept = deque()
+        while self._idle:
+            conn, last_used = self._idle.popleft()
+            idle_too_long = self.max_idle > 0 and now - last_used > self.max_idle
+            if self._expired(conn, now) or (idle_too_long and self._size > self.min_size):
+                self._close(conn)
+            else:
+                kept.append((conn, last_used))
+        self._idle = kept
+
+    def warmup(self):
+        """预先建立min_size个连接"""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open()
+            self.release(conn)
+
+    def acquire(self, timeout: Optional[float] = None) -> pymysql.Connection:
+        """
+        借出连接
+
+        Args:
+            timeout: 等待秒数，None表示使用默认值
+
+        Returns:
+            可用的数据库连接
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise pymysql.InterfaceError("连接池已关闭")
+
+                now = time.monotonic()
+                self._reap_idle(now)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self.stats['borrowed'] += 1
+                elif self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"等待数据库连接超时（{timeout}秒，最大连接数{self.max_size}）")
+                    self.stats['waits'] += 1
+                    self._lock.wait(remaining)
+                    continue
+
+            if conn is None:
+                conn = self._open()
+                with self._lock:
+                    self.stats['borrowed'] += 1
+                return conn
+
+            # 空闲较久的连接借出前做存活检测
+            if time.monotonic() - last_used >= self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    logger.info("检测到失效连接，已丢弃")
+                    with self._lock:
+                        self._close(conn)
+                    continue
+            return conn
+
+    def release(self, conn: pymysql.Connection, discard: bool = False):
+        """
+        归还连接
+
+        Args:
+            conn: 借出的连接
+            discard: 为True时直接关闭该连接（如发生网络错误）
+        """
+        with self._lock:
+            now = time.monotonic()
+            if discard or self._closed or not conn.open or self._expired(conn, now):
+                self._close(conn)
+            else:
+                self._idle.append((conn, now))
+                self._lock.notify()
+
+    def close_all(self):
+        """关闭连接池中的所有空闲连接，并拒绝后续借出"""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._close(conn)
+            self._lock.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        """获取连接池状态"""
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                **self.stats,
+            }
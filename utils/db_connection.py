@@ -3,78 +3,265 @@ db_connection.py
 数据库连接管理模块
 """
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.constants import CLIENT
+from pymysql.cursors import DictCursor, SSDictCursor
 from contextlib import contextmanager
+import time
 import logging
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
+
+from .connection_pool import ConnectionPool
+from .query_stats import QueryStats, _InstrumentedCursor
+from .tracing import Tracer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _is_connection_error(e: BaseException) -> bool:
+    """
+    错误是否意味着连接已不可用
+    
+    客户端错误码（>=2000，如2006/2013连接断开）需要丢弃连接；
+    死锁、锁等待超时等服务端错误不影响连接本身，可以归还连接池。
+    """
+    if isinstance(e, pymysql.InterfaceError):
+        return True
+    if isinstance(e, pymysql.OperationalError):
+        code = e.args[0] if e.args and isinstance(e.args[0], int) else 2000
+        return code >= 2000
+    return False
+
+
+class TransactionRollbackError(Exception):
+    """事务内有语句失败，整个事务已回滚"""
+
+
+class _TransactionState:
+    """当前线程正在进行的事务"""
+    
+    def __init__(self, pool: ConnectionPool, connection: pymysql.Connection):
+        self.pool = pool
+        self.connection = connection
+        self.depth = 1
+        self.rollback_only = False
+        self.discard = False
+
+
 class DatabaseConnection:
-    """数据库连接管理类"""
+    """数据库连接管理类（基于连接池，线程安全）"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], pool_config: Optional[Dict[str, Any]] = None,
+                 query_stats: Optional[QueryStats] = None, tracer: Optional[Tracer] = None,
+                 multi_statements: bool = True):
         """
         初始化数据库连接
         
         Args:
             config: 数据库配置字典
+            pool_config: 连接池配置（min_size/max_size/timeout/max_idle/max_lifetime/ping_interval）
+            query_stats: SQL执行统计收集器，为None时不统计
+            tracer: 追踪记录器，SQL作为当前span的子span记录，为None时不追踪
+            multi_statements: execute_batch是否使用多语句协议一次往返发送多条查询；
+                              只有execute_batch专用连接池中的连接启用该协议，普通连接始终
+                              一次只执行一条语句。服务端或代理不支持时设为False，execute_batch改为逐条执行
         """
         self.config = config
-        self.connection = None
+        self.multi_statements = multi_statements
+        self.pool_config = pool_config or {}
+        self.query_stats = query_stats
+        self.tracer = tracer
+        self._extra_recorders = []
+        self.pool = None
+        self.batch_pool = None
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
         
-    def connect(self) -> pymysql.Connection:
-        """建立数据库连接"""
+    def _create_connection(self, multi_statements: bool = False) -> pymysql.Connection:
+        """创建一个新的物理连接（multi_statements为True时启用多语句协议，仅供execute_batch使用）"""
         try:
-            if not self.connection or not self.connection.open:
-                # 特殊处理student_management数据库
-                config = self.config.copy()
-                if config.get('database') == 'student_management':
-                    # 先连接到oceanbase，再切换数据库
-                    config['database'] = 'oceanbase'
-                    
-                self.connection = pymysql.connect(
+            # 特殊处理student_management数据库
+            config = self.config.copy()
+            if multi_statements:
+                config['client_flag'] = config.get('client_flag', 0) | CLIENT.MULTI_STATEMENTS
+            if config.get('database') == 'student_management':
+                # 先连接到oceanbase，再切换数据库
+                config['database'] = 'oceanbase'
+                
+            try:
+                connection = pymysql.connect(
+                    **config,
+                    cursorclass=DictCursor,
+                    autocommit=False
+                )
+            except pymysql.OperationalError as e:
+                # 1049: 不存在oceanbase库（如本地MySQL测试环境），直接连接目标库
+                if e.args[0] != 1049 or config.get('database') == self.config.get('database'):
+                    raise
+                config['database'] = self.config.get('database')
+                connection = pymysql.connect(
                     **config,
                     cursorclass=DictCursor,
                     autocommit=False
                 )
+            
+            # 如果目标是student_management，切换到该数据库
+            if self.config.get('database') == 'student_management':
+                cursor = connection.cursor()
+                cursor.execute("USE student_management")
+                cursor.close()
                 
-                # 如果目标是student_management，切换到该数据库
-                if self.config.get('database') == 'student_management':
-                    cursor = self.connection.cursor()
-                    cursor.execute("USE student_management")
-                    cursor.close()
-                    
-                logger.info(f"成功连接到数据库: {self.config['host']}:{self.config['port']}")
-            return self.connection
+            logger.info(f"成功连接到数据库: {self.config['host']}:{self.config['port']}")
+            return connection
         except pymysql.Error as e:
             logger.error(f"数据库连接失败: {e}")
             raise
+            
+    def connect(self) -> ConnectionPool:
+        """建立连接池并预热最小连接数"""
+        with self._pool_lock:
+            if self.pool is None:
+                self.pool = ConnectionPool(self._create_connection, **self.pool_config)
+            pool = self.pool
+        pool.warmup()
+        return pool
+                
+    def _batch_pool(self) -> ConnectionPool:
+        """execute_batch专用的多语句连接池（首次使用时建立，不预热）"""
+        with self._pool_lock:
+            if self.batch_pool is None:
+                self.batch_pool = ConnectionPool(lambda: self._create_connection(multi_statements=True),
+                                                 **{**self.pool_config, 'min_size': 0})
+            return self.batch_pool
                 
     def disconnect(self):
-        """关闭数据库连接"""
-        if self.connection:
-            try:
-                self.connection.close()
-                logger.info("数据库连接已关闭")
-            except pymysql.Error as e:
-                logger.error(f"关闭连接失败: {e}")
+        """关闭连接池中的所有连接"""
+        with self._pool_lock:
+            pool, self.pool = self.pool, None
+            batch_pool, self.batch_pool = self.batch_pool, None
+        if batch_pool:
+            batch_pool.close_all()
+        if pool:
+            pool.close_all()
+            logger.info("数据库连接已关闭")
+            
+    def pool_status(self) -> Dict[str, Any]:
+        """获取连接池状态"""
+        return self.pool.status() if self.pool else {}
                 
+    def add_recorder(self, recorder):
+        """添加语句记录器（需提供record(sql, params, elapsed, rows, error)）"""
+        with self._pool_lock:
+            self._extra_recorders = self._extra_recorders + [recorder]
+            
+    def remove_recorder(self, recorder):
+        """移除语句记录器"""
+        with self._pool_lock:
+            self._extra_recorders = [r for r in self._extra_recorders if r is not recorder]
+            
+    def _recorders(self) -> list:
+        """需要记录每条语句耗时的统计/追踪器"""
+        return [r for r in (self.query_stats, self.tracer) if r is not None] + self._extra_recorders
+        
+    def _cursor(self, connection: pymysql.Connection):
+        """创建游标（开启统计或追踪时包装为计时游标）"""
+        cursor = connection.cursor()
+        recorders = self._recorders()
+        return _InstrumentedCursor(cursor, recorders) if recorders else cursor
+        
+    def _current_transaction(self) -> Optional[_TransactionState]:
+        """获取当前线程的事务（没有则返回None）"""
+        return getattr(self._local, 'transaction', None)
+        
+    def in_transaction(self) -> bool:
+        """当前线程是否处于transaction()块中"""
+        return self._current_transaction() is not None
+        
+    @contextmanager
+    def transaction(self):
+        """
+        事务上下文管理器：块内所有语句共用一个连接并只提交一次
+        
+        嵌套调用会加入外层事务；任何异常（包括块内被模型捕获的数据库错误）
+        都会使整个事务回滚。
+        
+        Yields:
+            事务使用的连接
+        """
+        tx = self._current_transaction()
+        if tx is not None:
+            # 加入外层事务
+            tx.depth += 1
+            try:
+                yield tx.connection
+            except BaseException:
+                tx.rollback_only = True
+                raise
+            finally:
+                tx.depth -= 1
+            return
+            
+        pool = self.pool or self.connect()
+        tx = _TransactionState(pool, pool.acquire())
+        self._local.transaction = tx
+        try:
+            yield tx.connection
+            if tx.rollback_only:
+                raise TransactionRollbackError("事务中有语句执行失败，已回滚全部操作")
+            tx.connection.commit()
+        except BaseException as e:
+            try:
+                tx.connection.rollback()
+            except pymysql.Error:
+                tx.discard = True
+            if _is_connection_error(e):
+                tx.discard = True
+            raise
+        finally:
+            self._local.transaction = None
+            pool.release(tx.connection, discard=tx.discard)
+            
     @contextmanager
     def get_cursor(self):
-        """获取数据库游标的上下文管理器"""
-        connection = self.connect()
-        cursor = connection.cursor()
+        """获取数据库游标的上下文管理器（自动借出并归还连接；在事务中时使用事务连接）"""
+        tx = self._current_transaction()
+        if tx is not None:
+            cursor = self._cursor(tx.connection)
+            try:
+                yield cursor
+            except pymysql.Error as e:
+                # 由外层事务统一回滚
+                tx.rollback_only = True
+                if _is_connection_error(e):
+                    tx.discard = True
+                logger.error(f"数据库操作失败: {e}")
+                raise
+            finally:
+                cursor.close()
+            return
+            
+        pool = self.pool or self.connect()
+        connection = pool.acquire()
+        discard = False
+        cursor = self._cursor(connection)
         try:
             yield cursor
             connection.commit()
-        except pymysql.Error as e:
-            connection.rollback()
-            logger.error(f"数据库操作失败: {e}")
+        except BaseException as e:
+            # 归还前必须回滚，避免把未完成的事务留给下一个借用者
+            try:
+                connection.rollback()
+            except pymysql.Error:
+                discard = True
+            if _is_connection_error(e):
+                discard = True
+            if isinstance(e, pymysql.Error):
+                logger.error(f"数据库操作失败: {e}")
             raise
         finally:
             cursor.close()
+            pool.release(connection, discard=discard)
             
     def execute_query(self, query: str, params: Optional[tuple] = None) -> list:
         """
@@ -91,6 +278,115 @@ class DatabaseConnection:
             cursor.execute(query, params)
             return cursor.fetchall()
             
+    def execute_batch(self, statements: List[Tuple[str, Optional[tuple]]]) -> List[list]:
+        """
+        一次往返执行多条互不依赖的查询
+        
+        启用多语句协议时从专用连接池借出连接，把各语句按参数展开后以分号拼接发送，
+        再依次读取各结果集；在事务中或未启用时在同一连接上逐条执行。
+        
+        Args:
+            statements: [(SQL, 参数), ...]
+            
+        Returns:
+            与statements顺序一致的结果集列表
+        """
+        if not statements:
+            return []
+        if not self.multi_statements or len(statements) == 1 or self.in_transaction():
+            with self.get_cursor() as cursor:
+                results = []
+                for query, params in statements:
+                    cursor.execute(query, params)
+                    results.append(cursor.fetchall())
+                return results
+                
+        pool = self._batch_pool()
+        connection = pool.acquire()
+        discard = False
+        cursor = self._cursor(connection)
+        try:
+            query = ';\n'.join(cursor.mogrify(q.strip().rstrip(';'), p) for q, p in statements)
+            cursor.execute(query)
+            results = [cursor.fetchall()]
+            while cursor.nextset():
+                results.append(cursor.fetchall())
+            connection.commit()
+            return results
+        except BaseException as e:
+            # 未读完的结果集会使连接不可复用，出错时直接丢弃
+            discard = True
+            if isinstance(e, pymysql.Error):
+                logger.error(f"数据库操作失败: {e}")
+            raise
+        finally:
+            try:
+                cursor.close()
+            except pymysql.Error:
+                discard = True
+            pool.release(connection, discard=discard)
+            
+    def iter_query(self, query: str, params: Optional[tuple] = None,
+                   batch_size: int = 1000,
+                   batches: bool = False) -> Iterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        流式执行查询语句（服务端游标，不在内存中缓存整个结果集）
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            batch_size: 每次从服务端读取的行数
+            batches: 为True时按批返回行列表，否则逐行返回
+            
+        Yields:
+            单行字典或行字典列表
+        """
+        tx = self._current_transaction()
+        if tx is not None:
+            pool, connection = None, tx.connection
+        else:
+            pool = self.pool or self.connect()
+            connection = pool.acquire()
+        cursor = connection.cursor(SSDictCursor)
+        finished = False
+        # 统计时只计执行和读取耗时，不含调用方处理每批数据的时间
+        elapsed = 0.0
+        row_count = 0
+        failed = False
+        try:
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                elapsed += time.perf_counter() - started
+                if not rows:
+                    break
+                row_count += len(rows)
+                if batches:
+                    yield rows
+                else:
+                    yield from rows
+                started = time.perf_counter()
+            finished = True
+            cursor.close()
+            if pool:
+                connection.commit()
+        except pymysql.Error as e:
+            failed = True
+            if tx is not None:
+                tx.rollback_only = True
+            logger.error(f"数据库操作失败: {e}")
+            raise
+        finally:
+            for recorder in self._recorders():
+                recorder.record(query, params, elapsed, row_count, failed)
+            if pool:
+                # 未读完的无缓冲结果集会阻塞连接，直接丢弃比读完剩余行更快
+                pool.release(connection, discard=not finished)
+            elif not finished:
+                # 事务连接还要继续使用，只能读完剩余结果
+                cursor.close()
+            
     def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
         """
         执行更新语句
@@ -121,6 +417,32 @@ class DatabaseConnection:
             cursor.executemany(query, params_list)
             return cursor.rowcount
             
+    # IN列表每批最多的值个数（避免超长语句和过多占位符）
+    IN_CHUNK_SIZE = 500
+    
+    def execute_query_in(self, query: str, values: list, params: Optional[tuple] = None,
+                         chunk_size: int = None) -> list:
+        """
+        按IN列表分批执行查询并合并结果
+        
+        Args:
+            query: 含{placeholders}占位的SQL，如 "SELECT * FROM t WHERE id IN ({placeholders})"
+            values: IN列表中的值
+            params: IN列表之前的其他参数
+            chunk_size: 每批的值个数，默认IN_CHUNK_SIZE
+            
+        Returns:
+            各批查询结果按批次顺序拼接的列表
+        """
+        chunk_size = chunk_size or self.IN_CHUNK_SIZE
+        values = list(values)
+        rows = []
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            sql = query.format(placeholders=', '.join(['%s'] * len(chunk)))
+            rows.extend(self.execute_query(sql, (*(params or ()), *chunk)))
+        return rows
+        
     def test_connection(self) -> bool:
         """测试数据库连接"""
         try:
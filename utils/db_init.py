@@ -3,6 +3,8 @@
 db_init.py
 数据库初始化脚本 - 自动创建数据库和表结构
 """
+import os
+import sys
 import pymysql
 from pymysql.cursors import DictCursor
 
@@ -147,6 +149,48 @@ class DatabaseInitializer:
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='选课记录表'
             """,
             
+            'course_enrollment_counts': """
+                CREATE TABLE IF NOT EXISTS course_enrollment_counts (
+                    course_id VARCHAR(20) NOT NULL COMMENT '课程编号',
+                    semester VARCHAR(20) NOT NULL COMMENT '学期',
+                    enrolled_count INT NOT NULL DEFAULT 0 COMMENT '已选人数',
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    PRIMARY KEY (course_id, semester)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='课程选课人数计数表'
+            """,
+            
+            'student_search_tokens': """
+                CREATE TABLE IF NOT EXISTS student_search_tokens (
+                    token VARCHAR(8) NOT NULL COMMENT '词元（单字或二元组）',
+                    student_id VARCHAR(20) NOT NULL COMMENT '学号',
+                    field VARCHAR(10) NOT NULL COMMENT '来源字段',
+                    PRIMARY KEY (token, field, student_id),
+                    INDEX idx_student (student_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='学生搜索倒排索引'
+            """,
+            
+            'cache_versions': """
+                CREATE TABLE IF NOT EXISTS cache_versions (
+                    table_name VARCHAR(64) NOT NULL COMMENT '表名',
+                    slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '版本行编号',
+                    version BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '版本号',
+                    PRIMARY KEY (table_name, slot)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='缓存版本表'
+            """,
+            
+            'statistics_summary': """
+                CREATE TABLE IF NOT EXISTS statistics_summary (
+                    stat VARCHAR(20) NOT NULL COMMENT '汇总类型',
+                    k1 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键1',
+                    k2 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键2',
+                    k3 VARCHAR(100) NOT NULL DEFAULT '' COMMENT '分组键3',
+                    slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '分散行编号',
+                    item_count BIGINT NOT NULL DEFAULT 0 COMMENT '计数',
+                    value_sum DECIMAL(20,2) NOT NULL DEFAULT 0 COMMENT '求和',
+                    PRIMARY KEY (stat, k1, k2, k3, slot)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计汇总表'
+            """,
+            
             'system_users': """
                 CREATE TABLE IF NOT EXISTS system_users (
                     user_id INT AUTO_INCREMENT PRIMARY KEY COMMENT '用户ID',
@@ -246,6 +290,13 @@ class DatabaseInitializer:
                 students_data
             )
             
+            # 建立学生搜索索引
+            from models.search_index import StudentSearchIndex, index_rows
+            cursor.executemany(
+                StudentSearchIndex.INSERT_SQL,
+                [row for s in students_data for row in index_rows(s[0], s[1], s[4])]
+            )
+            
             # 插入课程数据
             print("  插入课程数据...")
             courses_data = [
@@ -281,6 +332,19 @@ class DatabaseInitializer:
                 enrollments_data
             )
             
+            # 初始化选课人数计数
+            cursor.execute(
+                "INSERT IGNORE INTO course_enrollment_counts (course_id, semester, enrolled_count) "
+                "SELECT course_id, semester, COUNT(*) FROM enrollments GROUP BY course_id, semester"
+            )
+            
+            # 初始化统计汇总
+            from models.summary import REBUILD_SQL
+            cursor.execute("DELETE FROM statistics_summary")
+            for select in REBUILD_SQL.values():
+                cursor.execute(
+                    "INSERT INTO statistics_summary (stat, k1, k2, k3, slot, item_count, value_sum) " + select)
+            
             # 插入系统用户（使用MD5作为简单哈希）
             print("  插入系统用户...")
             # 密码: admin123, teacher123, student123
@@ -346,6 +410,8 @@ def check_database(db_config):
 
 # 独立运行时
 if __name__ == '__main__':
+    # 添加项目根目录到路径（初始数据的搜索索引切分在models中）
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     config = {
         'host': '127.0.0.1',
         'port': 2881,
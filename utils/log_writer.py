@@ -0,0 +1,170 @@
+"""
+log_writer.py
+操作日志异步批量写入器
+"""
+import atexit
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class OperationLogWriter:
+    """
+    操作日志异步写入器
+
+    日志先放入内存队列，由后台线程在攒够batch_size条或每隔flush_interval秒时
+    用executemany一次写入。队列有上限，满时按policy处理：
+        block       - 调用方最多等待put_timeout秒，仍满则丢弃新日志
+        drop_new    - 直接丢弃新日志
+        drop_oldest - 丢弃队列中最旧的日志
+
+    User.log_operation/log_operations只把事务之外的日志交给写入器；
+    事务中的日志用一条executemany在事务连接上写入。
+    """
+
+    INSERT_SQL = """
+        INSERT INTO operation_logs
+        (user_id, username, role, operation, table_name, record_id, ip_address, operation_time)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
+    POLICIES = ('block', 'drop_new', 'drop_oldest')
+
+    def __init__(self, db_connection, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_queue: int = 10000, policy: str = 'block', put_timeout: float = 1.0):
+        """
+        初始化日志写入器
+
+        Args:
+            db_connection: DatabaseConnection实例
+            batch_size: 每批写入的最大条数
+            flush_interval: 最长刷新间隔（秒）
+            max_queue: 队列最大长度
+            policy: 队列满时的处理策略
+            put_timeout: block策略下的最长等待秒数
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"未知的队列满处理策略: {policy}")
+
+        self.db = db_connection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.policy = policy
+        self.put_timeout = put_timeout
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {
+            'submitted': 0,
+            'flushed': 0,
+            'dropped': 0,
+            'failed': 0,
+        }
+
+        self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry: tuple) -> bool:
+        """
+        提交一条日志（不含operation_time，按提交时间记录）
+
+        Args:
+            entry: (user_id, username, role, operation, table_name, record_id, ip_address)
+
+        Returns:
+            是否进入队列（False表示被丢弃）
+        """
+        row = tuple(entry) + (datetime.now(),)
+
+        with self._cond:
+            if self._closed:
+                self.stats['dropped'] += 1
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                if self.policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.stats['dropped'] += 1
+                elif self.policy == 'block':
+                    self._cond.notify_all()
+                    self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed,
+                                        self.put_timeout)
+                    if len(self._queue) >= self.max_queue or self._closed:
+                        self.stats['dropped'] += 1
+                        return False
+                else:
+                    self.stats['dropped'] += 1
+                    return False
+
+            self._queue.append(row)
+            self.stats['submitted'] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def _take_batch(self) -> list:
+        """从队列取出一批日志（调用方持有锁）"""
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        self._cond.notify_all()
+        return batch
+
+    def _write(self, batch: list):
+        """写入一批日志"""
+        if not batch:
+            return
+        with self._write_lock:
+            try:
+                self.db.execute_many(self.INSERT_SQL, batch)
+                with self._cond:
+                    self.stats['flushed'] += len(batch)
+            except Exception as e:
+                logger.error(f"写入操作日志失败（{len(batch)}条已丢弃）: {e}")
+                with self._cond:
+                    self.stats['failed'] += len(batch)
+
+    def _run(self):
+        """后台刷新线程"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._queue) >= self.batch_size or self._closed,
+                                    self.flush_interval)
+                if self._closed:
+                    return
+                batch = self._take_batch()
+            self._write(batch)
+
+    def flush(self):
+        """立即写入队列中的全部日志"""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 5.0):
+        """停止后台线程并写入剩余日志（可重复调用）"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self.flush()
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取计数器"""
+        with self._cond:
+            return {**self.stats, 'pending': len(self._queue)}
@@ -0,0 +1,76 @@
+"""
+pager.py
+键集分页器：基于模型的page(after_id, limit, filters, before_id)接口前后翻页
+"""
+from typing import Callable, Dict, Any, List, Optional
+
+
+class KeysetPager:
+    """
+    键集分页器
+
+    每次多取一行判断是否还有下一页（上一页），不需要COUNT(*)，
+    因此第一页和任意一页的耗时都与表的大小无关。
+    """
+
+    def __init__(self, fetch: Callable[..., List[Dict[str, Any]]], key: str,
+                 page_size: int = 20, filters: Optional[Dict[str, Any]] = None):
+        """
+        初始化分页器
+
+        Args:
+            fetch: 模型的page方法，如Student.page
+            key: 排序键字段名，如student_id
+            page_size: 每页条数
+            filters: 传给fetch的筛选条件
+        """
+        self.fetch = fetch
+        self.key = key
+        self.page_size = page_size
+        self.filters = filters
+        self.rows = []
+        self.page_no = 0
+        self.has_next = False
+        self.has_prev = False
+
+    def first(self) -> List[Dict[str, Any]]:
+        """第一页"""
+        rows = self.fetch(limit=self.page_size + 1, filters=self.filters)
+        self.has_next = len(rows) > self.page_size
+        self.has_prev = False
+        self.rows = rows[:self.page_size]
+        self.page_no = 1
+        return self.rows
+
+    def next(self) -> List[Dict[str, Any]]:
+        """下一页（没有下一页时停在当前页）"""
+        if not self.rows:
+            return self.first()
+        if not self.has_next:
+            return self.rows
+        rows = self.fetch(after_id=self.rows[-1][self.key], limit=self.page_size + 1,
+                          filters=self.filters)
+        if not rows:
+            # 其余行在翻页期间被删除
+            self.has_next = False
+            return self.rows
+        self.has_next = len(rows) > self.page_size
+        self.has_prev = True
+        self.rows = rows[:self.page_size]
+        self.page_no += 1
+        return self.rows
+
+    def prev(self) -> List[Dict[str, Any]]:
+        """上一页（已在第一页时停在当前页）"""
+        if not self.rows or not self.has_prev:
+            return self.rows
+        rows = self.fetch(before_id=self.rows[0][self.key], limit=self.page_size + 1,
+                          filters=self.filters)
+        if not rows:
+            return self.first()
+        self.has_prev = len(rows) > self.page_size
+        self.has_next = True
+        self.rows = rows[-self.page_size:]
+        # 前面的行在翻页期间被删除时，不足一页说明已回到第一页
+        self.page_no = self.page_no - 1 if self.has_prev else 1
+        return self.rows
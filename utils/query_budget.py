@@ -0,0 +1,147 @@
+"""
+query_budget.py
+SQL语句预算与N+1检测：统计一段代码执行的语句数，超出预算或出现循环内逐行查询时报警
+
+开发模式下由客户端处理函数上的@budgeted声明预算；测试中可直接使用
+（fake_db夹具见tests/conftest.py，客户端功能的预算检查见tests/test_query_budget.py）：
+
+    def test_get_by_id_is_one_query(fake_db):
+        with assert_max_queries(fake_db, 1):
+            Student(fake_db).get_by_id('2024001')
+"""
+import logging
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from .query_stats import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 同一语句以不同参数执行达到该次数即视为N+1
+DEFAULT_REPEAT_THRESHOLD = 5
+
+MODES = ('warn', 'raise')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """语句数超出预算或检测到N+1查询"""
+
+
+class QueryBudgetReport:
+    """一段代码执行的语句统计"""
+
+    def __init__(self, name: str, max_queries: Optional[int], repeat_threshold: int):
+        self.name = name
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        self.statements = []    # [(指纹, 参数repr)]
+
+    @property
+    def total(self) -> int:
+        """语句总数"""
+        return len(self.statements)
+
+    def by_fingerprint(self) -> Dict[str, int]:
+        """各语句指纹的执行次数"""
+        return dict(Counter(fp for fp, _ in self.statements))
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """疑似N+1的语句：同一指纹以不同参数执行达到阈值次数"""
+        params = defaultdict(set)
+        counts = Counter()
+        for fp, param_key in self.statements:
+            params[fp].add(param_key)
+            counts[fp] += 1
+        return [(fp, n) for fp, n in counts.most_common()
+                if n >= self.repeat_threshold and len(params[fp]) > 1]
+
+    def problems(self) -> List[str]:
+        """违反预算的说明，为空表示通过"""
+        problems = []
+        if self.max_queries is not None and self.total > self.max_queries:
+            problems.append(f"执行了 {self.total} 条语句，超出预算 {self.max_queries} 条")
+        for fp, n in self.repeated():
+            problems.append(f"疑似N+1：以不同参数执行 {n} 次: {fp[:120]}")
+        return problems
+
+    def format(self) -> str:
+        """问题和语句明细"""
+        lines = [f"[{self.name or '代码块'}] " + '；'.join(self.problems())]
+        for fp, n in sorted(self.by_fingerprint().items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {n:>4} × {fp[:120]}")
+        return '\n'.join(lines)
+
+
+class _BlockRecorder:
+    """只记录创建它的线程执行的语句"""
+
+    def __init__(self, report: QueryBudgetReport):
+        self.report = report
+        self.thread_id = threading.get_ident()
+
+    def record(self, sql: str, params, elapsed: float, rows: int = 0, error: bool = False):
+        if threading.get_ident() == self.thread_id:
+            self.report.statements.append((fingerprint(sql), repr(params)))
+
+
+@contextmanager
+def query_budget(db, max_queries: Optional[int] = None, name: str = '', mode: str = 'raise',
+                 repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+    """
+    统计块内当前线程经db执行的语句，退出时检查预算和N+1
+
+    Args:
+        db: DatabaseConnection实例
+        max_queries: 语句数上限，None表示只检测N+1
+        name: 报告中显示的名称
+        mode: raise（抛出QueryBudgetExceeded）或warn（写警告日志）
+        repeat_threshold: N+1判定阈值
+
+    Yields:
+        QueryBudgetReport（块结束后可查看统计）
+    """
+    if mode not in MODES:
+        raise ValueError(f"未知的预算检查模式: {mode}")
+
+    report = QueryBudgetReport(name, max_queries, repeat_threshold)
+    recorder = _BlockRecorder(report)
+    db.add_recorder(recorder)
+    try:
+        yield report
+    finally:
+        db.remove_recorder(recorder)
+
+    # 块内抛出异常时不会执行到这里，避免掩盖原始错误
+    if report.problems():
+        if mode == 'raise':
+            raise QueryBudgetExceeded(report.format())
+        logger.warning(report.format())
+
+
+def assert_max_queries(db, max_queries: Optional[int], name: str = '',
+                       repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+    """测试用：块内语句数超过max_queries或出现N+1时断言失败"""
+    return query_budget(db, max_queries, name, 'raise', repeat_threshold)
+
+
+def budgeted(max_queries: Optional[int] = None):
+    """
+    为对象方法声明语句预算
+
+    对象的query_budget_mode属性为warn/raise时检查（开发模式），为None时不检查；
+    语句通过对象的db_conn统计。
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            mode = getattr(self, 'query_budget_mode', None)
+            if not mode:
+                return func(self, *args, **kwargs)
+            with query_budget(self.db_conn, max_queries, func.__name__, mode):
+                return func(self, *args, **kwargs)
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
@@ -0,0 +1,253 @@
+"""
+query_stats.py
+SQL执行统计：按语句指纹汇总次数、耗时、行数和耗时分布，记录慢查询日志
+"""
+import os
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+slow_logger = logging.getLogger('sms.slow_query')
+
+# 耗时分布桶上限（毫秒），最后一个桶收集更慢的语句
+HISTOGRAM_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_RE = re.compile(r'(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+
+class _LazyFileHandler(logging.FileHandler):
+    """第一条慢查询写入时才创建目录和文件的日志处理器"""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def fingerprint(sql: str) -> str:
+    """
+    规范化SQL语句：去掉注释、合并空白，字面量和占位符替换为?，
+    IN列表和多行VALUES折叠为一项，使参数不同的同一语句归为一类
+    """
+    sql = _COMMENT_RE.sub(' ', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _PLACEHOLDER_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _SPACE_RE.sub(' ', sql).strip()
+    sql = _IN_LIST_RE.sub('(?+)', sql)
+    sql = _VALUES_RE.sub(r'\1', sql)
+    return sql
+
+
+def redact_params(params) -> str:
+    """隐藏参数值，只保留类型和长度（慢查询日志不记录学号、密码哈希等内容）"""
+    if params is None:
+        return '-'
+
+    def describe(value):
+        if value is None:
+            return 'NULL'
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}({len(value)})"
+        return type(value).__name__
+
+    if isinstance(params, dict):
+        return '{' + ', '.join(f"{k}: {describe(v)}" for k, v in params.items()) + '}'
+    if isinstance(params, (list, tuple)):
+        return '(' + ', '.join(describe(v) for v in params) + ')'
+    return describe(params)
+
+
+class _StatementStats:
+    """单个语句指纹的累计数据"""
+
+    __slots__ = ('count', 'total', 'max', 'rows', 'errors', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+
+class QueryStats:
+    """
+    SQL执行统计收集器（线程安全）
+
+    DatabaseConnection在每条语句执行后调用record()。耗时超过slow_threshold_ms的语句
+    写入'sms.slow_query'日志（参数已隐藏），最近的慢查询同时保存在内存中供界面查看。
+    """
+
+    def __init__(self, slow_threshold_ms: float = 200.0, slow_log_path: Optional[str] = None,
+                 max_slow_entries: int = 100):
+        """
+        初始化统计收集器
+
+        Args:
+            slow_threshold_ms: 慢查询阈值（毫秒）
+            slow_log_path: 慢查询日志文件，为None时只输出到日志系统
+            max_slow_entries: 内存中保留的最近慢查询条数
+        """
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._slow = deque(maxlen=max_slow_entries)
+        self._started_at = datetime.now()
+
+        if slow_log_path and not any(getattr(h, 'baseFilename', None) == os.path.abspath(slow_log_path)
+                                     for h in slow_logger.handlers):
+            handler = _LazyFileHandler(slow_log_path, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            slow_logger.addHandler(handler)
+            # 写入文件时不再输出到控制台，以免打断交互菜单
+            slow_logger.propagate = False
+        self.slow_log_path = slow_log_path
+
+    def record(self, sql: str, params, elapsed: float, rows: int = 0, error: bool = False):
+        """
+        记录一次语句执行
+
+        Args:
+            sql: 原始SQL
+            params: 参数（只用于慢查询日志，且会被隐藏）
+            elapsed: 耗时（秒）
+            rows: 返回或影响的行数
+            error: 是否执行失败
+        """
+        key = fingerprint(sql)
+        elapsed_ms = elapsed * 1000
+        bucket = bisect_left(HISTOGRAM_BUCKETS_MS, elapsed_ms)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _StatementStats()
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.rows += max(rows or 0, 0)
+            stats.errors += int(error)
+            stats.histogram[bucket] += 1
+
+            if elapsed_ms >= self.slow_threshold_ms:
+                entry = {
+                    'time': datetime.now().isoformat(timespec='seconds'),
+                    'elapsed_ms': round(elapsed_ms, 3),
+                    'rows': rows,
+                    'fingerprint': key,
+                    'params': redact_params(params),
+                }
+                self._slow.append(entry)
+            else:
+                entry = None
+
+        if entry:
+            slow_logger.warning(f"慢查询 {entry['elapsed_ms']}ms rows={rows} "
+                                f"params={entry['params']} sql={key}")
+
+    def snapshot(self, order_by: str = 'total_ms', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        获取各语句指纹的统计
+
+        Args:
+            order_by: 排序字段（total_ms/mean_ms/max_ms/count/rows）
+            limit: 最多返回条数
+
+        Returns:
+            统计列表，按order_by降序
+        """
+        labels = [f"<={b}ms" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            result = [{
+                'fingerprint': key,
+                'count': s.count,
+                'total_ms': round(s.total * 1000, 3),
+                'mean_ms': round(s.total / s.count * 1000, 3) if s.count else 0.0,
+                'max_ms': round(s.max * 1000, 3),
+                'rows': s.rows,
+                'errors': s.errors,
+                'histogram': dict(zip(labels, s.histogram)),
+            } for key, s in self._stats.items()]
+
+        result.sort(key=lambda r: r[order_by], reverse=True)
+        return result[:limit] if limit else result
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """最近的慢查询（新的在前）"""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def summary(self) -> Dict[str, Any]:
+        """总体统计"""
+        with self._lock:
+            count = sum(s.count for s in self._stats.values())
+            total = sum(s.total for s in self._stats.values())
+            return {
+                'since': self._started_at.isoformat(timespec='seconds'),
+                'statements': len(self._stats),
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'slow': len(self._slow),
+            }
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._started_at = datetime.now()
+
+
+class _InstrumentedCursor:
+    """给游标的execute/executemany计时的包装（其余属性透传）"""
+
+    def __init__(self, cursor, recorders: list):
+        """
+        Args:
+            cursor: 原始游标
+            recorders: 记录器列表，每个都提供record(sql, params, elapsed, rows, error)
+        """
+        self._cursor = cursor
+        self._recorders = recorders
+
+    def _record(self, query, args, elapsed, rows=0, error=False):
+        for recorder in self._recorders:
+            recorder.record(query, args, elapsed, rows, error)
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            result = self._cursor.execute(query, args)
+        except Exception:
+            self._record(query, args, time.perf_counter() - started, error=True)
+            raise
+        self._record(query, args, time.perf_counter() - started, self._cursor.rowcount)
+        return result
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            result = self._cursor.executemany(query, args)
+        except Exception:
+            self._record(query, None, time.perf_counter() - started, error=True)
+            raise
+        self._record(query, None, time.perf_counter() - started, self._cursor.rowcount)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
@@ -0,0 +1,222 @@
+"""
+tracing.py
+操作级追踪：客户端每个功能一个span，其中执行的SQL作为子span，导出Chrome trace-event格式
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, List, Optional
+
+from .query_stats import fingerprint
+
+# 当前线程打开的span栈（所有Tracer共用，等待输入时整栈暂停）
+_local = threading.local()
+
+
+def _stack() -> list:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _Span:
+    """一个正在进行的span"""
+
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'segment_start', 'active', 'queries', 'parts')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.segment_start = time.perf_counter()
+        self.active = 0.0
+        self.queries = 0
+        self.parts = 0
+
+
+class Tracer:
+    """
+    追踪记录器（线程安全）
+
+    span只统计服务端耗时：等待用户输入时（见pause/wait_input）当前线程所有打开的span
+    会在暂停处截断，恢复后开始新的一段，因此一个span在时间线上可能分为多段（args.part）。
+    最后一段的args带有整个span的active_ms和queries。
+
+    导出格式：
+        json  - {"traceEvents": [...]}，close/flush时整体写入，可直接用chrome://tracing或Perfetto打开
+        jsonl - 每个事件一行，每个顶层span结束时追加写入
+    """
+
+    FORMATS = ('json', 'jsonl')
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        """
+        初始化追踪记录器
+
+        Args:
+            path: 输出文件
+            fmt: json或jsonl，为None时按扩展名判断
+        """
+        fmt = fmt or ('jsonl' if path.endswith('.jsonl') else 'json')
+        if fmt not in self.FORMATS:
+            raise ValueError(f"未知的追踪输出格式: {fmt}")
+
+        self.path = path
+        self.fmt = fmt
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events = []
+        self._actions = {}
+
+        if fmt == 'jsonl':
+            # 新会话从空文件开始
+            open(path, 'w', encoding='utf-8').close()
+
+    def _ts(self, t: float) -> float:
+        """perf_counter时间转换为trace时间戳（微秒）"""
+        return round((t - self._origin) * 1e6, 1)
+
+    def _emit(self, name: str, cat: str, start: float, end: float, args: Dict[str, Any]):
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': self._ts(start),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def _close_segment(self, span: _Span, now: float, final: bool):
+        """结束span的当前一段"""
+        span.active += now - span.segment_start
+        span.parts += 1
+        args = dict(span.args)
+        if span.parts > 1 or not final:
+            args['part'] = span.parts
+        if final:
+            args['active_ms'] = round(span.active * 1000, 3)
+            args['queries'] = span.queries
+        self._emit(span.name, span.cat, span.segment_start, now, args)
+
+    @contextmanager
+    def span(self, name: str, cat: str = 'action', **args):
+        """
+        打开一个span
+
+        Args:
+            name: span名称（如处理函数名）
+            cat: 类别
+            **args: 附加在事件上的参数
+        """
+        span = _Span(self, name, cat, args)
+        stack = _stack()
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            self._close_segment(span, time.perf_counter(), final=True)
+            if not stack:
+                self._record_action(span)
+
+    def _record_action(self, span: _Span):
+        """顶层span结束：汇总并（jsonl格式时）写出"""
+        with self._lock:
+            action = self._actions.get(span.name)
+            if action is None:
+                action = self._actions[span.name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'queries': 0}
+            action['count'] += 1
+            action['total'] += span.active
+            action['max'] = max(action['max'], span.active)
+            action['queries'] += span.queries
+        if self.fmt == 'jsonl':
+            self.flush()
+
+    def record(self, sql: str, params, elapsed: float, rows: int = 0, error: bool = False):
+        """记录一条SQL为当前span的子span（不在任何span中时忽略）"""
+        stack = _stack()
+        if not stack:
+            return
+        for span in stack:
+            span.queries += 1
+        end = time.perf_counter()
+        key = fingerprint(sql)
+        self._emit(key[:60], 'sql', end - elapsed, end,
+                   {'sql': key, 'rows': rows, 'error': error})
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """各操作的服务端耗时汇总（按总耗时降序）"""
+        with self._lock:
+            result = [{
+                'action': name,
+                'count': a['count'],
+                'total_ms': round(a['total'] * 1000, 3),
+                'mean_ms': round(a['total'] / a['count'] * 1000, 3),
+                'max_ms': round(a['max'] * 1000, 3),
+                'queries_per_call': round(a['queries'] / a['count'], 1),
+            } for name, a in self._actions.items()]
+        result.sort(key=lambda r: r['total_ms'], reverse=True)
+        return result
+
+    def flush(self):
+        """写出事件（json格式整体重写文件，jsonl格式追加并清空缓冲）"""
+        with self._lock:
+            if self.fmt == 'jsonl':
+                events, self._events = self._events, []
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for event in events:
+                        f.write(json.dumps(event, ensure_ascii=False) + '\n')
+            else:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump({'traceEvents': self._events, 'displayTimeUnit': 'ms'}, f,
+                              ensure_ascii=False)
+
+    def close(self):
+        """写出剩余事件"""
+        self.flush()
+
+
+@contextmanager
+def pause():
+    """暂停当前线程所有打开的span（块内时间不计入span，如等待用户输入）"""
+    stack = _stack()
+    if not stack:
+        yield
+        return
+    now = time.perf_counter()
+    for span in stack:
+        span.tracer._close_segment(span, now, final=False)
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        for span in stack:
+            span.segment_start = now
+
+
+def wait_input(prompt: str = '') -> str:
+    """读取用户输入，等待时间不计入span"""
+    with pause():
+        return input(prompt)
+
+
+def traced(func):
+    """把对象方法包装为一个span（对象的tracer属性为None时不追踪）"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        tracer = getattr(self, 'tracer', None)
+        if tracer is None:
+            return func(self, *args, **kwargs)
+        with tracer.span(func.__name__):
+            return func(self, *args, **kwargs)
+    return wrapper